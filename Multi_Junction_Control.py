@@ -0,0 +1,61 @@
+from AAPI import *
+from PyANGKernel import GKSystem
+from pascal.background import BackgroundWriter
+from pascal.history import MovementHistory
+from pascal.multi import MultiJunctionController
+from pascal.recording import output_path
+from pascal.sensing import IncrementalSensor
+from pascal.trace import DecisionTrace
+
+# Algorithm run at every junction: "varaiya", "capacity_aware", "le", "levin" or "pascal"
+algorithm = "pascal"
+j_ids = [1427, 505, 985, 1134, 1978]
+
+# None scans vehicles at every decision; IncrementalSensor() counts from the entry and exit callbacks below
+sensor = None
+
+# None keeps no history; MovementHistory(slots, ("vehicles", "pressure")) keeps the last slots decisions of every junction
+history = None
+
+# None traces nothing; DecisionTrace(output_path("decisions.trace")) appends every decision to a binary file (pascal.trace)
+trace = None
+
+# None writes the trace (and verbose lines) inside the step; BackgroundWriter(log_path=output_path("pascal.log")) hands them to a thread
+background = None
+
+# Calling active model using scripting and later on it will be used to get the lane length
+model = GKSystem.getSystem().getActiveModel()
+
+controller = MultiJunctionController.for_algorithm(algorithm, j_ids, sensor, history, trace, background)
+
+def AAPILoad():
+    return 0
+
+def AAPIInit():
+    return 0
+
+def AAPISimulationReady():
+    controller.simulation_ready(model)
+    return 0
+
+def AAPIManage(time1, timeSta, timeTrans, acycle):
+    return 0
+
+def AAPIPostManage(time1, timeSta, timeTrans, acycle):
+    return controller.post_manage(time1, timeSta, timeTrans, acycle)
+
+def AAPIEnterVehicleSection(idveh, idsection, atime):
+    return controller.enter_vehicle_section(idveh, idsection, atime)
+
+def AAPIExitVehicleSection(idveh, idsection, atime):
+    return controller.exit_vehicle_section(idveh, idsection, atime)
+
+def AAPIFinish():
+    controller.finish()
+    return 0
+
+def AAPIUnLoad():
+    return 0
+
+def AAPIPreRouteChoiceCalculation(time1, timeSta):
+    return 0
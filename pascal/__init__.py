@@ -0,0 +1,6 @@
+"""
+Shared building blocks for the PASCAL and max-pressure signal controllers.
+
+The per-junction Aimsun scripts in the repository root import from here so
+that sensing, geometry and actuation code is written once.
+"""
@@ -0,0 +1,73 @@
+"""
+Signal actuation through a local mirror of the signal group states.
+
+Until a controller first changes a signal, the junction runs its control plan
+and the states are whatever the plan shows, so they are read from Aimsun. The
+first change calls ECIDisableEvents, once for the life of the junction, and
+reads every state once; from then on only the controller changes the signals,
+so the mirror knows every state without asking. A change to the state a signal
+group already shows is skipped, and reads are answered from the mirror.
+"""
+import AAPI
+
+
+class SignalMirror:
+    """
+    Signal group states of one junction as the controller last set them.
+
+    states     - {signal group: state}, filled when control is taken
+    changes    - ECIChangeSignalGroupState calls issued
+    suppressed - changes skipped because the signal group already showed the state
+    reads      - ECIGetCurrentStateofSignalGroup calls made (before and when taking control)
+    """
+
+    def __init__(self, junction_id):
+        self.junction_id = junction_id
+        self.signal_groups = []
+        self.states = {}
+        self.in_control = False
+        self.changes = 0
+        self.suppressed = 0
+        self.reads = 0
+
+    def attach(self, signal_groups):
+        """Signal groups of the junction, from its topology in simulation_ready."""
+        self.signal_groups = list(signal_groups)
+
+    def take_control(self):
+        """Stops the control plan (ECIDisableEvents) and reads the states it left, on the first call only."""
+        if self.in_control:
+            return
+        AAPI.ECIDisableEvents(self.junction_id)
+        for signal_group in self.signal_groups:
+            self.states[signal_group] = AAPI.ECIGetCurrentStateofSignalGroup(self.junction_id, signal_group)
+        self.reads += len(self.signal_groups)
+        self.in_control = True
+
+    def state(self, signal_group):
+        """Current state of a signal group: from the mirror once in control, else from the plan."""
+        if self.in_control:
+            return self.states[signal_group]
+        self.reads += 1
+        return AAPI.ECIGetCurrentStateofSignalGroup(self.junction_id, signal_group)
+
+    def set_state(self, signal_groups, state, timeSta, time1, acycle):
+        """Sets signal_groups to state, taking control first; signal groups already in state are left alone."""
+        self.take_control()
+        states = self.states
+        for signal_group in signal_groups:
+            if states.get(signal_group) == state:
+                self.suppressed += 1
+                continue
+            AAPI.ECIChangeSignalGroupState(self.junction_id, signal_group, state, timeSta, time1, acycle)
+            states[signal_group] = state
+            self.changes += 1
+
+    def report_lines(self):
+        requested = self.changes + self.suppressed
+        return [f"Signals of junction {self.junction_id}: {self.changes} of {requested} state changes issued, "
+                f"{self.suppressed} suppressed, {self.reads} state reads"]
+
+    def report(self):
+        for line in self.report_lines():
+            AAPI.AKIPrintString(line)
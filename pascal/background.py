@@ -0,0 +1,155 @@
+"""
+Background output thread.
+
+Debug lines, CSV rows and trace records written from AAPIPostManage hold up
+the simulation step while the file is written. A BackgroundWriter moves that
+work to a thread of its own: the callback only puts a small tuple, the
+function to call and its arguments, on a bounded queue, and the thread makes
+the calls in order:
+
+    background = BackgroundWriter(log_path=output_path("pascal.log"))
+    background.put(writer.append, row)    # instead of writer.append(row)
+    background.log("Critical phase is 3")  # instead of AKIPrintString
+    ...
+    background.close()                     # from AAPIFinish, before closing the writers
+
+Lines from log() go to the file at log_path, since AKIPrintString belongs to
+the simulation thread. The queue is a collections.deque, whose append and
+popleft are atomic, so neither side takes a lock; the thread wakes every poll
+seconds and empties it. When the queue holds capacity items, put() waits until
+the thread has made room: rows and records are output data and are never
+dropped. log() drops the new line instead, or with block=True waits as well.
+Both are counted, so report() shows whether output kept up with the
+simulation.
+
+Arguments are used by the thread after put() has returned: pass objects that
+the caller does not change afterwards (a new row list, not one it refills).
+"""
+import collections
+import os
+import threading
+import time
+
+import AAPI
+
+
+class BackgroundWriter:
+    """
+    enqueued      - items put on the queue
+    written       - items the thread has handled
+    dropped       - log lines dropped because the queue was full (block=False)
+    blocked       - calls that had to wait for room
+    block_seconds - time spent waiting for room
+    max_depth     - most items ever waiting
+    errors        - calls that raised; the first error is kept in first_error
+    """
+
+    def __init__(self, capacity=10000, block=False, log_path=None, poll=0.05):
+        self.capacity = capacity
+        self.block = block
+        self.poll = poll
+        self.queue = collections.deque()
+        self.log_path = log_path
+        self.log_file = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.block_seconds = 0.0
+        self.max_depth = 0
+        self.errors = 0
+        self.first_error = None
+        self.closing = False
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="pascal-background-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, function, *args):
+        """
+        Queues function(*args) for the thread, waiting for room when the queue
+        is full; after close() the call is made at once.
+        """
+        self.enqueue(function, args, True)
+
+    def log(self, message):
+        """Queues a line for the log file, dropped when the queue is full unless block is set."""
+        self.enqueue(self.write_line, (message,), self.block)
+
+    def enqueue(self, function, args, block):
+        if self.closed:
+            function(*args)
+            return
+        queue = self.queue
+        depth = len(queue)
+        if depth >= self.capacity:
+            if not block:
+                self.dropped += 1
+                return
+            self.blocked += 1
+            start = time.perf_counter()
+            while len(queue) >= self.capacity:
+                time.sleep(self.poll / 10)
+            self.block_seconds += time.perf_counter() - start
+            depth = len(queue)
+        queue.append((function, args))
+        self.enqueued += 1
+        if depth >= self.max_depth:
+            self.max_depth = depth + 1
+
+    def write_line(self, message):
+        if self.log_file is None:
+            if self.log_path is None:
+                raise ValueError("BackgroundWriter.log needs a log_path")
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.log_file = open(self.log_path, "a")
+        self.log_file.write(message + "\n")
+
+    def drain(self):
+        queue = self.queue
+        while queue:
+            function, args = queue.popleft()
+            try:
+                function(*args)
+            except Exception as error:
+                self.errors += 1
+                if self.first_error is None:
+                    self.first_error = error
+            self.written += 1
+        if self.log_file is not None:
+            self.log_file.flush()
+
+    def run(self):
+        while not self.closing:
+            self.drain()
+            time.sleep(self.poll)
+        self.drain()
+
+    def close(self):
+        """
+        Waits until every queued item is written and stops the thread. Returns
+        True on the first call, False when already closed, so that a writer
+        shared by several controllers is closed and reported once.
+        """
+        if self.closed:
+            return False
+        self.closing = True
+        self.thread.join()
+        self.drain()
+        self.closed = True
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        return True
+
+    def report_lines(self):
+        lines = [f"Background writer: {self.written} of {self.enqueued} items written, {self.dropped} dropped, "
+                 f"{self.blocked} waits for room ({self.block_seconds * 1e3:.1f} ms), queue peak {self.max_depth} of {self.capacity}"]
+        if self.errors:
+            lines.append(f"Background writer: {self.errors} calls failed, first: {self.first_error!r}")
+        return lines
+
+    def report(self):
+        for line in self.report_lines():
+            AAPI.AKIPrintString(line)
@@ -0,0 +1,377 @@
+"""
+Compatible movement sets for PASCAL.
+
+conflict_matrix[movement] lists the movements that may run green together with
+movement. For every movement we keep the maximal groups of its compatible
+movements that are also pairwise compatible; PASCAL then greens the critical
+movement together with the group carrying the highest total pressure.
+
+Both solvers work on bitmasks of the compatibility graph, one bit per movement:
+
+CompatibilityLattice - enumerates the maximal groups of every movement once, as
+                       cliques of the graph, and keeps a table of their
+                       movements per movement, so scoring all groups of a
+                       decision is a few vectorized additions (small junctions)
+CliqueSearch         - finds the best group per decision by branch and bound,
+                       with a cap on the work per decision (large junctions)
+
+select_solver picks one by junction size. Both pick the group the original
+list-based search picked: each group is summed movement by movement in its own
+order, so a float sum comes out the same, and ties go to the first group in
+its order (longest first, then by row positions).
+
+The groups of a CompatibilityLattice are saved under CACHE_DIR, keyed by a
+hash of the conflict matrix, so later replications and script reloads read
+them instead of enumerating them again.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# Set to None to switch the on-disk cache off, e.g. for offline runs on a synthetic network
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+
+
+def bits(mask):
+    """Indices of the set bits of mask, lowest first."""
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+def maximal_cliques(candidates, adjacency):
+    """
+    Masks of the maximal cliques of the graph induced by the candidates mask
+    (Bron-Kerbosch with pivoting); adjacency[i] is the mask of neighbours of i.
+    """
+    cliques = []
+
+    def expand(clique, possible, excluded):
+        if not possible and not excluded:
+            cliques.append(clique)
+            return
+        pivot = max(bits(possible | excluded), key=lambda i: bin(adjacency[i] & possible).count("1"))
+        for i in bits(possible & ~adjacency[pivot]):
+            bit = 1 << i
+            expand(clique | bit, possible & adjacency[i], excluded & adjacency[i])
+            possible &= ~bit
+            excluded |= bit
+
+    if candidates:
+        expand(0, candidates, 0)
+    return cliques
+
+
+class CompatibilityGraph:
+    """
+    Compatibility graph of a conflict matrix, one bit per movement.
+
+    names     - movements in conflict matrix order; movement names[i] is bit i
+    index     - {movement: bit}
+    adjacency - [mask of the movements compatible with names[i]] (either row listing the other counts)
+    rows      - {movement: mask of its own conflict matrix row}
+    position  - {movement: {bit: position of that movement in the row}}
+    """
+
+    def __init__(self, conflict_matrix):
+        self.conflict_matrix = conflict_matrix
+        self.names = list(conflict_matrix)
+        if len(self.names) > 64:
+            raise ValueError(f"{type(self).__name__} holds at most 64 movements, got {len(self.names)}")
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.adjacency = [0] * len(self.names)
+        self.rows = {}
+        self.position = {}
+        for name, compatible in conflict_matrix.items():
+            row = 0
+            for other in compatible:
+                row |= 1 << self.index[other]
+                self.adjacency[self.index[name]] |= 1 << self.index[other]
+                self.adjacency[self.index[other]] |= 1 << self.index[name]
+            self.rows[name] = row
+            self.position[name] = {self.index[element]: k for k, element in enumerate(compatible)}
+        # A row may list its own movement (985); a clique never needs the loop
+        for i in range(len(self.names)):
+            self.adjacency[i] &= ~(1 << i)
+
+    def weight_vector(self, criteria_values_signal_group_name):
+        """Weights by name as an array in names order; movements without a weight count 0."""
+        return np.array([criteria_values_signal_group_name.get(name, 0) for name in self.names], dtype=np.float64)
+
+    def heaviest(self, group, weights):
+        """Movement of group with the highest weight, the first in names order on ties."""
+        return max(group, key=lambda name: (weights[self.index[name]], -self.index[name]))
+
+
+class CompatibilityLattice(CompatibilityGraph):
+    """
+    Every maximal compatible group of every movement, enumerated once when the
+    conflict matrix is loaded, so that a decision only scores a table.
+
+    members      - {movement: int array (groups x longest group), the bits of each group in
+                   order, padded with len(names), the index of a zero weight}
+    combinations - {movement: [[name, ...], ...]}, the groups in order
+    all_combinations, all_members - the same for the maximal groups of the whole junction
+
+    The groups of a movement are ordered longest first, then by the positions
+    of their movements in its conflict matrix row, and the movements of a
+    group by those positions, as the original enumeration of every subset
+    listed them; the groups of the whole junction follow names order. The
+    number of groups grows exponentially with dense compatibility; see
+    CliqueSearch for large junctions.
+
+    row_groups and junction_groups, as returned by enumerate_groups, skip the
+    enumeration, e.g. when loading a saved lattice.
+    """
+
+    def __init__(self, conflict_matrix, row_groups=None, junction_groups=None):
+        super().__init__(conflict_matrix)
+        if row_groups is None or junction_groups is None:
+            row_groups, junction_groups = self.enumerate_groups()
+        self.key = conflict_matrix_key(conflict_matrix)
+        self.row_groups = row_groups
+        self.junction_groups = junction_groups
+        self.members = {}
+        self.combinations = {}
+        for name in self.names:
+            groups = row_groups[name]
+            self.combinations[name] = [[self.names[i] for i in group] for group in groups]
+            self.members[name] = self.member_table(groups)
+        self.all_combinations = [[self.names[i] for i in group] for group in junction_groups]
+        self.all_members = self.member_table(junction_groups)
+
+    def member_table(self, groups):
+        longest = max((len(group) for group in groups), default=0)
+        table = np.full((len(groups), longest), len(self.names), dtype=np.intp)
+        for row, group in enumerate(groups):
+            table[row, :len(group)] = group
+        return table
+
+    @staticmethod
+    def group_sums(members, weights):
+        """
+        Total weight of every group of a member table, added movement by
+        movement in group order, so that every total is the float a plain sum
+        over the group gives.
+        """
+        # cumsum adds strictly left to right, unlike sum, which may add pairwise
+        return np.append(weights, 0.0)[members].cumsum(axis=1)[:, -1]
+
+    def enumerate_groups(self):
+        """
+        ({movement: [group, ...]}, [group, ...]): the ordered maximal groups of
+        every movement's row and of the whole junction, a group being a list of
+        movement bits.
+        """
+        row_groups = {}
+        for name in self.names:
+            position = self.position[name]
+            groups = [sorted(bits(clique), key=position.get) for clique in maximal_cliques(self.rows[name], self.adjacency)]
+            groups.sort(key=lambda group: (-len(group), [position[i] for i in group]))
+            row_groups[name] = groups
+        junction_groups = sorted((bits(clique) for clique in maximal_cliques((1 << len(self.names)) - 1, self.adjacency)),
+                                 key=lambda group: (-len(group), group))
+        return row_groups, junction_groups
+
+    def save(self, path):
+        """Writes the groups as one (owner, mask) row per group; owner -1 marks a group of the whole junction."""
+        owners = []
+        masks = []
+        for i, name in enumerate(self.names):
+            for group in self.row_groups[name]:
+                owners.append(i)
+                masks.append(sum(1 << j for j in group))
+        for group in self.junction_groups:
+            owners.append(-1)
+            masks.append(sum(1 << j for j in group))
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, key=self.key, owners=np.array(owners, dtype=np.int32), masks=np.array(masks, dtype=np.uint64))
+
+    @classmethod
+    def load(cls, path, conflict_matrix):
+        """
+        Lattice of conflict_matrix from a file written by save; KeyError when
+        the file was saved for another conflict matrix.
+        """
+        key = conflict_matrix_key(conflict_matrix)
+        with np.load(path) as data:
+            if str(data["key"]) != key:
+                raise KeyError(f"{path} holds the groups of another conflict matrix")
+            owners = data["owners"].tolist()
+            masks = data["masks"].tolist()
+        names = list(conflict_matrix)
+        position = {name: {names.index(element): k for k, element in enumerate(elements)}
+                    for name, elements in conflict_matrix.items()}
+        row_groups = {name: [] for name in names}
+        junction_groups = []
+        for owner, mask in zip(owners, masks):
+            if owner < 0:
+                junction_groups.append(bits(mask))
+            else:
+                row_groups[names[owner]].append(sorted(bits(mask), key=position[names[owner]].get))
+        return cls(conflict_matrix, row_groups, junction_groups)
+
+    def best_combination(self, critical_signal_group, weights):
+        """
+        The group of critical_signal_group with the highest total of weights
+        (an array from weight_vector), the first one on ties; None when the
+        movement has no compatible movement.
+        """
+        members = self.members.get(critical_signal_group)
+        if members is None or not len(members):
+            return None
+        return self.combinations[critical_signal_group][int(np.argmax(self.group_sums(members, weights)))]
+
+    def best_set(self, weights):
+        """
+        Maximal compatible set of the whole junction with the highest total of
+        weights, as a list of names in names order; the first of
+        all_combinations on ties.
+        """
+        if not len(self.all_members):
+            return None
+        return self.all_combinations[int(np.argmax(self.group_sums(self.all_members, weights)))]
+
+
+class CliqueSearch(CompatibilityGraph):
+    """
+    Maximum-weight maximal compatible group found per decision by branch and
+    bound, without enumerating the groups at load.
+
+    The search walks the maximal cliques of the critical movement's row as
+    Bron-Kerbosch does and drops a branch as soon as the weight gathered so
+    far plus every positive weight still available cannot beat the best group
+    found. It starts from a greedy group (heaviest compatible movement first),
+    and stops after max_nodes branches with the best group found by then, so
+    a decision costs at most max_nodes steps however dense the junction; those
+    searches are counted in truncated. Without truncation it returns the group
+    CompatibilityLattice returns, ties included.
+    """
+
+    def __init__(self, conflict_matrix, max_nodes=5000):
+        super().__init__(conflict_matrix)
+        self.max_nodes = max_nodes
+        self.searches = 0
+        self.nodes = 0
+        self.truncated = 0
+
+    def group_key(self, mask, weights, position):
+        """Sort key of a group, higher is better: sum, then length, then earlier row positions."""
+        group = sorted(bits(mask), key=position.get)
+        return sum(weights[i] for i in group), len(group), [-position[i] for i in group]
+
+    def search(self, candidates, weights, position):
+        adjacency = self.adjacency
+        # Greedy incumbent: add the heaviest movement still compatible until none is left
+        incumbent, possible = 0, candidates
+        while possible:
+            i = max(bits(possible), key=lambda j: (weights[j], -position[j]))
+            incumbent |= 1 << i
+            possible &= adjacency[i]
+        best = [incumbent, self.group_key(incumbent, weights, position)]
+        budget = [self.max_nodes]
+        # Float sums of the same movements in another order differ by far less than this
+        slack = 1e-9 * (sum(abs(weights[i]) for i in bits(candidates)) + 1.0)
+
+        def expand(clique, clique_weight, possible, excluded):
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+            if not possible:
+                if not excluded:
+                    key = self.group_key(clique, weights, position)
+                    if key > best[1]:
+                        best[0], best[1] = clique, key
+                return
+            bound = clique_weight + sum(weights[i] for i in bits(possible) if weights[i] > 0)
+            if bound < best[1][0] - slack:
+                return
+            pivot = max(bits(possible | excluded), key=lambda i: bin(adjacency[i] & possible).count("1"))
+            for i in sorted(bits(possible & ~adjacency[pivot]), key=lambda j: -weights[j]):
+                bit = 1 << i
+                expand(clique | bit, clique_weight + weights[i], possible & adjacency[i], excluded & adjacency[i])
+                possible &= ~bit
+                excluded |= bit
+
+        expand(0, 0.0, candidates, 0)
+        self.searches += 1
+        self.nodes += self.max_nodes - budget[0]
+        if budget[0] <= 0:
+            self.truncated += 1
+        return sorted(bits(best[0]), key=position.get)
+
+    def best_combination(self, critical_signal_group, weights):
+        """Same contract as CompatibilityLattice.best_combination."""
+        candidates = self.rows.get(critical_signal_group)
+        if not candidates:
+            return None
+        group = self.search(candidates, list(weights), self.position[critical_signal_group])
+        return [self.names[i] for i in group]
+
+    def best_set(self, weights):
+        """Same contract as CompatibilityLattice.best_set."""
+        if not self.names:
+            return None
+        group = self.search((1 << len(self.names)) - 1, list(weights), {i: i for i in range(len(self.names))})
+        return [self.names[i] for i in group]
+
+
+def conflict_matrix_key(conflict_matrix):
+    """Fingerprint of a conflict matrix; the order of rows and of their movements counts."""
+    text = repr([(name, list(compatible)) for name, compatible in conflict_matrix.items()])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_or_build_lattice(conflict_matrix, cache_dir=None):
+    """
+    Returns the CompatibilityLattice of conflict_matrix, reading it from
+    cache_dir when it was saved there before and enumerating and saving it
+    otherwise. cache_dir defaults to CACHE_DIR, read at call time; when both
+    are None the groups are always enumerated.
+    """
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"compatibility_{conflict_matrix_key(conflict_matrix)[:16]}.npz")
+        if os.path.exists(path):
+            try:
+                return CompatibilityLattice.load(path, conflict_matrix)
+            except (OSError, KeyError, ValueError, IndexError):
+                pass
+    lattice = CompatibilityLattice(conflict_matrix)
+    if path is not None:
+        try:
+            lattice.save(path)
+        except OSError:
+            pass
+    return lattice
+
+
+# Junctions with at most this many movements get the enumerated table
+SMALL_GRAPH_MOVEMENTS = 20
+
+
+def select_solver(conflict_matrix, solver=None):
+    """
+    Compatible group solver for a conflict matrix: solver itself when it is
+    an object, "lattice" or "search" by name, and by default the enumerated
+    CompatibilityLattice for up to SMALL_GRAPH_MOVEMENTS movements (read
+    from the on-disk cache when possible) and CliqueSearch above that.
+    """
+    if solver is None:
+        solver = "lattice" if len(conflict_matrix) <= SMALL_GRAPH_MOVEMENTS else "search"
+    if solver == "lattice":
+        return load_or_build_lattice(conflict_matrix)
+    if solver == "search":
+        return CliqueSearch(conflict_matrix)
+    if isinstance(solver, str):
+        raise ValueError(f"Unknown solver {solver!r}, expected 'lattice' or 'search'")
+    return solver
@@ -0,0 +1,246 @@
+"""
+Network configuration file.
+
+Everything the controllers know about the network beyond what Aimsun reports
+lives in one JSON file, pascal/network.json by default (the environment
+variable PASCAL_NETWORK_CONFIG points to another one):
+
+    {
+      "space_headway_jam": 6.5,
+      "timing": {"amber_time": 2, "all_red_time": 2, "min_green": 15, "max_green": 60, "sat_flow": 2},
+      "controllers": {"le": {"eta": 2.5}, ...},     optional, settings of each algorithm
+      "section_upstream": {"552": [658], ...},      signal section -> split sections upstream
+      "section_downstream": {"778": [769], ...},    destination section -> split sections downstream
+      "junctions": {
+        "505": {
+          "name": "ss",
+          "approach_signal_groups": {"nb": 1, "sb": 10, "eb": 7, "wb": 5},
+          "conflict_matrix": {"NB Th": ["NB LT", ...], ...},
+          "timing": {"min_green": 10},              optional, overrides the network timing
+          "controllers": {"le": {"cycle_time": 80}} optional, overrides the algorithm settings
+        }
+      }
+    }
+
+The file is read and checked once; every problem found is reported together
+in one ValueError. Adding a junction means adding an entry under "junctions".
+"""
+import json
+import os
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "network.json")
+
+TIMING_KEYS = ("amber_time", "all_red_time", "min_green", "max_green", "sat_flow")
+
+# Settings each algorithm takes from "controllers" (see pascal.controllers.build_controller)
+CONTROLLER_KEYS = {
+    "varaiya": ("time_step", "verbose"),
+    "capacity_aware": ("time_step", "m", "c_infinity", "verbose"),
+    "le": ("time_step", "eta", "cycle_time", "verbose"),
+    "levin": ("time_step", "max_cycle_time", "verbose"),
+    "pascal": ("time_step", "queue_weighted", "verbose"),
+}
+FLAG_KEYS = ("verbose", "queue_weighted")
+
+
+class JunctionConfig:
+    """
+    name                   - short name, e.g. for output columns
+    approach_signal_groups - {approach ('nb', 'sb', 'eb', 'wb'): signal group}
+    conflict_matrix        - {movement: [movements compatible with it, ...]}
+    timing                 - network timing with the junction's overrides applied
+    controllers            - {algorithm: settings}, the network settings with the junction's overrides applied
+    """
+
+    def __init__(self, junction_id, name, approach_signal_groups, conflict_matrix, timing, controllers=None):
+        self.junction_id = junction_id
+        self.name = name
+        self.approach_signal_groups = approach_signal_groups
+        self.conflict_matrix = conflict_matrix
+        self.timing = timing
+        self.controllers = controllers or {}
+
+
+class NetworkConfig:
+    """
+    space_headway_jam  - metres of lane per stopped vehicle
+    timing             - {amber_time, all_red_time, min_green, max_green, sat_flow} of junctions without overrides
+    controllers        - {algorithm: settings} of junctions without overrides
+    section_upstream   - {signal section: [split section upstream, ...]}
+    section_downstream - {destination section: [split section downstream, ...]}
+    junctions          - {junction id: JunctionConfig} in file order
+    """
+
+    def __init__(self, space_headway_jam, timing, section_upstream, section_downstream, junctions, path=None, controllers=None):
+        self.space_headway_jam = space_headway_jam
+        self.timing = timing
+        self.controllers = controllers or {}
+        self.section_upstream = section_upstream
+        self.section_downstream = section_downstream
+        self.junctions = junctions
+        self.path = path
+
+    def junction_timing(self, junction_id):
+        """Timing of junction_id, the network timing for a junction that is not configured."""
+        junction = self.junctions.get(junction_id)
+        return dict(junction.timing) if junction is not None else dict(self.timing)
+
+    def controller_settings(self, algorithm, junction_id):
+        """Settings of algorithm at junction_id, the network settings for a junction that is not configured."""
+        junction = self.junctions.get(junction_id)
+        controllers = junction.controllers if junction is not None else self.controllers
+        return dict(controllers.get(algorithm, {}))
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        problems = []
+
+        def number(value, where, positive=True):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"{where}: expected a number, got {value!r}")
+                return None
+            if value < 0 or positive and value == 0:
+                problems.append(f"{where}: must be {'positive' if positive else 'zero or more'}, got {value!r}")
+                return None
+            return value
+
+        def section_id(text, where):
+            try:
+                value = int(text)
+            except (TypeError, ValueError):
+                problems.append(f"{where}: section id {text!r} is not an integer")
+                return None
+            if value <= 0:
+                problems.append(f"{where}: section id {value} must be positive")
+                return None
+            return value
+
+        def obj(value, where):
+            if not isinstance(value, dict):
+                problems.append(f"{where}: expected an object, got {type(value).__name__}")
+                return {}
+            return value
+
+        def timing_of(value, where, required):
+            timing = {}
+            value = obj(value, where)
+            for key in value:
+                if key not in TIMING_KEYS:
+                    problems.append(f"{where}: unknown key {key!r}, expected {', '.join(TIMING_KEYS)}")
+            for key in TIMING_KEYS:
+                if key in value:
+                    timing[key] = number(value[key], f"{where}.{key}", positive=key not in ("amber_time", "all_red_time"))
+                elif required:
+                    problems.append(f"{where}: missing {key!r}")
+            return timing
+
+        def controllers_of(value, where):
+            controllers = {}
+            for algorithm, settings in obj(value, where).items():
+                if algorithm not in CONTROLLER_KEYS:
+                    problems.append(f"{where}: unknown algorithm {algorithm!r}, expected {', '.join(CONTROLLER_KEYS)}")
+                    continue
+                controllers[algorithm] = {}
+                for key, setting in obj(settings, f"{where}.{algorithm}").items():
+                    if key not in CONTROLLER_KEYS[algorithm]:
+                        problems.append(f"{where}.{algorithm}: unknown key {key!r}, expected {', '.join(CONTROLLER_KEYS[algorithm])}")
+                    elif key in FLAG_KEYS:
+                        if not isinstance(setting, bool):
+                            problems.append(f"{where}.{algorithm}.{key}: expected true or false, got {setting!r}")
+                        controllers[algorithm][key] = setting
+                    else:
+                        controllers[algorithm][key] = number(setting, f"{where}.{algorithm}.{key}")
+            return controllers
+
+        def check_greens(timing, where):
+            if timing.get("min_green") is not None and timing.get("max_green") is not None:
+                if timing["min_green"] > timing["max_green"]:
+                    problems.append(f"{where}: min_green {timing['min_green']} exceeds max_green {timing['max_green']}")
+
+        def chains(value, where):
+            table = {}
+            for key, chain in obj(value, where).items():
+                sid = section_id(key, where)
+                if not isinstance(chain, list) or not all(isinstance(s, int) and not isinstance(s, bool) and s > 0 for s in chain):
+                    problems.append(f"{where}.{key}: expected a list of section ids, got {chain!r}")
+                    continue
+                if sid is not None:
+                    table[sid] = chain
+            return table
+
+        data = obj(data, "network")
+        for key in ("space_headway_jam", "timing", "section_upstream", "section_downstream", "junctions"):
+            if key not in data:
+                problems.append(f"network: missing {key!r}")
+        space_headway_jam = number(data.get("space_headway_jam", 1), "space_headway_jam")
+        timing = timing_of(data.get("timing", {}), "timing", required=True)
+        check_greens(timing, "timing")
+        controllers = controllers_of(data.get("controllers", {}), "controllers")
+        section_upstream = chains(data.get("section_upstream", {}), "section_upstream")
+        section_downstream = chains(data.get("section_downstream", {}), "section_downstream")
+
+        junctions = {}
+        for key, junction in obj(data.get("junctions", {}), "junctions").items():
+            where = f"junctions.{key}"
+            try:
+                junction_id = int(key)
+            except ValueError:
+                problems.append(f"{where}: junction id {key!r} is not an integer")
+                continue
+            junction = obj(junction, where)
+            for field in junction:
+                if field not in ("name", "approach_signal_groups", "conflict_matrix", "timing", "controllers"):
+                    problems.append(f"{where}: unknown key {field!r}")
+            name = junction.get("name", str(junction_id))
+            if not isinstance(name, str):
+                problems.append(f"{where}.name: expected a string, got {name!r}")
+
+            approach_signal_groups = {}
+            for approach, signal_group in obj(junction.get("approach_signal_groups", {}), f"{where}.approach_signal_groups").items():
+                if isinstance(signal_group, bool) or not isinstance(signal_group, int) or signal_group < 1:
+                    problems.append(f"{where}.approach_signal_groups.{approach}: expected a signal group number, got {signal_group!r}")
+                else:
+                    approach_signal_groups[approach] = signal_group
+
+            if "conflict_matrix" not in junction:
+                problems.append(f"{where}: missing 'conflict_matrix'")
+            conflict_matrix = {}
+            rows = obj(junction.get("conflict_matrix", {}), f"{where}.conflict_matrix")
+            for movement, compatible in rows.items():
+                if not isinstance(compatible, list) or not all(isinstance(other, str) for other in compatible):
+                    problems.append(f"{where}.conflict_matrix[{movement!r}]: expected a list of movement names, got {compatible!r}")
+                    continue
+                for other in compatible:
+                    if other not in rows:
+                        problems.append(f"{where}.conflict_matrix[{movement!r}]: unknown movement {other!r}")
+                if len(set(compatible)) != len(compatible):
+                    problems.append(f"{where}.conflict_matrix[{movement!r}]: lists a movement twice")
+                conflict_matrix[movement] = compatible
+
+            junction_timing = dict(timing)
+            junction_timing.update(timing_of(junction.get("timing", {}), f"{where}.timing", required=False))
+            check_greens(junction_timing, f"{where}.timing")
+            junction_controllers = {algorithm: dict(settings) for algorithm, settings in controllers.items()}
+            for algorithm, settings in controllers_of(junction.get("controllers", {}), f"{where}.controllers").items():
+                junction_controllers.setdefault(algorithm, {}).update(settings)
+            junctions[junction_id] = JunctionConfig(junction_id, name, approach_signal_groups, conflict_matrix, junction_timing,
+                                                    junction_controllers)
+
+        if problems:
+            raise ValueError(f"Invalid network config {path or ''}:\n  " + "\n  ".join(problems))
+        return cls(space_headway_jam, timing, section_upstream, section_downstream, junctions, path, controllers)
+
+
+def load_network_config(path=None):
+    """
+    Reads and validates a network config file: path, else the file named by
+    PASCAL_NETWORK_CONFIG, else pascal/network.json.
+    """
+    if path is None:
+        path = os.environ.get("PASCAL_NETWORK_CONFIG") or DEFAULT_PATH
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid network config {path}: {error}") from None
+    return NetworkConfig.from_dict(data, path)
@@ -0,0 +1,621 @@
+"""
+Signal controllers for one junction.
+
+Every controller owns the state that the per-junction scripts used to keep in
+module globals and is driven from the Aimsun callbacks of a thin entry script:
+
+    controller = build_controller("varaiya", 505)
+
+    def AAPISimulationReady():
+        controller.simulation_ready(model)
+        return 0
+
+    def AAPIPostManage(time1, timeSta, timeTrans, acycle):
+        return controller.post_manage(time1, timeSta, timeTrans, acycle)
+
+MaxPressureController - Varaiya / Capacity-Aware, fixed green of time_step seconds
+LeController          - Le et al., softmax green splits over a fixed cycle
+LevinController       - Levin et al., cycle-constrained max pressure
+PascalController      - PASCAL, critical movement plus best compatible group
+
+build_controller makes the controller of an algorithm for a junction with the
+settings of the network config (time_step, cycle_time, ...; see pascal.config).
+"""
+import time
+
+import numpy as np
+
+import AAPI
+
+from pascal import profiling
+from pascal.actuation import SignalMirror
+from pascal.compatibility import select_solver
+from pascal.geometry import load_or_build_geometry
+from pascal.history import UPSTREAM, DOWNSTREAM
+from pascal.instrumentation import DecisionTimings
+from pascal.network import SECTION_UPSTREAM, SECTION_DOWNSTREAM, SPACE_HEADWAY_JAM, CONFLICT_MATRICES, junction_timing, controller_settings
+from pascal.policies import VaraiyaPressure, CapacityAwarePressure, PascalPressure, CyclePhasePicker, TurningTable, measure_movements, phase_pressures, softmax_green_splits
+from pascal.scheduling import AWAKE, StateClock, deadline
+from pascal.sensing import SectionSnapshot
+from pascal.topology import JunctionTopology
+
+green_signal = 1 # Green signal code in Aimsun API
+red_signal = 0 # Red signal code in Aimsun API
+amber_signal = 2 # Amber signal code in Aimsun API
+
+
+class JunctionController:
+    """
+    Shared part of every controller: the topology and geometry of the junction,
+    built in simulation_ready, one measurement of all its turnings and the
+    decision timings, reported by finish(). Subclasses implement step().
+
+    With split_sections (a pascal.discovery.SplitSectionDiscovery) the split
+    section dicts are derived from the network in simulation_ready instead.
+
+    A controller that calls wait() sleeps until its current state ends:
+    post_manage skips the steps before wakeup (see pascal.scheduling).
+
+    With history (a pascal.history.MovementHistory with "vehicles" and
+    "pressure" columns, possibly shared by several controllers) every
+    measurement is also kept there, at the time1 of its step. With trace (a
+    pascal.trace.DecisionTrace) every decision appends a record of the
+    pressures, the signal groups chosen and their green time. With background
+    (a pascal.background.BackgroundWriter) the verbose log lines and the trace
+    records are written by its thread instead of inside the step.
+    """
+
+    def __init__(self, junction_id, policy, section_upstream_dict=SECTION_UPSTREAM, section_downstream_dict=SECTION_DOWNSTREAM,
+                 space_headway_jam=SPACE_HEADWAY_JAM, verbose=False, sensor=None, split_sections=None, history=None, trace=None,
+                 background=None):
+        self.junction_id = junction_id
+        self.policy = policy
+        self.section_upstream_dict = section_upstream_dict
+        self.section_downstream_dict = section_downstream_dict
+        self.space_headway_jam = space_headway_jam
+        self.verbose = verbose
+        self.sensor = sensor  # None reads through pascal.sensing.DEFAULT_SENSOR
+        self.split_sections = split_sections
+        self.history = history
+        self.trace = trace
+        self.background = background
+        self.topology = None
+        self.geometry = None
+        self.table = None
+        self.origin_sections = []
+        self.destination_sections = []
+        self.timings = DecisionTimings(junction_id)
+        self.signals = SignalMirror(junction_id)
+        self.wakeup = AWAKE  # time1 of the next step that runs step()
+        self.now = None      # time1 of the step running
+
+    def timing_value(self, name, value):
+        """value, or when it is None the configured timing of the junction (see pascal.config)."""
+        return value if value is not None else junction_timing(self.junction_id)[name]
+
+    def simulation_ready(self, model):
+        profiling.enable_from_environment()
+        if self.split_sections is not None:
+            self.section_upstream_dict, self.section_downstream_dict = self.split_sections.discover()
+        self.topology = JunctionTopology.build(self.junction_id)
+        self.signals.attach(self.topology.signal_groups)
+        if self.history is not None:
+            self.history.add_junction(self.junction_id, self.topology.signal_groups)
+        if self.trace is not None:
+            self.trace.check(self.junction_id, self.topology.signal_groups)
+        # Sections a measurement reads lane by lane (origins) and as totals (destinations)
+        origins = {}
+        destinations = {}
+        for signal_group, turning in self.topology.iter_turnings():
+            for section_id in list(self.section_upstream_dict[turning.from_section]) + [turning.from_section]:
+                origins[section_id] = True
+            for section_id in [turning.to_section] + list(self.section_downstream_dict[turning.to_section]):
+                destinations[section_id] = True
+        self.origin_sections = list(origins)
+        self.destination_sections = list(destinations)
+        if hasattr(self.sensor, "watch"):
+            self.sensor.watch(self.origin_sections + self.destination_sections)
+        if self.policy.origin_cap is not None:
+            start = time.perf_counter()
+            self.geometry = load_or_build_geometry(model, self.topology, self.section_upstream_dict, self.section_downstream_dict, self.space_headway_jam)
+            self.timings.record("geometry", time.perf_counter() - start)
+        self.table = TurningTable(self.topology, self.section_upstream_dict, self.section_downstream_dict, self.geometry)
+
+    def measure(self, snapshot=None):
+        if snapshot is None:
+            snapshot = SectionSnapshot(self.sensor)
+        snapshot.prefetch(self.origin_sections)
+        snapshot.prefetch_totals(self.destination_sections)
+        self.timings.lap("sensing")
+        measurements = measure_movements(self.topology, snapshot, self.policy, self.geometry, self.section_upstream_dict, self.section_downstream_dict, self.table)
+        if self.verbose:
+            for signal_group, veh_num_diff in measurements.weight.items():
+                self.log(f"Signal Group {signal_group} = {measurements.names[signal_group]} with vehicle difference = {veh_num_diff}")
+        if self.history is not None:
+            self.record_history(measurements)
+        self.timings.lap("pressure")
+        return measurements
+
+    def record_history(self, measurements):
+        signal_groups = list(measurements.weight)
+        history = self.history
+        history.record(self.now, self.junction_id, signal_groups, UPSTREAM, "vehicles", [measurements.origin_veh[sg] for sg in signal_groups])
+        history.record(self.now, self.junction_id, signal_groups, DOWNSTREAM, "vehicles", [measurements.dest_veh[sg] for sg in signal_groups])
+        history.record(self.now, self.junction_id, signal_groups, UPSTREAM, "pressure", [measurements.weight[sg] for sg in signal_groups])
+
+    def trace_decision(self, pressures, chosen, green):
+        """Appends a decision to the trace, if any: pressures {signal group: pressure}, chosen signal groups, green seconds."""
+        if self.trace is None:
+            return
+        if self.background is not None:
+            self.background.put(self.trace.append, self.now, self.junction_id, pressures, tuple(chosen), green)
+        else:
+            self.trace.append(self.now, self.junction_id, pressures, chosen, green)
+
+    def enter_vehicle_section(self, idveh, idsection, atime):
+        """AAPIEnterVehicleSection, for sensors that count from vehicle events (IncrementalSensor)."""
+        if hasattr(self.sensor, "enter"):
+            self.sensor.enter(idveh, idsection, atime)
+        return 0
+
+    def exit_vehicle_section(self, idveh, idsection, atime):
+        """AAPIExitVehicleSection, see enter_vehicle_section."""
+        if hasattr(self.sensor, "exit"):
+            self.sensor.exit(idveh, idsection, atime)
+        return 0
+
+    def set_state(self, signal_groups, state, timeSta, time1, acycle):
+        """Changes signal_groups to state through the signal mirror (see pascal.actuation)."""
+        self.signals.set_state(signal_groups, state, timeSta, time1, acycle)
+
+    def log(self, message):
+        if self.verbose:
+            if self.background is not None:
+                self.background.log(message)
+            else:
+                AAPI.AKIPrintString(message)
+
+    def wait(self, time1, seconds):
+        """Sleeps until the step seconds after time1, the end of the state entered now."""
+        self.wakeup = deadline(time1, seconds)
+
+    def post_manage(self, time1, timeSta, timeTrans, acycle, snapshot=None):
+        """
+        One simulation step, timed, unless the controller sleeps until a later
+        step. snapshot is an optional SectionSnapshot of this tick shared with
+        other junctions; a fresh one is used when it is None.
+        """
+        if time1 < self.wakeup:
+            return 0
+        self.now = time1
+        profiler = profiling.profiler
+        if profiler is not None:
+            profiler.begin_decision()
+        self.timings.begin()
+        result = self.step(time1, timeSta, timeTrans, acycle, snapshot)
+        self.timings.end()
+        if profiler is not None:
+            profiler.end_decision()
+        return result
+
+    def step(self, time1, timeSta, timeTrans, acycle, snapshot=None):
+        raise NotImplementedError
+
+    def finish(self, report_profile=True, report_sensor=True):
+        """
+        Prints the decision timings, the signal changes, the sensor check if any
+        and, when profiling is on, the AAPI call table; writes the rest of the
+        background queue and of the trace.
+        """
+        self.timings.report()
+        self.signals.report()
+        if self.background is not None and self.background.close():
+            self.background.report()
+        if self.trace is not None:
+            self.trace.close()
+        if report_sensor and hasattr(self.sensor, "report"):
+            self.sensor.report()
+        if report_profile and profiling.profiler is not None:
+            profiling.profiler.report()
+
+
+class FixedIntervalController(JunctionController):
+    """
+    Fixed-interval timing shared by the Varaiya, Capacity-Aware and Le scripts:
+    after time_step seconds of green the green signal groups go amber, after
+    amber_time everything goes red, and after all_red_time decide() picks the
+    next green. The first step decides at once. The greens follow from it on
+    the grid of a StateClock, whatever the step size; amber and all red last
+    at least their configured time from the step that entered them (see
+    pascal.scheduling).
+    """
+
+    def __init__(self, junction_id, policy, time_step, amber_time=None, all_red_time=None, **kwargs):
+        super().__init__(junction_id, policy, **kwargs)
+        self.time_step = time_step
+        self.amber_time = self.timing_value("amber_time", amber_time)
+        self.all_red_time = self.timing_value("all_red_time", all_red_time)
+        self.signal_state = "ALLRED"  # "GREEN", "AMBER" or "ALLRED"; the first step ends an all red
+        self.state_clock = StateClock()
+
+    def wait(self, time1, seconds, clearance=False):
+        """Sleeps until the state entered now ends on the state clock; see StateClock.start for clearance."""
+        self.wakeup = self.state_clock.start(time1, seconds, clearance)
+
+    def step(self, time1, timeSta, timeTrans, acycle, snapshot=None):
+        # Only called once the current state has run its time (see wait)
+        if self.signal_state == "GREEN":
+            green_groups = [i for i in self.topology.signal_groups
+                            if self.signals.state(i) == 1]
+            self.set_state(green_groups, amber_signal, timeSta, time1, acycle)
+            self.timings.lap("actuation")
+            self.signal_state = "AMBER"
+            self.wait(time1, self.amber_time, clearance=True)
+
+        elif self.signal_state == "AMBER":
+            self.set_state(self.topology.signal_groups, red_signal, timeSta, time1, acycle)
+            self.timings.lap("actuation")
+            self.signal_state = "ALLRED"
+            self.wait(time1, self.all_red_time, clearance=True)
+
+        # All red over (or first step): signal control decision
+        else:
+            self.log(f"JUNCTION ID = {self.junction_id}")
+            self.decide(time1, timeSta, acycle, snapshot)
+            self.signal_state = "GREEN"
+            self.wait(time1, self.time_step)
+        return 0
+
+    def decide(self, time1, timeSta, acycle, snapshot=None):
+        raise NotImplementedError
+
+
+class MaxPressureController(FixedIntervalController):
+    """Greens the phase of highest pressure for time_step seconds (Varaiya, Capacity-Aware)."""
+
+    def __init__(self, junction_id, policy=None, time_step=20, **kwargs):
+        super().__init__(junction_id, policy if policy is not None else VaraiyaPressure(), time_step, **kwargs)
+
+    def decide(self, time1, timeSta, acycle, snapshot=None):
+        measurements = self.measure(snapshot)
+        pressure_for_phase = phase_pressures(self.topology, measurements.weight)
+        for phase, pressure_phase in pressure_for_phase.items():
+            self.log(f"Pressure for {phase} = {pressure_phase}")
+        self.timings.lap("pressure")
+
+        # Find the phase with the maximum pressure
+        critical_phase = max(pressure_for_phase, key=pressure_for_phase.get)
+        self.log(f'Critical phase is: {critical_phase}')
+        critical_sg_list = list(self.topology.phases[critical_phase])
+        red_sg = [sg for sg in measurements.weight if sg not in critical_sg_list]
+        self.log(f"CRITICAL SIGNAL GROUPS LIST = {critical_sg_list}")
+        self.log(f"RED SIGNAL GROUPS LIST = {red_sg}")
+        self.trace_decision(measurements.weight, critical_sg_list, self.time_step)
+        self.timings.lap("selection")
+
+        self.set_state(critical_sg_list, green_signal, timeSta, time1, acycle)
+        #Change the signal state for all other signal groups to Red
+        self.set_state(red_sg, red_signal, timeSta, time1, acycle)
+        self.timings.lap("actuation")
+
+
+class LeController(FixedIntervalController):
+    """
+    Splits a cycle of cycle_time green seconds (amber and all red not included)
+    over all phases with softmax_green_splits and serves the phases in order,
+    measuring again only when the cycle is used up.
+    """
+
+    def __init__(self, junction_id, policy=None, time_step=5, eta=2.5, cycle_time=100, min_green=None, **kwargs):
+        super().__init__(junction_id, policy if policy is not None else VaraiyaPressure(), time_step, **kwargs)
+        self.eta = eta
+        self.cycle_time = cycle_time
+        self.min_green = self.timing_value("min_green", min_green)
+        self.phase_pool = []
+        self.green_duration_phase = []
+
+    def decide(self, time1, timeSta, acycle, snapshot=None):
+        pressures = {}  # none when the cycle goes on without measuring
+        if all(not sublist for sublist in self.phase_pool):
+            measurements = self.measure(snapshot)
+            pressures = measurements.weight
+            pressure_for_phase = phase_pressures(self.topology, measurements.weight)
+            self.timings.lap("pressure")
+            self.phase_pool = [list(phase_signal_groups) for phase_signal_groups in self.topology.phases.values()]
+            self.green_duration_phase = softmax_green_splits(list(pressure_for_phase.values()), self.eta, self.cycle_time, self.min_green)
+            self.log(f'Green durations are: {self.green_duration_phase}')
+            all_signal_groups_id = list(measurements.weight)
+        else:
+            self.log(f"PHASE POOL UPDATED = {self.phase_pool}")
+            all_signal_groups_id = list(self.topology.signal_groups)
+
+        critical_sg_list = next((sublist for sublist in self.phase_pool if sublist), None)
+        red_sg = [sg for sg in all_signal_groups_id if sg not in critical_sg_list]
+        self.timings.lap("selection")
+
+        #Change the signal state for current phase's signal groups to Green
+        self.set_state(critical_sg_list, green_signal, timeSta, time1, acycle)
+        #Change the signal state for all other signal groups to Red
+        self.set_state(red_sg, red_signal, timeSta, time1, acycle)
+        self.timings.lap("actuation")
+
+        self.time_step = self.green_duration_phase[0]
+        self.phase_pool = self.phase_pool[1:]
+        self.green_duration_phase = self.green_duration_phase[1:]
+        self.trace_decision(pressures, critical_sg_list, self.time_step)
+
+
+class LevinController(JunctionController):
+    """
+    GREEN / AMBER / ALLRED state machine:
+      1) Stay in GREEN at least 'time_step' seconds.
+      2) Then run the cycle-constrained max-pressure logic to see if we switch phases.
+      3) If same phase -> skip amber/all-red, just extend green.
+         If different phase -> amber -> all-red -> new green.
+    Between these decisions the controller sleeps until its state ends.
+    """
+
+    def __init__(self, junction_id, policy=None, time_step=15, amber_time=None, all_red_time=None, max_cycle_time=8, **kwargs):
+        super().__init__(junction_id, policy if policy is not None else VaraiyaPressure(), **kwargs)
+        self.time_step = time_step
+        self.amber_time = self.timing_value("amber_time", amber_time)
+        self.all_red_time = self.timing_value("all_red_time", all_red_time)
+        self.cycle = CyclePhasePicker(max_cycle_time)  # max_cycle_time in terms of phase picks
+        self.signal_state = "GREEN"   # can be: "GREEN", "AMBER", or "ALLRED"
+        self.current_phase = None     # which phase is currently green
+        self.next_phase = None        # which phase we'll switch to after amber/all-red
+
+    def show_phase(self, phase, timeSta, time1, acycle, state=green_signal):
+        """Sets the signal groups of phase to state and every other signal group to red."""
+        phase_sg_list = self.topology.phases[phase]
+        self.set_state(phase_sg_list, state, timeSta, time1, acycle)
+        self.set_state([sg_id for sg_id in self.topology.signal_groups if sg_id not in phase_sg_list], red_signal, timeSta, time1, acycle)
+        self.timings.lap("actuation")
+
+    def step(self, time1, timeSta, timeTrans, acycle, snapshot=None):
+        # Only called once the current state has run its time (see wait)
+        if self.signal_state == "GREEN":
+            # If no phase is active yet, pick an initial phase immediately
+            if self.current_phase is None:
+                self.log("No current_phase set yet; picking an initial phase.")
+                self.current_phase = self.pick_critical_phase(snapshot)
+                self.log(f"Initial phase chosen: {self.current_phase}")
+                self.show_phase(self.current_phase, timeSta, time1, acycle)
+                self.wait(time1, self.time_step)
+                return 0
+
+            # GREEN for time_step seconds, consider switching
+            self.log(f"Time in GREEN >= {self.time_step}s, checking next phase.")
+            critical_phase_candidate = self.pick_critical_phase(snapshot)
+
+            if critical_phase_candidate == self.current_phase:
+                # No actual change: stay in GREEN
+                self.log(f"Same phase {self.current_phase} chosen; extend GREEN.")
+                self.wait(time1, self.time_step)
+            else:
+                # We plan to switch: current phase groups to AMBER, others RED
+                self.next_phase = critical_phase_candidate
+                self.log(f"Phase {self.current_phase} -> {self.next_phase}: going to AMBER.")
+                self.show_phase(self.current_phase, timeSta, time1, acycle, amber_signal)
+                self.signal_state = "AMBER"
+                self.wait(time1, self.amber_time)
+
+        elif self.signal_state == "AMBER":
+            # After 'amber_time' seconds, go ALL-RED
+            self.log("AMBER time done, switching to ALL-RED.")
+            self.set_state(self.topology.signal_groups, red_signal, timeSta, time1, acycle)
+            self.timings.lap("actuation")
+            self.signal_state = "ALLRED"
+            self.wait(time1, self.all_red_time)
+
+        elif self.signal_state == "ALLRED":
+            # After 'all_red_time' seconds, finalize the new phase
+            self.log("ALL-RED done, moving to new phase GREEN.")
+            self.current_phase = self.next_phase
+            self.show_phase(self.current_phase, timeSta, time1, acycle)
+            self.signal_state = "GREEN"
+            self.wait(time1, self.time_step)
+        return 0
+
+    def pick_critical_phase(self, snapshot=None):
+        cycle_counter = self.cycle.advance()
+        self.log(f"JUNCTION ID = {self.junction_id}, cycle_counter = {cycle_counter}")
+        measurements = self.measure(snapshot)
+        self.log(f"Remaining Cycle Steps: {self.cycle.remaining_cycle_steps()}")
+
+        def phase_pressure(phase):
+            return sum(measurements.weight[signal_group_id] for signal_group_id in self.topology.phases[phase])
+
+        critical_phase = self.cycle.pick(list(self.topology.phases), phase_pressure)
+        self.trace_decision(measurements.weight, self.topology.phases[critical_phase], self.time_step)
+        self.timings.lap("selection")
+        return critical_phase
+
+
+class PascalController(JunctionController):
+    """
+    Movement-based GREEN / AMBER / ALLRED state machine:
+    - We remain in 'GREEN' until we exceed 'time_step' seconds in state.
+    - Then we pick a new set of movements (via 'pick_new_green_set').
+    - Movements leaving green => AMBER -> ALLRED.
+    - Movements continuing => stay green, no amber or red for them.
+    - Movements newly added => wait until old ones finish all-red, then go green.
+    The green time of the next set follows the queue of its critical movement,
+    between min_green and max_green. Between these decisions the controller
+    sleeps until its state ends.
+
+    solver finds the compatible group, see pascal.compatibility.select_solver.
+    With anchor_critical=False a fresh selection takes the maximal compatible
+    set of highest total pressure of the whole junction, and its heaviest
+    movement becomes the critical one, instead of the best group around the
+    movement of highest pressure.
+    """
+
+    def __init__(self, junction_id, policy=None, conflict_matrix=None, time_step=5, amber_time=None, all_red_time=None,
+                 sat_flow=None, max_green=None, min_green=None, solver=None, anchor_critical=True, **kwargs):
+        super().__init__(junction_id, policy if policy is not None else PascalPressure(), **kwargs)
+        self.conflict_matrix = conflict_matrix if conflict_matrix is not None else CONFLICT_MATRICES[junction_id]
+        self.solver = select_solver(self.conflict_matrix, solver)
+        self.anchor_critical = anchor_critical
+        self.time_step = time_step     # minimum green time before re-selecting
+        self.amber_time = self.timing_value("amber_time", amber_time)
+        self.all_red_time = self.timing_value("all_red_time", all_red_time)
+        self.sat_flow = self.timing_value("sat_flow", sat_flow)
+        self.max_green = self.timing_value("max_green", max_green)
+        self.min_green = self.timing_value("min_green", min_green)
+        self.signal_state = "GREEN"        # can be "GREEN", "AMBER", "ALLRED"
+        self.current_green_set = set()     # which signal groups are green right now
+        self.next_green_set = set()        # which signal groups we plan to turn green
+        self.movements_to_turn_off = set() # which signal groups are leaving green
+        self.selection_pool = []
+
+    def step(self, time1, timeSta, timeTrans, acycle, snapshot=None):
+        if self.wakeup == AWAKE:
+            # The initial green counts from the step before the first one
+            self.wait(time1 - acycle, self.time_step)
+            if time1 < self.wakeup:
+                return 0
+
+        # From here on only called once the current state has run its time (see wait)
+        if self.signal_state == "GREEN":
+            # Green for 'time_step' seconds, see if we want to pick new movements
+            self.next_green_set = self.pick_new_green_set(snapshot)
+
+            self.current_green_set.clear()
+            for i in self.topology.signal_groups:
+                state_sg = self.signals.state(i)
+                if state_sg == 1:
+                    self.current_green_set.add(i)
+
+            # Find which movements are continuing vs turning off
+            continuing = self.current_green_set.intersection(self.next_green_set)
+            self.movements_to_turn_off = self.current_green_set - continuing
+
+            if len(self.movements_to_turn_off) == 0:
+                # If there's no difference, we keep the same set => green for the new time_step
+                self.wait(time1, self.time_step)
+            else:
+                # Only the movements leaving green go AMBER; continuing movements remain green
+                self.set_state(self.movements_to_turn_off, amber_signal, timeSta, time1, acycle)
+                self.signal_state = "AMBER"
+                self.wait(time1, self.amber_time)
+            self.timings.lap("actuation")
+
+        elif self.signal_state == "AMBER":
+            # After 'amber_time' seconds, the movements_to_turn_off go fully RED
+            self.set_state(self.movements_to_turn_off, red_signal, timeSta, time1, acycle)
+            self.timings.lap("actuation")
+            self.signal_state = "ALLRED"
+            self.wait(time1, self.all_red_time)
+
+        elif self.signal_state == "ALLRED":
+            # After 'all_red_time' seconds, only the truly new movements are turned green
+            new_movements = self.next_green_set - self.current_green_set
+            self.set_state(new_movements, green_signal, timeSta, time1, acycle)
+            self.timings.lap("actuation")
+            self.movements_to_turn_off.clear()
+            self.signal_state = "GREEN"
+            self.wait(time1, self.time_step)
+        return 0
+
+    def pick_new_green_set(self, snapshot=None):
+        """
+        Decides the next set of green signal groups without actuating them.
+        With an empty selection pool the critical movement is the one of highest
+        pressure and the pool is refilled with every movement left red; otherwise
+        the critical movement is the pool member of highest pressure and the
+        movements served now leave the pool.
+        """
+        measurements = self.measure(snapshot)
+        signal_group_veh_diff = measurements.weight
+        signal_group_name = measurements.names
+        criteria_values_signal_group_name = {signal_group_name.get(key, key): value
+                                             for key, value in signal_group_veh_diff.items()}
+
+        weights = self.solver.weight_vector(criteria_values_signal_group_name)
+        best_compli_combi = None
+        if not self.selection_pool and not self.anchor_critical:
+            # Best compatible set of the junction => its heaviest movement is critical
+            best_set = self.solver.best_set(weights)
+            critical_signal_group = self.solver.heaviest(best_set, weights)
+            best_compli_combi = [name for name in best_set if name != critical_signal_group]
+        elif not self.selection_pool:
+            # Find the movement with max pressure => critical
+            critical_signal_group = max(criteria_values_signal_group_name,
+                                        key=criteria_values_signal_group_name.get)
+        else:
+            selection_pool_array = np.array(self.selection_pool)
+            common_sg = np.intersect1d(list(signal_group_veh_diff.keys()), selection_pool_array)
+            max_key = common_sg[np.argmax([signal_group_veh_diff[key] for key in common_sg])]
+            critical_signal_group = signal_group_name[max_key]
+
+        if best_compli_combi is None:
+            best_compli_combi = self.solver.best_combination(critical_signal_group, weights)
+        all_signal_groups = list(criteria_values_signal_group_name.keys())
+        red_signal_groups = [sg for sg in all_signal_groups
+                             if sg != critical_signal_group and sg not in best_compli_combi]
+        self.log(f'Critical signal group is: {critical_signal_group}')
+        self.log(f'Final complimentary signal groups: {best_compli_combi}')
+        self.log(f'Red signal groups: {red_signal_groups}')
+
+        # Convert critical + best_compli into their numeric IDs
+        critical_signal_group_num = [k for k, v in signal_group_name.items()
+                                     if v == critical_signal_group]
+        best_compli_combi_num = [k for k, v in signal_group_name.items()
+                                 if v in best_compli_combi]
+        red_signal_groups_num = [k for k, v in signal_group_name.items()
+                                 if v in red_signal_groups]
+
+        # The new green set is the union of critical_signal_group_num + best_compli_combi_num
+        new_green = set()
+        new_green.update(critical_signal_group_num)
+        new_green.update(best_compli_combi_num)
+
+        critical = critical_signal_group_num[0]
+        new_ts = round(min((measurements.origin_veh[critical] * self.sat_flow
+                            / measurements.origin_lanes[critical]),
+                           (measurements.dest_spare_cap[critical] * self.sat_flow
+                            / measurements.dest_lanes[critical]),
+                           self.max_green))
+        if new_ts < self.min_green:
+            new_ts = self.min_green
+        self.time_step = new_ts
+        self.log(f'NEW TIME STEP = {self.time_step}')
+
+        if not self.selection_pool:
+            self.selection_pool = red_signal_groups_num
+        else:
+            self.selection_pool = [mov for mov in self.selection_pool
+                                   if mov not in critical_signal_group_num and mov not in best_compli_combi_num]
+        self.log(f'UPDATED SELECTION POOL = {self.selection_pool}')
+        self.trace_decision(signal_group_veh_diff, new_green, self.time_step)
+        self.timings.lap("selection")
+        return new_green
+
+
+# Controller and pressure policy of each algorithm, by its name in the network config
+ALGORITHMS = {
+    "varaiya": (MaxPressureController, VaraiyaPressure),
+    "capacity_aware": (MaxPressureController, CapacityAwarePressure),
+    "le": (LeController, VaraiyaPressure),
+    "levin": (LevinController, VaraiyaPressure),
+    "pascal": (PascalController, PascalPressure),
+}
+
+# Settings that go to the pressure policy instead of the controller
+POLICY_SETTINGS = ("m", "c_infinity", "queue_weighted")
+
+
+def build_controller(algorithm, junction_id, **kwargs):
+    """
+    The controller of algorithm (a key of ALGORITHMS) for junction_id, with the
+    settings of the junction in the network config. kwargs go to the controller
+    too and win over the config, e.g. sensor=IncrementalSensor().
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {sorted(ALGORITHMS)}")
+    controller_class, policy_class = ALGORITHMS[algorithm]
+    settings = controller_settings(algorithm, junction_id)
+    settings.update(kwargs)
+    policy = policy_class(**{key: settings.pop(key) for key in POLICY_SETTINGS if key in settings})
+    return controller_class(junction_id, policy, **settings)
@@ -0,0 +1,123 @@
+"""
+Split-section discovery.
+
+SECTION_UPSTREAM and SECTION_DOWNSTREAM list the extra sections whose vehicles
+count as queue storage of a turning: the sections upstream of a signal section
+and downstream of a destination section that continue the same road without
+any turn in between. SplitSectionDiscovery derives them from the network
+instead:
+
+    discovery = SplitSectionDiscovery(max_distance=300)
+    controller = PascalController(junction_id, PascalPressure(), split_sections=discovery)
+
+The section graph is read once through AKIInfNet (every section and the
+destinations of its turnings), on the first simulation_ready; every controller
+sharing the discovery reuses it. From each signal section the chain walks
+upstream, and from each destination section downstream, while the road
+continues one to one: the next section is the only neighbour and has no other
+on its far side. It stops at a merge or diverge, at a signal or destination
+section of a configured junction (see pascal.config), or before a section
+that would take the length of the chain past max_distance metres (None for no
+limit).
+
+as_config() gives the chains in the form of pascal/network.json, to replace the
+hand-made dicts there.
+"""
+import AAPI
+
+from pascal.network import NETWORK
+
+
+def read_section_graph():
+    """
+    ({section: [successor, ...]}, {section: [predecessor, ...]}, {section: length})
+    for every section of the network.
+    """
+    successors = {}
+    lengths = {}
+    for index in range(AAPI.AKIInfNetNbSectionsANG()):
+        section_id = AAPI.AKIInfNetGetSectionANGId(index)
+        section = AAPI.AKIInfNetGetSectionANGInf(section_id)
+        lengths[section_id] = section.length
+        successors[section_id] = []
+        for turning_index in range(section.nbTurnings):
+            destination = AAPI.AKIInfNetGetIdSectionANGDestinationofTurning(section_id, turning_index)
+            if destination not in successors[section_id]:
+                successors[section_id].append(destination)
+    predecessors = {section_id: [] for section_id in successors}
+    for section_id, destinations in successors.items():
+        for destination in destinations:
+            predecessors.setdefault(destination, []).append(section_id)
+    return successors, predecessors, lengths
+
+
+def junction_sections(junction_id):
+    """(signal sections, destination sections) of the turnings of a junction, read through ECI."""
+    signal_sections = set()
+    destination_sections = set()
+    for signal_group in range(1, AAPI.ECIGetNumberSignalGroups(junction_id) + 1):
+        for turning_index in range(AAPI.ECIGetNumberTurningsofSignalGroup(junction_id, signal_group)):
+            from_section = AAPI.intp()
+            to_section = AAPI.intp()
+            if AAPI.ECIGetFromToofTurningofSignalGroup(junction_id, signal_group, turning_index, from_section, to_section) == 0:
+                signal_sections.add(from_section.value())
+                destination_sections.add(to_section.value())
+    return signal_sections, destination_sections
+
+
+class SplitSectionDiscovery:
+    """
+    Split-section chains of the junctions in junction_ids (default: every
+    junction of the network config), walked once.
+
+    upstream   - {signal section: [split sections upstream, nearest first]}
+    downstream - {destination section: [split sections downstream, nearest first]}
+    """
+
+    def __init__(self, junction_ids=None, max_distance=None):
+        self.junction_ids = list(junction_ids) if junction_ids is not None else list(NETWORK.junctions)
+        self.max_distance = max_distance
+        self.upstream = None
+        self.downstream = None
+
+    def walk(self, start, forward, backward, lengths, boundary):
+        chain = []
+        distance = 0.0
+        section_id = start
+        while True:
+            following = forward.get(section_id, [])
+            if len(following) != 1:
+                break
+            candidate = following[0]
+            if len(backward.get(candidate, [])) != 1 or candidate in boundary or candidate == start or candidate in chain:
+                break
+            length = lengths.get(candidate, 0.0)
+            if self.max_distance is not None and distance + length > self.max_distance:
+                break
+            chain.append(candidate)
+            distance += length
+            section_id = candidate
+        return chain
+
+    def discover(self):
+        """Reads the network and walks every chain; later calls return the same dicts."""
+        if self.upstream is None:
+            successors, predecessors, lengths = read_section_graph()
+            signal_sections = set()
+            destination_sections = set()
+            for junction_id in self.junction_ids:
+                signals, destinations = junction_sections(junction_id)
+                signal_sections |= signals
+                destination_sections |= destinations
+            boundary = signal_sections | destination_sections
+            self.upstream = {section_id: self.walk(section_id, predecessors, successors, lengths, boundary)
+                             for section_id in sorted(signal_sections)}
+            self.downstream = {section_id: self.walk(section_id, successors, predecessors, lengths, boundary)
+                               for section_id in sorted(destination_sections)}
+        return self.upstream, self.downstream
+
+    def as_config(self):
+        """{"section_upstream": ..., "section_downstream": ...} with string keys, as in pascal/network.json."""
+        upstream, downstream = self.discover()
+        return {"section_upstream": {str(section_id): chain for section_id, chain in upstream.items()},
+                "section_downstream": {str(section_id): chain for section_id, chain in downstream.items()}}
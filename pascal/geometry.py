@@ -0,0 +1,164 @@
+"""
+Static lane-geometry cache.
+
+Lane lengths, and therefore the storage capacity of every turning, never change
+during a run. The cache reads them once through the model catalog when the
+simulation is ready and keeps one row per (signal group, turning) in numpy
+arrays, so a decision only indexes arrays and never touches the catalog.
+
+The arrays can be saved next to the scripts and reloaded by later replications
+of the same network, which then skip even the one-time catalog walk.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+import AAPI
+
+# Set to None to switch the on-disk cache off, e.g. for offline runs on a synthetic network
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+
+
+def section_lane_lengths(model, section_id):
+    """
+    Lane lengths of a section ordered from lane 1 (rightmost) upwards.
+    Central lanes report a side-lane length of 0 and take the section length.
+    """
+    lane_lengths = [lane.getSideLaneLength2D() for lane in model.getCatalog().find(section_id).getLanes()]
+    lane_lengths.reverse()
+    central_lane_length = AAPI.AKIInfNetGetSectionANGInf(section_id).length
+    return [central_lane_length if x == 0 else x for x in lane_lengths]
+
+
+def chain_lane_lengths(model, section_ids, num_lanes):
+    """Lane lengths of a chain of split sections added lane by lane, padded with zeros to at least num_lanes."""
+    total = [0.0] * num_lanes
+    for section_id in section_ids:
+        for i, length in enumerate(section_lane_lengths(model, section_id)):
+            if i == len(total):
+                total.append(0.0)
+            total[i] += length
+    return total
+
+
+def geometry_key(topology, section_upstream_dict, section_downstream_dict, space_headway_jam):
+    """
+    Fingerprint of everything the cached capacities depend on: the turnings of
+    the junction with their origin lanes, the split-section dicts, the jam
+    headway, and the length and lane count of every section the capacities
+    are read from.
+    """
+    turnings = []
+    section_ids = set()
+    for signal_group, turning in topology.iter_turnings():
+        turnings.append((signal_group, turning.index, turning.from_section, turning.to_section, tuple(turning.origin_lanes)))
+        section_ids.update([turning.from_section, turning.to_section])
+        section_ids.update(section_upstream_dict[turning.from_section])
+        section_ids.update(section_downstream_dict[turning.to_section])
+    sections = []
+    for section_id in sorted(section_ids):
+        info = AAPI.AKIInfNetGetSectionANGInf(section_id)
+        sections.append((section_id, float(info.length), info.nbCentralLanes + info.nbSideLanes))
+    text = repr((topology.junction_id, turnings, sorted(section_upstream_dict.items()), sorted(section_downstream_dict.items()),
+                 sections, float(space_headway_jam)))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class GeometryCache:
+    """
+    Storage capacities (in vehicles) for every turning of one junction.
+
+    turn_origin_cap     - origin lanes used by the turning, signal section plus split upstream section (PASCAL)
+    approach_origin_cap - every lane of the signal section plus split upstream section (Capacity-Aware, occupancy logger)
+    dest_cap            - every lane of the destination section plus split downstream section
+    """
+
+    ARRAYS = ("signal_group", "turning", "from_section", "to_section", "turn_origin_cap", "approach_origin_cap", "dest_cap")
+
+    def __init__(self, junction_id, key, arrays):
+        self.junction_id = junction_id
+        self.key = key
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.rows = {(int(sg), int(t)): row for row, (sg, t) in enumerate(zip(self.signal_group, self.turning))}
+
+    def row(self, signal_group, turning_index):
+        return self.rows[(signal_group, turning_index)]
+
+    @classmethod
+    def build(cls, model, topology, section_upstream_dict, section_downstream_dict, space_headway_jam):
+        columns = {name: [] for name in cls.ARRAYS}
+        for signal_group, turning in topology.iter_turnings():
+            from_id = turning.from_section
+            to_id = turning.to_section
+
+            from_section_lane_lengths = section_lane_lengths(model, from_id)
+            split_upstream_section_lane_lengths = chain_lane_lengths(model, section_upstream_dict[from_id], len(from_section_lane_lengths))
+            sum_origin_section_lengths = [a + b for a, b in zip(from_section_lane_lengths, split_upstream_section_lane_lengths)]
+
+            to_section_lane_lengths = section_lane_lengths(model, to_id)
+            split_downstream_section_lane_lengths = chain_lane_lengths(model, section_downstream_dict[to_id], len(to_section_lane_lengths))
+
+            turn_lane_length_origin = sum(sum_origin_section_lengths[k - 1] for k in turning.origin_lanes)
+            approach_length_origin = sum(from_section_lane_lengths) + sum(split_upstream_section_lane_lengths)
+            ## For downstream entire section length is considered as we do not know where the vehicles will go
+            turn_lane_length_dest = sum(to_section_lane_lengths) + sum(split_downstream_section_lane_lengths)
+
+            columns["signal_group"].append(signal_group)
+            columns["turning"].append(turning.index)
+            columns["from_section"].append(from_id)
+            columns["to_section"].append(to_id)
+            columns["turn_origin_cap"].append(turn_lane_length_origin / space_headway_jam)
+            columns["approach_origin_cap"].append(approach_length_origin / space_headway_jam)
+            columns["dest_cap"].append(turn_lane_length_dest / space_headway_jam)
+
+        arrays = {}
+        for name in cls.ARRAYS:
+            dtype = np.float64 if name.endswith("_cap") else np.int32
+            arrays[name] = np.array(columns[name], dtype=dtype)
+        key = geometry_key(topology, section_upstream_dict, section_downstream_dict, space_headway_jam)
+        return cls(topology.junction_id, key, arrays)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, junction_id=self.junction_id, key=self.key, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            return cls(int(data["junction_id"]), str(data["key"]), arrays)
+
+
+def load_or_build_geometry(model, topology, section_upstream_dict, section_downstream_dict, space_headway_jam, cache_dir=None):
+    """
+    Returns the GeometryCache of a junction, reading it from cache_dir when a
+    file built from the same turnings, sections, section dicts and jam headway
+    exists there, and building and saving it otherwise. cache_dir defaults to CACHE_DIR, read at
+    call time; when both are None the geometry is always rebuilt.
+    """
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+    junction_id = topology.junction_id
+    key = geometry_key(topology, section_upstream_dict, section_downstream_dict, space_headway_jam)
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"geometry_{junction_id}.npz")
+        if os.path.exists(path):
+            try:
+                geometry = GeometryCache.load(path)
+                if geometry.key == key:
+                    return geometry
+            except (OSError, KeyError, ValueError):
+                pass
+    geometry = GeometryCache.build(model, topology, section_upstream_dict, section_downstream_dict, space_headway_jam)
+    if path is not None:
+        try:
+            geometry.save(path)
+        except OSError:
+            pass
+    return geometry
@@ -0,0 +1,114 @@
+"""
+Per-movement time series in a preallocated ring buffer.
+
+A MovementHistory keeps the last `slots` samples of a set of junctions in one
+numpy structured array, allocated once, so its memory is the same after an
+hour or after a week of simulation:
+
+    history.data[slot, junction, signal group - 1, side][metric]
+
+side is UPSTREAM (0) or DOWNSTREAM (1) of the movement and metric one of the
+fields given when the history is made, e.g. ("vehicles", "occupancy") for the
+occupancy logger or ("vehicles", "pressure") for controllers, which keep the
+pressure of a signal group on its upstream side. Values not sampled in a slot
+are NaN. Once every slot is used the oldest sample is overwritten.
+
+history.columns[metric] is the float array of one metric over the same axes,
+and ordered() / series() hand out the samples oldest first. All of them are
+views of the buffer, without copying, unless the samples asked for wrap around
+its end.
+
+Junctions are added with their signal groups in simulation_ready; the buffer
+is allocated at the first sample, sized for the largest signal group number.
+"""
+import numpy as np
+
+UPSTREAM = 0
+DOWNSTREAM = 1
+
+
+class MovementHistory:
+    """
+    slots          - samples kept
+    metrics        - field names, one float column each
+    times          - float64[slots], time of each slot, NaN while unused
+    data           - structured array (slots, junctions, signal groups, 2), None before the first sample
+    junction_index - {junction id: index on the junction axis}
+    head           - slot of the latest sample
+    count          - samples recorded in total, also those overwritten since
+    """
+
+    def __init__(self, slots, metrics=("vehicles", "occupancy"), dtype=np.float64):
+        if slots < 1:
+            raise ValueError(f"A history needs at least one slot, got {slots!r}")
+        self.slots = slots
+        self.metrics = tuple(metrics)
+        self.dtype = np.dtype([(metric, dtype) for metric in self.metrics])
+        self.junction_index = {}
+        self.signal_group_count = 0
+        self.times = None
+        self.data = None
+        self.columns = {}
+        self.head = -1
+        self.count = 0
+
+    def add_junction(self, junction_id, signal_groups):
+        """Makes room for the signal groups (numbers from 1) of junction_id; only before the first sample."""
+        if self.data is not None:
+            raise ValueError(f"Junction {junction_id} added to a history that already holds samples")
+        self.junction_index.setdefault(junction_id, len(self.junction_index))
+        self.signal_group_count = max([self.signal_group_count] + list(signal_groups))
+
+    def allocate(self):
+        shape = (self.slots, len(self.junction_index), self.signal_group_count, 2)
+        self.data = np.full(shape, np.nan, dtype=self.dtype)
+        self.times = np.full(self.slots, np.nan)
+        self.columns = {metric: self.data[metric] for metric in self.metrics}
+
+    @property
+    def nbytes(self):
+        return 0 if self.data is None else self.data.nbytes + self.times.nbytes
+
+    def slot(self, time):
+        """
+        Slot of the sample at time: the latest slot when it holds that time
+        already, so junctions sampled in the same step share it, else the next
+        one, cleared to NaN.
+        """
+        if self.data is None:
+            self.allocate()
+        if self.count and self.times[self.head] == time:
+            return self.head
+        self.head = (self.head + 1) % self.slots
+        self.count += 1
+        self.times[self.head] = time
+        self.data[self.head] = (np.nan,) * len(self.metrics)
+        return self.head
+
+    def record(self, time, junction_id, signal_groups, side, metric, values):
+        """Stores values of metric, one per signal group of signal_groups, in the slot of time."""
+        slot = self.slot(time)
+        positions = np.asarray(signal_groups, dtype=np.intp) - 1
+        self.columns[metric][slot, self.junction_index[junction_id], positions, side] = values
+
+    def ordered(self, last=None):
+        """
+        (times, data) of the last samples kept (all of them when last is None),
+        oldest first.
+        """
+        kept = min(self.count, self.slots)
+        n = kept if last is None else min(last, kept)
+        if self.data is None or n == 0:
+            return np.empty(0), np.empty(0, dtype=self.dtype)
+        start = (self.head - n + 1) % self.slots
+        if start + n <= self.slots:
+            return self.times[start:start + n], self.data[start:start + n]
+        index = np.arange(start, start + n) % self.slots
+        return self.times[index], self.data[index]
+
+    def series(self, junction_id, signal_group, side, metric, last=None):
+        """(times, values) of one metric of one movement, oldest first."""
+        times, data = self.ordered(last)
+        if len(times) == 0:
+            return times, np.empty(0)
+        return times, data[metric][:, self.junction_index[junction_id], signal_group - 1, side]
@@ -0,0 +1,132 @@
+"""
+Decision-latency instrumentation.
+
+Every controller keeps a DecisionTimings. One AAPIPostManage call that runs
+the controller is a tick (steps a sleeping controller skips are not, see
+pascal.scheduling); inside it the controller marks the end of each stretch of
+work with lap(), so the time of a tick is split by what it was spent on:
+
+sensing   - reading vehicles on the monitored sections (AKIVehState*)
+geometry  - building or loading the lane-geometry cache in simulation_ready;
+            decisions only index its arrays, which counts as pressure
+pressure  - turning counts, weights and phase pressures
+selection - choosing the next phase or green set and its duration
+actuation - signal changes through the signal mirror (pascal.actuation)
+
+Samples go into log-spaced histograms, so recording costs a few arithmetic
+operations and the memory is fixed however long the run. Percentiles are read
+at the upper edge of their bucket, about 9% above the true value at worst.
+"""
+import math
+import time
+
+import AAPI
+
+PHASES = ("sensing", "geometry", "pressure", "selection", "actuation")
+
+
+class LatencyHistogram:
+    """Durations in seconds, bucketed on a log scale from min_seconds with bins_per_octave buckets per doubling."""
+
+    def __init__(self, min_seconds=1e-7, bins_per_octave=8, num_bins=320):
+        self.min_seconds = min_seconds
+        self.bins_per_octave = bins_per_octave
+        self.counts = [0] * num_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds <= self.min_seconds:
+            index = 0
+        else:
+            index = min(int(self.bins_per_octave * math.log2(seconds / self.min_seconds)), len(self.counts) - 1)
+        self.counts[index] += 1
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (0 < q <= 100), never above the maximum."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100.0 * self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.min_seconds * 2 ** ((index + 1) / self.bins_per_octave), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "n": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class DecisionTimings:
+    """
+    Per-junction tick and phase timings.
+
+        timings.begin()
+        ... read sections ...
+        timings.lap("sensing")
+        ... weigh turnings ...
+        timings.lap("pressure")
+        timings.end()
+
+    Laps of the same phase within one tick are added up and recorded once at
+    end(); a phase that did not run in a tick records nothing, so its
+    percentiles describe the ticks that needed it. "tick" covers every call.
+    """
+
+    def __init__(self, junction_id, clock=time.perf_counter):
+        self.junction_id = junction_id
+        self.clock = clock
+        self.histograms = {name: LatencyHistogram() for name in ("tick",) + PHASES}
+        self.tick_start = None
+        self.mark = None
+        self.pending = {}
+
+    def begin(self):
+        self.tick_start = self.mark = self.clock()
+        self.pending.clear()
+
+    def lap(self, phase):
+        """Charges the time since the last mark to phase."""
+        now = self.clock()
+        self.pending[phase] = self.pending.get(phase, 0.0) + now - self.mark
+        self.mark = now
+
+    def end(self):
+        now = self.clock()
+        self.histograms["tick"].record(now - self.tick_start)
+        for phase, seconds in self.pending.items():
+            self.histograms[phase].record(seconds)
+        self.pending.clear()
+
+    def record(self, phase, seconds):
+        """Records a duration measured outside a tick, e.g. the geometry build in simulation_ready."""
+        self.histograms[phase].record(seconds)
+
+    def summary(self):
+        """{phase: {n, mean, p50, p95, p99, max}} in seconds, for the phases that recorded anything."""
+        return {name: histogram.summary() for name, histogram in self.histograms.items() if histogram.count}
+
+    def report_lines(self):
+        lines = [f"Decision latency for junction {self.junction_id} (microseconds)",
+                 f"{'phase':<10} {'n':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for name, values in self.summary().items():
+            lines.append(f"{name:<10} {values['n']:>8} " + " ".join(f"{values[key] * 1e6:>9.1f}" for key in ("mean", "p50", "p95", "p99", "max")))
+        return lines
+
+    def report(self):
+        """Prints the table through AKIPrintString, e.g. from AAPIFinish."""
+        for line in self.report_lines():
+            AAPI.AKIPrintString(line)
@@ -0,0 +1,89 @@
+"""
+One controller instance for several junctions.
+
+Running one script per junction repeats the callback dispatch and the section
+reads for every junction, although neighbouring junctions share sections (the
+downstream section of one is the upstream section of the next). A
+MultiJunctionController services every junction of its list in one
+AAPIPostManage call and hands all of them the same SectionSnapshot, so each
+section is read at most once per simulation step. Every junction keeps its own
+state in its own controller object.
+
+Junctions that sleep until their state ends (see pascal.scheduling) are
+skipped, and while all of them sleep a step costs one comparison with the
+earliest wake-up.
+"""
+from pascal import profiling
+from pascal.controllers import build_controller
+from pascal.scheduling import AWAKE
+from pascal.sensing import SectionSnapshot
+
+
+def build_controllers(algorithm, j_ids, sensor=None, history=None, trace=None, background=None):
+    """
+    One controller per junction id, all running the same algorithm (a key of
+    pascal.controllers.ALGORITHMS) with the settings of their junction in the
+    network config, as the per-junction scripts do. They read through sensor
+    (see pascal.sensing), keep their measurements in history (see
+    pascal.history) and their decisions in trace (see pascal.trace) when these
+    are given, and write output through background (see pascal.background).
+    """
+    return [build_controller(algorithm, junction_id, sensor=sensor, history=history, trace=trace, background=background)
+            for junction_id in j_ids]
+
+
+class MultiJunctionController:
+    """Drives a list of junction controllers from one set of Aimsun callbacks."""
+
+    def __init__(self, controllers):
+        self.controllers = list(controllers)
+        # Sensors fed by vehicle events, each once however many junctions share it
+        self.event_sensors = list({id(c.sensor): c.sensor for c in self.controllers if hasattr(c.sensor, "enter")}.values())
+        self.wakeup = AWAKE  # earliest wake-up of the junctions
+        self.lane_sections = {}  # id of a sensor -> sections its junctions read lane by lane
+
+    @classmethod
+    def for_algorithm(cls, algorithm, j_ids, sensor=None, history=None, trace=None, background=None):
+        return cls(build_controllers(algorithm, j_ids, sensor, history, trace, background))
+
+    def simulation_ready(self, model):
+        for controller in self.controllers:
+            controller.simulation_ready(model)
+            self.lane_sections.setdefault(id(controller.sensor), set()).update(controller.origin_sections)
+
+    def enter_vehicle_section(self, idveh, idsection, atime):
+        for sensor in self.event_sensors:
+            sensor.enter(idveh, idsection, atime)
+        return 0
+
+    def exit_vehicle_section(self, idveh, idsection, atime):
+        for sensor in self.event_sensors:
+            sensor.exit(idveh, idsection, atime)
+        return 0
+
+    def post_manage(self, time1, timeSta, timeTrans, acycle):
+        if time1 < self.wakeup:
+            return 0
+        # One snapshot per step and sensor: sections shared between junctions are read once
+        snapshots = {}
+        for controller in self.controllers:
+            if time1 < controller.wakeup:
+                continue
+            snapshot = snapshots.get(id(controller.sensor))
+            if snapshot is None:
+                snapshot = snapshots[id(controller.sensor)] = SectionSnapshot(controller.sensor, self.lane_sections[id(controller.sensor)])
+            controller.post_manage(time1, timeSta, timeTrans, acycle, snapshot)
+        self.wakeup = min(controller.wakeup for controller in self.controllers)
+        return 0
+
+    def finish(self):
+        # The AAPI call table and a shared sensor check cover several junctions, so they are printed once
+        sensors = {}
+        for controller in self.controllers:
+            controller.finish(report_profile=False, report_sensor=False)
+            if hasattr(controller.sensor, "report"):
+                sensors[id(controller.sensor)] = controller.sensor
+        for sensor in sensors.values():
+            sensor.report()
+        if profiling.profiler is not None:
+            profiling.profiler.report()
@@ -0,0 +1,31 @@
+"""
+Network data shared by every controller, read from the network config file
+(see pascal.config) when the package is first imported.
+
+The split-section dicts cover the whole network, so the same two dicts serve
+all five junctions. CONFLICT_MATRICES lists, for every movement of a junction,
+the movements that may run green together with it.
+"""
+from pascal.config import load_network_config
+
+NETWORK = load_network_config()
+
+SPACE_HEADWAY_JAM = NETWORK.space_headway_jam  # in meters to find out how many vehicles can be accommodated in one lane
+
+# Signal section -> split sections upstream of it
+SECTION_UPSTREAM = NETWORK.section_upstream
+
+# Destination section -> split sections downstream of it
+SECTION_DOWNSTREAM = NETWORK.section_downstream
+
+CONFLICT_MATRICES = {junction_id: junction.conflict_matrix for junction_id, junction in NETWORK.junctions.items()}
+
+
+def junction_timing(junction_id):
+    """{amber_time, all_red_time, min_green, max_green, sat_flow} of a junction."""
+    return NETWORK.junction_timing(junction_id)
+
+
+def controller_settings(algorithm, junction_id):
+    """Settings of an algorithm's controller at a junction, e.g. {"time_step": 5, "eta": 2.5, "cycle_time": 80}."""
+    return NETWORK.controller_settings(algorithm, junction_id)
@@ -0,0 +1,6 @@
+"""
+Offline stand-in for Aimsun: a synthetic network with the junctions and
+sections of the study network, a point-queue traffic model and fake AAPI and
+PyANGKernel modules, so that controllers run without an Aimsun licence.
+See pascal.offline.run for the command line.
+"""
@@ -0,0 +1,211 @@
+"""
+Pure-Python stand-in for the AAPI/ECI/AKI functions the controllers use.
+
+install() registers this module as AAPI and angkernel as PyANGKernel in
+sys.modules and binds both to a Simulator, so that the entry scripts and the
+pascal package run unchanged. Only the functions used in this repository are
+provided.
+"""
+import sys
+
+simulator = None
+section_successors = {}
+section_order = []
+printed = []
+print_strings = False
+
+
+def install(sim, echo=False):
+    """Binds the fake AAPI and PyANGKernel to sim and registers them as the real module names."""
+    global simulator, print_strings, section_successors, section_order
+    from pascal.offline import angkernel
+    simulator = sim
+    section_successors = sim.network.successors()
+    section_order = sorted(section_successors)
+    print_strings = echo
+    del printed[:]
+    sys.modules["AAPI"] = sys.modules[__name__]
+    sys.modules["PyANGKernel"] = angkernel
+
+
+class intp:
+    def __init__(self):
+        self._value = 0
+
+    def value(self):
+        return self._value
+
+    def assign(self, value):
+        self._value = value
+
+
+class boolp(intp):
+    pass
+
+
+class InfVeh:
+    def __init__(self, vehicle_id, section_id, lane):
+        self.report = 0
+        self.idVeh = vehicle_id
+        self.idSection = section_id
+        self.numberLane = lane
+
+
+class InfSection:
+    def __init__(self, section_id, num_lanes, length, num_turnings=0):
+        self.report = 0
+        self.id = section_id
+        self.nbCentralLanes = num_lanes
+        self.nbSideLanes = 0
+        self.length = length
+        self.nbTurnings = num_turnings
+
+
+class StructAkiEstadSectionLane:
+    def __init__(self, section_id, density):
+        self.report = 0
+        self.Id = section_id
+        self.Density = density
+
+
+def AKIPrintString(string):
+    printed.append(string)
+    if print_strings:
+        print(string)
+    return 0
+
+
+def AKIConvertToAsciiString(string, deleteString, anyNonAsciiChar):
+    return string
+
+
+def AKIGetSectionCapacity(section_id):
+    num_lanes, length = simulator.sections[section_id]
+    return num_lanes * simulator.sat_flow
+
+
+def AKIInfNetGetSectionANGInf(section_id):
+    num_lanes, length = simulator.sections[section_id]
+    return InfSection(section_id, num_lanes, length, len(section_successors.get(section_id, [])))
+
+
+def AKIInfNetNbSectionsANG():
+    return len(section_order)
+
+
+def AKIInfNetGetSectionANGId(index):
+    return section_order[index]
+
+
+def AKIInfNetGetIdSectionANGDestinationofTurning(section_id, index):
+    return section_successors[section_id][index]
+
+
+def AKIVehStateGetNbVehiclesSection(section_id, considerAllSegments):
+    return len(simulator.section_vehicles(section_id))
+
+
+def AKIVehGetInf(vehicle_id):
+    section_id, lane = simulator.vehicle_location(vehicle_id)
+    return InfVeh(vehicle_id, section_id, lane)
+
+
+def AKIVehStateGetVehicleInfSection(section_id, index):
+    vehicle_id, lane = simulator.section_vehicles(section_id)[index]
+    return InfVeh(vehicle_id, section_id, lane)
+
+
+# The stand-in has no statistics interval: lane densities are those of the current step
+def AKIEstGetCurrentStatisticsSectionLane(section_id, lane_index, vehicle_type):
+    num_lanes, length = simulator.sections[section_id]
+    vehicles = sum(1 for vehicle_id, lane in simulator.section_vehicles(section_id) if lane == lane_index + 1)
+    return StructAkiEstadSectionLane(section_id, vehicles / (length / 1000.0))
+
+
+def _junction(junction_id):
+    return simulator.network.junctions[junction_id]
+
+
+def _movement_by_sections(from_section, to_section):
+    for junction in simulator.network.junctions.values():
+        for movement in junction.movements.values():
+            if movement.from_section == from_section and movement.to_section == to_section:
+                return movement
+    raise KeyError((from_section, to_section))
+
+
+def ECIGetNumberSignalGroups(junction_id):
+    return len(_junction(junction_id).signal_groups)
+
+
+def ECIGetLogicalNameofSignalGroup(junction_id, signal_group):
+    return _junction(junction_id).signal_groups[signal_group]
+
+
+def ECIGetNumberTurningsofSignalGroup(junction_id, signal_group):
+    return 1
+
+
+def ECIGetFromToofTurningofSignalGroup(junction_id, signal_group, index, fromSection, toSection):
+    movement = _junction(junction_id).movements[signal_group]
+    fromSection.assign(movement.from_section)
+    toSection.assign(movement.to_section)
+    return 0
+
+
+def AKIInfNetGetTurningOriginFromLane(from_section, to_section):
+    return _movement_by_sections(from_section, to_section).origin_lanes[0]
+
+
+def AKIInfNetGetTurningOriginToLane(from_section, to_section):
+    return _movement_by_sections(from_section, to_section).origin_lanes[-1]
+
+
+def AKIInfNetGetTurningDestinationFromLane(from_section, to_section):
+    return _movement_by_sections(from_section, to_section).dest_lanes[0]
+
+
+def AKIInfNetGetTurningDestinationToLane(from_section, to_section):
+    return _movement_by_sections(from_section, to_section).dest_lanes[-1]
+
+
+# Phases alternate with interphases as in a usual Aimsun control plan: 1 phase, 2 interphase, 3 phase, ...
+def ECIGetNumberPhases(junction_id):
+    return 2 * len(_junction(junction_id).phases)
+
+
+def ECIIsAnInterPhase(junction_id, phase, time):
+    return 1 if phase % 2 == 0 else 0
+
+
+def ECIGetNbSignalGroupsPhaseofJunction(junction_id, phase, time):
+    if phase % 2 == 0:
+        return 0
+    return len(_junction(junction_id).phases[phase // 2])
+
+
+def ECIGetSignalGroupPhaseofJunction(junction_id, phase, index, time):
+    return _junction(junction_id).phases[phase // 2][index]
+
+
+def ECIGetCurrentStateofSignalGroup(junction_id, signal_group):
+    return simulator.get_signal_state(junction_id, signal_group)
+
+
+def ECIChangeSignalGroupState(junction_id, signal_group, state, timeSta, time, acycle):
+    simulator.set_signal_state(junction_id, signal_group, state)
+    return 0
+
+
+def ECIDisableEvents(junction_id):
+    simulator.disable_events(junction_id)
+    return 0
+
+
+def ECIEnableEvents(junction_id):
+    simulator.enable_events(junction_id)
+    return 0
+
+
+def ECIIsEventsEnabled(junction_id):
+    return 1 if simulator.events_enabled[junction_id] else 0
@@ -0,0 +1,47 @@
+"""
+Stand-in for the part of PyANGKernel the controllers use: the active model's
+catalog, its sections and their lanes. Side-lane lengths are reported as 0 so
+that every lane takes the section length, as central lanes do in Aimsun.
+"""
+
+
+class GKSectionLane:
+    def getSideLaneLength2D(self):
+        return 0.0
+
+
+class GKSection:
+    def __init__(self, section_id, num_lanes):
+        self.section_id = section_id
+        self.num_lanes = num_lanes
+
+    def getId(self):
+        return self.section_id
+
+    def getLanes(self):
+        return [GKSectionLane() for _ in range(self.num_lanes)]
+
+
+class GKCatalog:
+    def find(self, section_id):
+        from pascal.offline import aapi
+        num_lanes, length = aapi.simulator.sections[section_id]
+        return GKSection(section_id, num_lanes)
+
+
+class GKModel:
+    def getCatalog(self):
+        return GKCatalog()
+
+
+class GKSystem:
+    _system = None
+
+    @classmethod
+    def getSystem(cls):
+        if cls._system is None:
+            cls._system = cls()
+        return cls._system
+
+    def getActiveModel(self):
+        return GKModel()
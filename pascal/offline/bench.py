@@ -0,0 +1,185 @@
+"""
+Controller overhead benchmark.
+
+Drives one entry script of every algorithm family through the same demand
+profiles on the offline stand-in and writes the results as JSON, so that the
+cost of the controllers can be compared across versions:
+
+    python -m pascal.offline.bench --output benchmark.json
+    python -m pascal.offline.bench --families pascal levin --profiles dense_1000
+
+Profiles light to gridlock scale the demand of the point-queue model. The
+dense_* profiles replace it with an OccupancySimulator that reports that many
+vehicles per section (give or take half), far beyond what a real section
+holds, to show how sensing cost grows with congestion.
+
+For every run:
+
+decisions                 - ticks that made at least one AAPI call
+decisions_per_second      - decisions per second of controller time, i.e. time
+                            inside AAPIPostManage, including the stand-in AAPI
+aapi_calls_per_decision   - AAPI calls made inside ticks per decision
+latency                   - tick and phase percentiles, see pascal.instrumentation
+peak_memory_bytes         - tracemalloc peak over a second, identical run (the
+                            timing run is not traced); includes the stand-in
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from pascal.offline.run import ALL_JUNCTIONS, load_script, prepare, simulate
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Entry script prefix of every family
+FAMILIES = {
+    "varaiya": "Varaiya_MP_",
+    "capacity_aware": "Capacity_Aware_MP_",
+    "le": "Le_MP_",
+    "levin": "Levin_",
+    "pascal": "Modified_PASCAL_",
+}
+
+# Junction as it appears in the script names
+JUNCTION_TAGS = {505: "505", 985: "985", 1134: "1134", 1427: "1427", 1978: "Central"}
+
+PROFILES = {
+    "light": {"demand_scale": 0.5},
+    "moderate": {"demand_scale": 1.0},
+    "heavy": {"demand_scale": 2.0},
+    "gridlock": {"demand_scale": 4.0},
+    "dense_100": {"vehicles_per_section": 100},
+    "dense_1000": {"vehicles_per_section": 1000},
+    "dense_3000": {"vehicles_per_section": 3000},
+}
+
+
+def family_script(family, junction_id, repo_dir=REPO_DIR):
+    """Path of the entry script of family for junction_id."""
+    pattern = os.path.join(repo_dir, FAMILIES[family] + JUNCTION_TAGS[junction_id] + "*.py")
+    matches = sorted(glob.glob(pattern))
+    if not matches:
+        raise ValueError(f"No {family} script for junction {junction_id} ({pattern})")
+    return matches[0]
+
+
+def script_controllers(module):
+    """Junction controllers of a loaded entry script, single or multi-junction."""
+    controller = module.controller
+    return list(getattr(controller, "controllers", [controller]))
+
+
+def run_once(path, profile, hours, acycle, seed, trace_memory=False):
+    """One simulation of path under profile; returns the loaded module, the profiler and the peak traced memory."""
+    simulator = prepare(ALL_JUNCTIONS, seed, profile.get("demand_scale", 1.0), vehicles_per_section=profile.get("vehicles_per_section"))
+    # pascal.profiling imports AAPI, so it is only imported once the stand-in is installed
+    from pascal import profiling
+    profiler = profiling.enable()
+    if trace_memory:
+        tracemalloc.start()
+    peak_memory = None
+    try:
+        module = load_script(path)
+        simulate(module, simulator, hours, acycle)
+        if trace_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        module.AAPIFinish()
+        module.AAPIUnLoad()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        profiling.disable()
+    return module, profiler, peak_memory
+
+
+def benchmark(family, profile_name, junction_id=1978, hours=1.0, acycle=0.5, seed=1, measure_memory=True):
+    """Result dict of one family under one profile."""
+    path = family_script(family, junction_id)
+    profile = PROFILES[profile_name]
+    wall_start = time.perf_counter()
+    module, profiler, _ = run_once(path, profile, hours, acycle, seed)
+    wall_seconds = time.perf_counter() - wall_start
+
+    controllers = script_controllers(module)
+    controller_seconds = sum(controller.timings.histograms["tick"].total for controller in controllers)
+    decisions = profiler.decisions
+    calls = profiler.calls_in_decisions()
+    latency = {}
+    for controller in controllers:
+        latency[str(controller.junction_id)] = controller.timings.summary()
+
+    result = {
+        "family": family,
+        "script": os.path.basename(path),
+        "profile": profile_name,
+        "profile_settings": profile,
+        "simulated_seconds": hours * 3600,
+        "ticks": profiler.ticks,
+        "decisions": decisions,
+        "controller_seconds": controller_seconds,
+        "decisions_per_second": decisions / controller_seconds if controller_seconds else 0.0,
+        "aapi_calls_per_decision": calls / decisions if decisions else 0.0,
+        "aapi_seconds": sum(values["seconds"] for values in profiler.summary().values()),
+        "aapi_calls": profiler.summary(),
+        "latency": latency,
+        "wall_seconds": wall_seconds,
+        "peak_memory_bytes": None,
+    }
+    if measure_memory:
+        _, _, result["peak_memory_bytes"] = run_once(path, profile, hours, acycle, seed, trace_memory=True)
+    return result
+
+
+def git_revision(repo_dir=REPO_DIR):
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark controller overhead on the offline stand-in.")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=list(FAMILIES))
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--junction", type=int, choices=sorted(JUNCTION_TAGS), default=1978)
+    parser.add_argument("--hours", type=float, default=0.5, help="simulated hours per run (default 0.5)")
+    parser.add_argument("--acycle", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-memory", action="store_true", help="do not repeat each run under tracemalloc")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file to write (default benchmark.json)")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'family':<15} {'profile':<11} {'decisions':>9} {'dec/s':>9} {'calls/dec':>10} {'p99 us':>9} {'peak MB':>8}")
+    for family in args.families:
+        for profile_name in args.profiles:
+            result = benchmark(family, profile_name, args.junction, args.hours, args.acycle, args.seed, not args.skip_memory)
+            results.append(result)
+            p99 = max(latency["tick"]["p99"] for latency in result["latency"].values())
+            peak = f"{result['peak_memory_bytes'] / 2 ** 20:.1f}" if result["peak_memory_bytes"] is not None else "-"
+            print(f"{family:<15} {profile_name:<11} {result['decisions']:>9} {result['decisions_per_second']:>9.0f} "
+                  f"{result['aapi_calls_per_decision']:>10.1f} {p99 * 1e6:>9.1f} {peak:>8}")
+
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "junction": args.junction,
+        "hours": args.hours,
+        "acycle": args.acycle,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
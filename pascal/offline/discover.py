@@ -0,0 +1,46 @@
+"""
+Split-section discovery on the offline stand-in.
+
+    python -m pascal.offline.discover --max-distance 300
+
+Walks the synthetic network with pascal.discovery.SplitSectionDiscovery and
+prints the chains as the "section_upstream" / "section_downstream" entries of
+pascal/network.json, followed by every section where they differ from the
+dicts in the config. The synthetic network is laid out from those dicts, so
+the differences show what the walk rules leave out; on an Aimsun network the
+same discovery runs through the real AKIInfNet functions.
+"""
+import argparse
+import json
+
+from pascal.offline.run import ALL_JUNCTIONS, prepare
+
+
+def differences(discovered, configured):
+    """[(section id, configured chain, discovered chain)] for every section where the two differ."""
+    rows = []
+    for section_id in sorted(set(discovered) | set(configured)):
+        if discovered.get(section_id) != configured.get(section_id):
+            rows.append((section_id, configured.get(section_id), discovered.get(section_id)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive split sections from the synthetic network.")
+    parser.add_argument("--max-distance", type=float, default=None, help="storage distance in metres per chain (default: no limit)")
+    args = parser.parse_args(argv)
+
+    prepare(ALL_JUNCTIONS)
+    # pascal.discovery imports AAPI, so it is only imported once the stand-in is installed
+    from pascal.discovery import SplitSectionDiscovery
+    from pascal.network import SECTION_UPSTREAM, SECTION_DOWNSTREAM
+    discovery = SplitSectionDiscovery(ALL_JUNCTIONS, args.max_distance)
+    upstream, downstream = discovery.discover()
+    print(json.dumps(discovery.as_config(), indent=2))
+    for label, discovered, configured in (("upstream", upstream, SECTION_UPSTREAM), ("downstream", downstream, SECTION_DOWNSTREAM)):
+        for section_id, old, new in differences(discovered, configured):
+            print(f"{label} of {section_id}: configured {old}, discovered {new}")
+
+
+if __name__ == "__main__":
+    main()
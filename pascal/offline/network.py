@@ -0,0 +1,199 @@
+"""
+Synthetic version of the study network for offline runs.
+
+Only the data the controllers actually use is real: junction ids, movement
+names and conflict matrices (pascal.network.CONFLICT_MATRICES) and the ids of
+the signal sections with their split sections (SECTION_UPSTREAM and
+SECTION_DOWNSTREAM). Every junction gets one inbound approach per direction
+that has movements and one outbound link per direction that movements lead to,
+taking the signal and destination section ids from the split dicts in order,
+so that the unchanged entry scripts find their sections. Lane layouts, lengths
+and demands are made up.
+"""
+from pascal.compatibility import CompatibilityLattice
+from pascal.network import CONFLICT_MATRICES, SECTION_UPSTREAM, SECTION_DOWNSTREAM
+
+DIRECTIONS = ("NB", "SB", "EB", "WB")
+
+# Heading after the turn, for a movement of an approach heading in the first direction
+TURN_HEADING = {
+    ("NB", "Th"): "NB", ("NB", "LT"): "WB", ("NB", "RT"): "EB",
+    ("SB", "Th"): "SB", ("SB", "LT"): "EB", ("SB", "RT"): "WB",
+    ("EB", "Th"): "EB", ("EB", "LT"): "NB", ("EB", "RT"): "SB",
+    ("WB", "Th"): "WB", ("WB", "LT"): "SB", ("WB", "RT"): "NB",
+}
+
+# Approach lanes of each movement, lane 1 is the rightmost
+MOVEMENT_LANES = {"RT": 1, "Th": 2, "LT": 1}
+OUTBOUND_LANES = 2
+
+# Default demand in vehicles per hour per movement
+DEFAULT_DEMAND = {"Th": 300, "LT": 90, "RT": 90}
+
+
+class MovementSpec:
+    """One signal group of a synthetic junction."""
+
+    def __init__(self, junction_id, signal_group, name, from_section, to_section, origin_lanes, dest_lanes, demand):
+        self.junction_id = junction_id
+        self.signal_group = signal_group
+        self.name = name
+        self.from_section = from_section
+        self.to_section = to_section
+        self.origin_lanes = origin_lanes
+        self.dest_lanes = dest_lanes
+        self.demand = demand
+
+
+class JunctionSpec:
+    """
+    signal_groups - {signal group: logical name}
+    movements     - {signal group: MovementSpec}
+    phases        - [[signal group, ...], ...] in phase order, interphases not included
+    """
+
+    def __init__(self, junction_id, signal_groups, movements, phases):
+        self.junction_id = junction_id
+        self.signal_groups = signal_groups
+        self.movements = movements
+        self.phases = phases
+
+
+class LinkSpec:
+    """
+    A signal section (inbound) or destination section (outbound) with its split
+    sections, in driving order. An outbound link that runs into the approach of
+    another junction stops before the first shared section and feeds names the
+    signal section of that approach; feeds is None for links leaving the network.
+    """
+
+    def __init__(self, section_ids, lengths, num_lanes, feeds=None):
+        self.section_ids = section_ids
+        self.lengths = lengths
+        self.num_lanes = num_lanes
+        self.feeds = feeds
+
+
+class NetworkSpec:
+    def __init__(self, junctions, inbound, outbound):
+        self.junctions = junctions   # {junction id: JunctionSpec}
+        self.inbound = inbound       # {signal section: LinkSpec}
+        self.outbound = outbound     # {destination section: LinkSpec}
+
+    def sections(self):
+        """{section id: (number of lanes, length)} for every section of the network."""
+        sections = {}
+        for link in list(self.inbound.values()) + list(self.outbound.values()):
+            for section_id, length in zip(link.section_ids, link.lengths):
+                sections[section_id] = (link.num_lanes, length)
+        return sections
+
+    def successors(self):
+        """
+        {section id: [section id, ...]} of every section: the next section of
+        its link, the destinations of the movements leaving it and, at the end
+        of an outbound link, the first section of the approach it feeds.
+        """
+        successors = {section_id: [] for section_id in self.sections()}
+
+        def connect(section_id, next_section_id):
+            if next_section_id not in successors[section_id]:
+                successors[section_id].append(next_section_id)
+
+        for link in list(self.inbound.values()) + list(self.outbound.values()):
+            for section_id, next_section_id in zip(link.section_ids, link.section_ids[1:]):
+                connect(section_id, next_section_id)
+            if link.feeds is not None and link.section_ids:
+                connect(link.section_ids[-1], self.inbound[link.feeds].section_ids[0])
+        for junction in self.junctions.values():
+            for movement in junction.movements.values():
+                connect(movement.from_section, movement.to_section)
+        return successors
+
+
+def phases_from_conflict_matrix(conflict_matrix, signal_group_by_name):
+    """
+    Covers every movement with a phase: the first movement not served yet plus
+    the compatible group of it that serves the most movements not served yet.
+    """
+    compatible_combinations_dict = CompatibilityLattice(conflict_matrix).combinations
+    phases = []
+    served = set()
+    for name in conflict_matrix:
+        if name in served:
+            continue
+        group = max(compatible_combinations_dict[name], key=lambda combo: len(set(combo) - served), default=[])
+        phase_names = [name] + [other for other in group if other != name]
+        served.update(phase_names)
+        phases.append([signal_group_by_name[other] for other in phase_names])
+    return phases
+
+
+def build_network(j_ids=(505, 985, 1134, 1427, 1978), demand_scale=1.0, signal_length=100.0, split_length=150.0):
+    """
+    Synthetic NetworkSpec for the junctions in j_ids. Approaches are laid out
+    for all junctions first so that outbound links can be cut where they reach
+    a section that already belongs to an approach.
+    """
+    inbound_ids = iter(SECTION_UPSTREAM)
+    outbound_ids = iter(SECTION_DOWNSTREAM)
+    inbound = {}
+    outbound = {}
+    layouts = []
+    for junction_id in j_ids:
+        names = list(CONFLICT_MATRICES[junction_id])
+        approaches = [d for d in DIRECTIONS if any(name.startswith(d) for name in names)]
+        approach_section = {}
+        for direction in approaches:
+            section_id = next(inbound_ids)
+            splits = list(reversed(SECTION_UPSTREAM[section_id]))
+            approach_names = [name for name in names if name.startswith(direction)]
+            num_lanes = sum(MOVEMENT_LANES[name.split()[1]] for name in approach_names)
+            inbound[section_id] = LinkSpec(splits + [section_id], [split_length] * len(splits) + [signal_length], num_lanes)
+            approach_section[direction] = section_id
+        layouts.append((junction_id, names, approaches, approach_section))
+
+    owner = {}
+    for signal_section, link in inbound.items():
+        for section_id in link.section_ids:
+            owner[section_id] = signal_section
+
+    junctions = {}
+    for junction_id, names, approaches, approach_section in layouts:
+        headings = [d for d in DIRECTIONS if any(TURN_HEADING[tuple(name.split())] == d for name in names)]
+        heading_section = {}
+        for direction in headings:
+            section_id = next(outbound_ids)
+            chain = [section_id] + list(SECTION_DOWNSTREAM[section_id])
+            feeds = None
+            for i, chain_section in enumerate(chain):
+                if chain_section in owner:
+                    feeds = owner[chain_section]
+                    chain = chain[:i]
+                    break
+            lengths = [signal_length] + [split_length] * (len(chain) - 1) if chain else []
+            outbound[section_id] = LinkSpec(chain, lengths, OUTBOUND_LANES, feeds)
+            heading_section[direction] = section_id
+
+        signal_groups = {}
+        movements = {}
+        next_lane = {direction: 1 for direction in approaches}
+        # Lanes are handed out right turn first, then through, then left turn
+        order = {"RT": 0, "Th": 1, "LT": 2}
+        for signal_group, name in enumerate(names, start=1):
+            signal_groups[signal_group] = name
+        for signal_group, name in sorted(signal_groups.items(), key=lambda item: (item[1].split()[0], order[item[1].split()[1]])):
+            direction, turn = name.split()
+            first_lane = next_lane[direction]
+            next_lane[direction] += MOVEMENT_LANES[turn]
+            movements[signal_group] = MovementSpec(
+                junction_id, signal_group, name,
+                approach_section[direction], heading_section[TURN_HEADING[(direction, turn)]],
+                list(range(first_lane, first_lane + MOVEMENT_LANES[turn])),
+                list(range(1, OUTBOUND_LANES + 1)),
+                DEFAULT_DEMAND[turn] * demand_scale,
+            )
+        signal_group_by_name = {name: sg for sg, name in signal_groups.items()}
+        phases = phases_from_conflict_matrix(CONFLICT_MATRICES[junction_id], signal_group_by_name)
+        junctions[junction_id] = JunctionSpec(junction_id, signal_groups, movements, phases)
+    return NetworkSpec(junctions, inbound, outbound)
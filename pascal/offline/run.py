@@ -0,0 +1,125 @@
+"""
+Runs an Aimsun controller script headless on the synthetic network.
+
+    python -m pascal.offline.run Varaiya_MP_505_P1.py --hours 2
+    python -m pascal.offline.run Multi_Junction_Control.py --hours 24 --demand-scale 1.3
+
+The script is loaded as Aimsun would load it, with the fake AAPI and
+PyANGKernel in place of the real ones, and its callbacks are called once per
+simulation step of acycle seconds. Geometry is never cached to disk in offline
+runs, so the cache of the real network is left alone.
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+from pascal.offline import aapi
+from pascal.offline.network import build_network
+from pascal.offline.simulator import Simulator, OccupancySimulator
+
+ALL_JUNCTIONS = (505, 985, 1134, 1427, 1978)
+
+
+def load_script(path):
+    """Imports an entry script under a fresh module name so that every run starts from its initial globals."""
+    name = "offline_" + os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare(j_ids=ALL_JUNCTIONS, seed=1, demand_scale=1.0, echo=False, vehicles_per_section=None):
+    """
+    Builds the simulator and installs the fake Aimsun modules bound to it.
+    With vehicles_per_section an OccupancySimulator replaces the traffic model.
+    """
+    network = build_network(j_ids, demand_scale)
+    if vehicles_per_section is None:
+        simulator = Simulator(network, seed=seed)
+    else:
+        simulator = OccupancySimulator(network, vehicles_per_section, seed=seed)
+    aapi.install(simulator, echo)
+    import pascal.compatibility
+    import pascal.geometry
+    pascal.compatibility.CACHE_DIR = None
+    pascal.geometry.CACHE_DIR = None
+    return simulator
+
+
+def simulate(module, simulator, hours=1.0, acycle=0.5, start_time=0.0):
+    """
+    Calls the Aimsun callbacks of a loaded script from AAPILoad up to the last
+    AAPIPostManage and returns the wall time of the simulation loop; AAPIFinish
+    and AAPIUnLoad are left to the caller. Scripts that define
+    AAPIEnterVehicleSection / AAPIExitVehicleSection get them after every step.
+    """
+    module.AAPILoad()
+    module.AAPIInit()
+    module.AAPISimulationReady()
+    enter = getattr(module, "AAPIEnterVehicleSection", None)
+    exit_ = getattr(module, "AAPIExitVehicleSection", None)
+
+    steps = int(round(hours * 3600 / acycle))
+    wall_start = time.perf_counter()
+    for step in range(steps):
+        time1 = step * acycle
+        timeSta = start_time + time1
+        module.AAPIManage(time1, timeSta, 0, acycle)
+        simulator.step(acycle)
+        if enter is not None or exit_ is not None:
+            for entered, vehicle_id, section_id in simulator.section_events():
+                callback = enter if entered else exit_
+                if callback is not None:
+                    callback(vehicle_id, section_id, timeSta)
+        module.AAPIPostManage(time1, timeSta, 0, acycle)
+    return time.perf_counter() - wall_start
+
+
+def run_script(path, hours=1.0, acycle=0.5, seed=1, demand_scale=1.0, start_time=0.0, j_ids=ALL_JUNCTIONS, echo=False,
+               profile_aapi=False):
+    """
+    Simulates hours of traffic under the controller script at path and returns
+    the simulator summary. profile_aapi counts the AAPI calls of the run, see
+    pascal.profiling; the table is printed at AAPIFinish.
+    """
+    simulator = prepare(j_ids, seed, demand_scale, echo)
+    from pascal import profiling
+    if profile_aapi:
+        profiling.enable()
+    module = load_script(path)
+    wall_seconds = simulate(module, simulator, hours, acycle, start_time)
+    module.AAPIFinish()
+    module.AAPIUnLoad()
+    profiling.disable()
+
+    summary = simulator.summary()
+    summary["script"] = os.path.basename(path)
+    summary["wall_seconds"] = wall_seconds
+    summary["simulated_hours_per_minute"] = (simulator.time / 3600) / (wall_seconds / 60) if wall_seconds else 0.0
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run controller scripts on the synthetic network without Aimsun.")
+    parser.add_argument("scripts", nargs="+", help="entry scripts, e.g. Varaiya_MP_505_P1.py")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours (default 1)")
+    parser.add_argument("--acycle", type=float, default=0.5, help="simulation step in seconds (default 0.5)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--demand-scale", type=float, default=1.0, help="multiplies every movement demand")
+    parser.add_argument("--start-time", type=float, default=0.0, help="timeSta of the first step in seconds of the day")
+    parser.add_argument("--echo", action="store_true", help="print AKIPrintString output")
+    parser.add_argument("--profile-aapi", action="store_true", help="count AAPI calls and print the table at AAPIFinish (shown with --echo)")
+    args = parser.parse_args(argv)
+
+    for path in args.scripts:
+        summary = run_script(path, args.hours, args.acycle, args.seed, args.demand_scale, args.start_time, echo=args.echo,
+                             profile_aapi=args.profile_aapi)
+        print(summary.pop("script"))
+        for key, value in summary.items():
+            print(f"    {key}: {value:.2f}" if isinstance(value, float) else f"    {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Spatial point-queue traffic model for offline runs.
+
+Every inbound approach and outbound link is a chain of sections with the same
+lanes. Vehicles drive at free speed until they close up to the vehicle ahead
+(one jam headway behind it) or reach the stop line. A vehicle at the stop line
+of a lane whose signal group shows green or amber leaves at the saturation
+flow of the lane, if its destination lane has room at the entry, and drives
+along the outbound link until it leaves the network at its end, or, where the
+link runs into the approach of a neighbouring junction, joins that approach
+for one of its movements.
+
+Demand arrives at random at the entry of each approach; vehicles that do not
+find room wait outside the network and their waiting counts as delay.
+"""
+import random
+
+from pascal.network import SPACE_HEADWAY_JAM
+
+GREEN = 1
+AMBER = 2
+
+
+class Vehicle:
+    __slots__ = ("id", "movement", "position", "arrived")
+
+    def __init__(self, vehicle_id, movement, arrived):
+        self.id = vehicle_id
+        self.movement = movement
+        self.position = 0.0
+        self.arrived = arrived
+
+
+class Link:
+    """A chain of sections driven through in order; lanes[lane] holds its vehicles front first."""
+
+    def __init__(self, spec):
+        self.section_ids = spec.section_ids
+        self.bounds = []
+        end = 0.0
+        for length in spec.lengths:
+            end += length
+            self.bounds.append(end)
+        self.length = end
+        self.feeds = spec.feeds
+        self.lanes = {lane: [] for lane in range(1, spec.num_lanes + 1)}
+
+    def section_at(self, position):
+        for section_id, end in zip(self.section_ids, self.bounds):
+            if position < end:
+                return section_id
+        return self.section_ids[-1]
+
+    def has_room(self, lane, jam):
+        vehicles = self.lanes[lane]
+        return not vehicles or vehicles[-1].position >= jam
+
+    def advance(self, distance, jam):
+        """Moves every vehicle up to distance metres without passing the link end or the vehicle ahead."""
+        for vehicles in self.lanes.values():
+            limit = self.length
+            for vehicle in vehicles:
+                vehicle.position = max(vehicle.position, min(vehicle.position + distance, limit))
+                limit = vehicle.position - jam
+
+
+class Movement:
+    def __init__(self, spec, inbound, outbound):
+        self.spec = spec
+        self.key = (spec.junction_id, spec.signal_group)
+        self.inbound = inbound
+        self.outbound = outbound
+        self.waiting = []  # arrival times of vehicles not yet on the network
+
+
+class Simulator:
+    """
+    Point-queue simulation of a NetworkSpec. As in Aimsun, every junction runs
+    its control plan (plan_green seconds per phase, in phase order) until
+    events are disabled for it; from then on its signal groups keep the state
+    last set through set_signal_state, e.g. by the fake ECIChangeSignalGroupState.
+    """
+
+    def __init__(self, network, seed=1, free_speed=13.9, sat_flow=1800.0, jam=SPACE_HEADWAY_JAM, plan_green=30.0):
+        self.network = network
+        self.rng = random.Random(seed)
+        self.free_speed = free_speed
+        self.sat_flow = sat_flow
+        self.jam = jam
+        self.plan_green = plan_green
+        self.time = 0.0
+        self.inbound = {section_id: Link(spec) for section_id, spec in network.inbound.items()}
+        self.outbound = {section_id: Link(spec) for section_id, spec in network.outbound.items()}
+        self.signal_state = {}
+        self.events_enabled = {junction_id: True for junction_id in network.junctions}
+        self.movements = []
+        self.lane_movement = {}  # (signal section, lane) -> Movement
+        self.approach_movements = {}  # signal section -> [Movement]
+        for junction in network.junctions.values():
+            for spec in junction.movements.values():
+                movement = Movement(spec, self.inbound[spec.from_section], self.outbound[spec.to_section])
+                self.movements.append(movement)
+                for lane in spec.origin_lanes:
+                    self.lane_movement[(spec.from_section, lane)] = movement
+                self.approach_movements.setdefault(spec.from_section, []).append(movement)
+        self.discharge_credit = {key: 0.0 for key in self.lane_movement}
+        self.sections = network.sections()
+        self.next_vehicle_id = 1
+        self.served = 0
+        self.total_travel_time = 0.0
+        self._section_table = None
+        self.vehicle_sections = {}  # vehicle id -> (section id, lane) at the last section_events call
+
+    def set_signal_state(self, junction_id, signal_group, state):
+        self.signal_state[(junction_id, signal_group)] = state
+
+    def get_signal_state(self, junction_id, signal_group):
+        if self.events_enabled[junction_id]:
+            return self.plan_state(junction_id, signal_group)
+        return self.signal_state.get((junction_id, signal_group), 0)
+
+    def plan_state(self, junction_id, signal_group):
+        phases = self.network.junctions[junction_id].phases
+        phase = phases[int(self.time // self.plan_green) % len(phases)]
+        return GREEN if signal_group in phase else 0
+
+    def disable_events(self, junction_id):
+        """Stops the control plan of the junction, which keeps the states the plan shows now."""
+        if self.events_enabled[junction_id]:
+            for signal_group in self.network.junctions[junction_id].signal_groups:
+                self.signal_state[(junction_id, signal_group)] = self.plan_state(junction_id, signal_group)
+            self.events_enabled[junction_id] = False
+
+    def enable_events(self, junction_id):
+        self.events_enabled[junction_id] = True
+
+    def step(self, dt):
+        self._section_table = None
+        distance = self.free_speed * dt
+
+        # Outbound links first so that vehicles leaving the network make room
+        for link in self.outbound.values():
+            link.advance(distance, self.jam)
+            for vehicles in link.lanes.values():
+                while vehicles and vehicles[0].position >= link.length:
+                    vehicle = vehicles[0]
+                    if link.feeds is None:
+                        self.served += 1
+                        self.total_travel_time += self.time + dt - vehicle.arrived
+                    else:
+                        # vehicle.movement was redrawn for the next approach when it was discharged
+                        inbound = vehicle.movement.inbound
+                        lanes = [l for l in vehicle.movement.spec.origin_lanes if inbound.has_room(l, self.jam)]
+                        if not lanes:
+                            break
+                        vehicle.position = 0.0
+                        inbound.lanes[min(lanes, key=lambda l: len(inbound.lanes[l]))].append(vehicle)
+                    vehicles.pop(0)
+
+        # Stop lines
+        for (section_id, lane), movement in self.lane_movement.items():
+            vehicles = movement.inbound.lanes[lane]
+            key = (section_id, lane)
+            if not vehicles or vehicles[0].position < movement.inbound.length:
+                self.discharge_credit[key] = 0.0
+                continue
+            if self.get_signal_state(*movement.key) not in (GREEN, AMBER):
+                self.discharge_credit[key] = 0.0
+                continue
+            self.discharge_credit[key] = min(1.0, self.discharge_credit[key] + self.sat_flow * dt / 3600.0)
+            if self.discharge_credit[key] < 1.0:
+                continue
+            dest_lanes = [l for l in movement.spec.dest_lanes if movement.outbound.has_room(l, self.jam)]
+            if not dest_lanes:
+                continue
+            dest_lane = min(dest_lanes, key=lambda l: len(movement.outbound.lanes[l]))
+            vehicle = vehicles.pop(0)
+            vehicle.position = 0.0
+            if movement.outbound.feeds is not None:
+                vehicle.movement = self.next_movement(movement.outbound.feeds)
+            movement.outbound.lanes[dest_lane].append(vehicle)
+            self.discharge_credit[key] -= 1.0
+
+        for link in self.inbound.values():
+            link.advance(distance, self.jam)
+
+        # Arrivals
+        for movement in self.movements:
+            if self.rng.random() < movement.spec.demand * dt / 3600.0:
+                movement.waiting.append(self.time)
+            while movement.waiting:
+                lanes = [l for l in movement.spec.origin_lanes if movement.inbound.has_room(l, self.jam)]
+                if not lanes:
+                    break
+                lane = min(lanes, key=lambda l: len(movement.inbound.lanes[l]))
+                vehicle = Vehicle(self.next_vehicle_id, movement, movement.waiting.pop(0))
+                self.next_vehicle_id += 1
+                movement.inbound.lanes[lane].append(vehicle)
+
+        self.time += dt
+
+    def next_movement(self, section_id):
+        """Draws the movement of a vehicle joining the approach at section_id, in proportion to demand."""
+        movements = self.approach_movements[section_id]
+        return self.rng.choices(movements, weights=[movement.spec.demand for movement in movements])[0]
+
+    def section_table(self):
+        """{section id: [(vehicle id, lane), ...]} of the current step."""
+        if self._section_table is None:
+            table = {section_id: [] for section_id in self.sections}
+            for link in list(self.inbound.values()) + list(self.outbound.values()):
+                if not link.section_ids:
+                    continue
+                for lane, vehicles in link.lanes.items():
+                    for vehicle in vehicles:
+                        table[link.section_at(vehicle.position)].append((vehicle.id, lane))
+            self._section_table = table
+        return self._section_table
+
+    def section_events(self):
+        """
+        Section changes since the last call as (entered, vehicle id, section id),
+        exits first, as AAPIExitVehicleSection and AAPIEnterVehicleSection would
+        report them.
+        """
+        current = {}
+        for link in list(self.inbound.values()) + list(self.outbound.values()):
+            if not link.section_ids:
+                continue
+            for lane, vehicles in link.lanes.items():
+                for vehicle in vehicles:
+                    current[vehicle.id] = (link.section_at(vehicle.position), lane)
+        events = []
+        for vehicle_id, (section_id, lane) in self.vehicle_sections.items():
+            now = current.get(vehicle_id)
+            if now is None or now[0] != section_id:
+                events.append((False, vehicle_id, section_id))
+        for vehicle_id, (section_id, lane) in current.items():
+            before = self.vehicle_sections.get(vehicle_id)
+            if before is None or before[0] != section_id:
+                events.append((True, vehicle_id, section_id))
+        self.vehicle_sections = current
+        return events
+
+    def vehicle_location(self, vehicle_id):
+        """(section id, lane) of a vehicle at the last section_events call."""
+        return self.vehicle_sections[vehicle_id]
+
+    def section_vehicles(self, section_id):
+        """[(vehicle id, lane), ...] on one section in the current step."""
+        return self.section_table().get(section_id, ())
+
+    def vehicles_in_network(self):
+        return sum(len(vehicles) for link in list(self.inbound.values()) + list(self.outbound.values()) for vehicles in link.lanes.values())
+
+    def waiting(self):
+        return sum(len(movement.waiting) for movement in self.movements)
+
+    def summary(self):
+        return {
+            "simulated_seconds": self.time,
+            "served": self.served,
+            "in_network": self.vehicles_in_network(),
+            "waiting_outside": self.waiting(),
+            "mean_travel_time": self.total_travel_time / self.served if self.served else 0.0,
+        }
+
+
+class OccupancySimulator(Simulator):
+    """
+    Stress model for controller benchmarks: no vehicle moves, and every step in
+    which the section table is read, each section reports a fresh random load
+    around vehicles_per_section spread over its lanes, drawn when it is first read. Loads far beyond the
+    storage of a real section (thousands of vehicles) are allowed on purpose.
+    """
+
+    def __init__(self, network, vehicles_per_section, seed=1, **kwargs):
+        super().__init__(network, seed=seed, **kwargs)
+        self.vehicles_per_section = vehicles_per_section
+
+    def step(self, dt):
+        self._section_table = None
+        self.time += dt
+
+    def section_vehicles(self, section_id):
+        # Sections are drawn on first read, so a step costs only what the controller reads
+        if self._section_table is None:
+            self._section_table = {}
+        vehicles = self._section_table.get(section_id)
+        if vehicles is None:
+            num_lanes, length = self.sections[section_id]
+            count = int(self.rng.uniform(0.5, 1.5) * self.vehicles_per_section)
+            first_id = self.next_vehicle_id
+            self.next_vehicle_id += count
+            vehicles = [(first_id + i, self.rng.randint(1, num_lanes)) for i in range(count)]
+            self._section_table[section_id] = vehicles
+        return vehicles
+
+    def vehicles_in_network(self):
+        return 0
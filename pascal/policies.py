@@ -0,0 +1,286 @@
+"""
+Pressure policies and the phase-timing rules built on them.
+
+A pressure policy turns the vehicles counted upstream and downstream of a
+turning into the weight of its signal group:
+
+    VaraiyaPressure       - vehicles upstream minus vehicles downstream
+    CapacityAwarePressure - Capacity-Aware max pressure with m and c_infinity
+    PascalPressure        - PASCAL, occupancy upstream times spare room downstream
+
+Policies that need storage capacities name the GeometryCache column they read
+the origin capacity from (origin_cap); the controller then builds the cache in
+AAPISimulationReady. weight() takes numbers or numpy arrays of any length, so
+measure_movements weighs every turning of a junction (or of several junctions,
+concatenated) in one numpy expression. softmax_green_splits (Le) and CyclePhasePicker (Levin)
+turn the phase pressures into green times and phase orders.
+"""
+import numpy as np
+
+from pascal.network import SECTION_UPSTREAM, SECTION_DOWNSTREAM
+
+
+class VaraiyaPressure:
+    """Max pressure control of Varaiya."""
+
+    origin_cap = None
+
+    def weight(self, sum_vehicles_origin, sum_vehicles_destination, origin_lane_cap=None, dest_lane_cap=None):
+        return (sum_vehicles_origin - sum_vehicles_destination)
+
+
+class CapacityAwarePressure:
+    """Capacity aware max pressure; the origin capacity is the whole approach."""
+
+    origin_cap = "approach_origin_cap"
+
+    def __init__(self, m=4, c_infinity=500):
+        self.m = m
+        self.c_infinity = c_infinity
+
+    def weight(self, sum_vehicles_origin, sum_vehicles_destination, origin_lane_cap, dest_lane_cap):
+        m = self.m
+        c_infinity = self.c_infinity
+        return (np.minimum(1, ((sum_vehicles_origin/ c_infinity) + (2 - (origin_lane_cap/ c_infinity)) * np.power((sum_vehicles_origin/ origin_lane_cap), m))/ (1 + np.power((sum_vehicles_origin/ origin_lane_cap), (m-1)))) - np.minimum(1, ((sum_vehicles_destination/ c_infinity) + (2 - (dest_lane_cap/ c_infinity)) * np.power((sum_vehicles_destination/ dest_lane_cap), m))/ (1 + np.power((sum_vehicles_destination/ dest_lane_cap), (m-1)))))
+
+
+class PascalPressure:
+    """
+    PASCAL pressure; the origin capacity is the lanes used by the turning.
+    queue_weighted=True also multiplies by the upstream queue (central intersection).
+    """
+
+    origin_cap = "turn_origin_cap"
+
+    def __init__(self, queue_weighted=False):
+        self.queue_weighted = queue_weighted
+
+    def weight(self, sum_vehicles_origin, sum_vehicles_destination, origin_lane_cap, dest_lane_cap):
+        if self.queue_weighted:
+            return sum_vehicles_origin * (sum_vehicles_origin/ origin_lane_cap) * (1 - (sum_vehicles_destination/ dest_lane_cap))
+        return (sum_vehicles_origin/ origin_lane_cap) * (1 - (sum_vehicles_destination/ dest_lane_cap))
+
+
+def turning_vehicle_counts(snapshot, turning, section_upstream_dict=SECTION_UPSTREAM, section_downstream_dict=SECTION_DOWNSTREAM, whole_approach=False):
+    """
+    (vehicles upstream, vehicles downstream) of one turning, signal section plus
+    split section on each side. Upstream only the lanes the turning uses are
+    counted unless whole_approach is set; wherever whole sections count, only
+    section totals are read.
+    """
+    return chain_vehicle_counts(snapshot, turning, section_upstream_dict[turning.from_section],
+                                section_downstream_dict[turning.to_section], whole_approach)
+
+
+def chain_vehicle_counts(snapshot, turning, upstream_sections, downstream_sections, whole_approach=False):
+    """turning_vehicle_counts with the split sections of the turning already looked up."""
+    if whole_approach:
+        sum_veh_origin_split_upstream_section = snapshot.merged_total(upstream_sections)
+        sum_veh_origin_signal_section = snapshot.total(turning.from_section)
+    else:
+        lane_vehicle_count_from_split_upstream_section = snapshot.merged_lane_counts(upstream_sections)
+        lane_vehicle_count_from_section = snapshot.lane_counts(turning.from_section)
+        sum_veh_origin_signal_section = sum(lane_vehicle_count_from_section.get(lane, 0) for lane in turning.origin_lanes)
+        sum_veh_origin_split_upstream_section = sum(lane_vehicle_count_from_split_upstream_section.get(lane, 0) for lane in turning.origin_lanes)
+    sum_vehicles_origin = sum_veh_origin_signal_section + sum_veh_origin_split_upstream_section
+
+    ## For downstream entire section is considered as we do not know where the vehicles will go
+    sum_veh_dest_signal_section = snapshot.total(turning.to_section)
+    sum_veh_dest_split_downstream_section = snapshot.merged_total(downstream_sections)
+    sum_vehicles_destination = sum_veh_dest_signal_section + sum_veh_dest_split_downstream_section
+    return sum_vehicles_origin, sum_vehicles_destination
+
+
+class Measurements:
+    """
+    Values of one decision per signal group. A signal group with several
+    turnings keeps the values of its last turning.
+
+    weight         - pressure of the signal group under the policy
+    names          - logical name of the signal group
+    origin_veh     - vehicles upstream
+    dest_veh       - vehicles downstream
+    dest_spare_cap - room left downstream, in vehicles (policies with capacities only)
+    origin_lanes   - number of origin lanes of the turning
+    dest_lanes     - number of destination lanes of the turning
+    """
+
+    def __init__(self):
+        self.weight = {}
+        self.names = {}
+        self.origin_veh = {}
+        self.dest_veh = {}
+        self.dest_spare_cap = {}
+        self.origin_lanes = {}
+        self.dest_lanes = {}
+
+
+class TurningTable:
+    """
+    What a measurement looks up for every turning of a junction, compiled once
+    (in simulation_ready) into lists indexed by turning row, in iter_turnings
+    order, so that a decision does no dict lookups of split sections, names or
+    geometry rows.
+
+    turnings          - [(signal group, Turning), ...]
+    upstream          - [split sections upstream of the turning's signal section, ...]
+    downstream        - [split sections downstream of the turning's destination, ...]
+    names             - [logical name of the signal group, ...]
+    origin_lane_count - [lanes the turning leaves from, ...]
+    dest_lane_count   - [lanes the turning enters, ...]
+    geometry_rows     - int array of GeometryCache rows, None without geometry
+    """
+
+    def __init__(self, topology, section_upstream_dict=SECTION_UPSTREAM, section_downstream_dict=SECTION_DOWNSTREAM, geometry=None):
+        self.turnings = list(topology.iter_turnings())
+        self.upstream = [section_upstream_dict[turning.from_section] for _, turning in self.turnings]
+        self.downstream = [section_downstream_dict[turning.to_section] for _, turning in self.turnings]
+        self.names = [topology.names[signal_group] for signal_group, _ in self.turnings]
+        self.origin_lane_count = [len(turning.origin_lanes) for _, turning in self.turnings]
+        self.dest_lane_count = [len(turning.dest_lanes) for _, turning in self.turnings]
+        self.geometry_rows = None
+        if geometry is not None:
+            self.geometry_rows = np.array([geometry.row(signal_group, turning.index) for signal_group, turning in self.turnings], dtype=np.intp)
+
+
+def measure_movements(topology, snapshot, policy, geometry=None, section_upstream_dict=SECTION_UPSTREAM, section_downstream_dict=SECTION_DOWNSTREAM, table=None):
+    """
+    Counts every turning of the junction and weighs all of them with the
+    policy at once, on arrays with one entry per turning in iter_turnings order.
+    table is the junction's TurningTable, compiled here when not given.
+    """
+    if table is None:
+        table = TurningTable(topology, section_upstream_dict, section_downstream_dict, geometry if policy.origin_cap is not None else None)
+    turnings = table.turnings
+    sum_vehicles_origin = np.empty(len(turnings), dtype=np.int64)
+    sum_vehicles_destination = np.empty(len(turnings), dtype=np.int64)
+    for i, (signal_group, turning) in enumerate(turnings):
+        sum_vehicles_origin[i], sum_vehicles_destination[i] = chain_vehicle_counts(snapshot, turning, table.upstream[i], table.downstream[i])
+
+    if policy.origin_cap is None:
+        veh_num_diff = policy.weight(sum_vehicles_origin, sum_vehicles_destination)
+        dest_spare_cap = None
+    else:
+        # Storage capacities come from the geometry cache built in AAPISimulationReady
+        geometry_rows = table.geometry_rows
+        origin_lane_cap = getattr(geometry, policy.origin_cap)[geometry_rows]
+        dest_lane_cap = geometry.dest_cap[geometry_rows]
+        veh_num_diff = policy.weight(sum_vehicles_origin, sum_vehicles_destination, origin_lane_cap, dest_lane_cap)
+        dest_spare_cap = (dest_lane_cap - sum_vehicles_destination).tolist()
+
+    # Plain Python numbers from here on; a signal group with several turnings keeps its last one
+    measurements = Measurements()
+    veh_num_diff = veh_num_diff.tolist()
+    origin_veh = sum_vehicles_origin.tolist()
+    dest_veh = sum_vehicles_destination.tolist()
+    for i, (signal_group, turning) in enumerate(turnings):
+        measurements.weight[signal_group] = veh_num_diff[i]
+        measurements.names[signal_group] = table.names[i]
+        measurements.origin_veh[signal_group] = origin_veh[i]
+        measurements.dest_veh[signal_group] = dest_veh[i]
+        measurements.origin_lanes[signal_group] = table.origin_lane_count[i]
+        measurements.dest_lanes[signal_group] = table.dest_lane_count[i]
+        if dest_spare_cap is not None:
+            measurements.dest_spare_cap[signal_group] = dest_spare_cap[i]
+    return measurements
+
+
+def phase_pressures(topology, signal_group_veh_diff):
+    """{phase: sum of the weights of its signal groups} in phase order."""
+    pressure_for_phase = {}
+    for phase, phase_signal_groups in topology.phases.items():
+        pressure_for_phase[phase] = sum(signal_group_veh_diff[signal_group_id] for signal_group_id in phase_signal_groups)
+    return pressure_for_phase
+
+
+def softmax_green_splits(pressure_phase_list, eta, cycle_time, min_green):
+    """
+    Le et al. green times: min_green for every phase plus a softmax share of
+    the rest of the cycle. Rounding excess is taken off the longest green.
+    """
+    pressure_exp_value = [np.exp(np.clip(eta * phase_pressure, -700, 700)) for phase_pressure in pressure_phase_list]
+    sum_exp_value = sum(pressure_exp_value)
+
+    total_min_green = min_green * len(pressure_phase_list)
+    remaining_green = (cycle_time - total_min_green)
+
+    green_duration_phase = [round(phase_exp/ sum_exp_value * remaining_green) for phase_exp in pressure_exp_value]
+    green_duration_phase = [x+min_green for x in green_duration_phase]
+
+    if sum(green_duration_phase) > cycle_time:
+        highest_element = max(green_duration_phase)
+        highest_element_index = green_duration_phase.index(highest_element)
+        # Calculate the amount to reduce from the highest element
+        reduction_amount = sum(green_duration_phase) - cycle_time
+        # Adjust the highest element
+        green_duration_phase[highest_element_index] -= reduction_amount
+    return green_duration_phase
+
+
+class CyclePhasePicker:
+    """
+    Levin's cycle-constrained phase order. Every phase is served once within
+    max_cycle_time picks, in phase order; a phase may be held while it carries
+    more pressure than the next one and there are picks to spare.
+    """
+
+    def __init__(self, max_cycle_time):
+        self.max_cycle_time = max_cycle_time
+        self.cycle_counter = 0
+        self.previous_phases_list = []
+        self.remaining_phases_list = []
+
+    def advance(self):
+        self.cycle_counter += 1
+        return self.cycle_counter
+
+    def remaining_cycle_steps(self):
+        return self.max_cycle_time - self.cycle_counter
+
+    def pick(self, all_phases, phase_pressure):
+        """phase_pressure(phase) is only called when two phases have to be compared."""
+        cycle_counter = self.cycle_counter
+        max_cycle_time = self.max_cycle_time
+        remaining_cycle_steps = self.remaining_cycle_steps()
+
+        if not self.previous_phases_list and not self.remaining_phases_list:
+            # first time
+            critical_phase = all_phases[0]
+            self.previous_phases_list.append(critical_phase)
+            self.remaining_phases_list = all_phases[1:]
+            return critical_phase
+
+        elif (1 <= cycle_counter < max_cycle_time and
+              remaining_cycle_steps == len(self.remaining_phases_list) and
+              len(self.remaining_phases_list) > 1):
+            critical_phase = self.remaining_phases_list[0]
+            self.previous_phases_list.append(critical_phase)
+            self.remaining_phases_list = self.remaining_phases_list[1:]
+            return critical_phase
+
+        elif (1 < cycle_counter < max_cycle_time and
+              remaining_cycle_steps > len(self.remaining_phases_list) and
+              len(self.remaining_phases_list) > 1):
+            # compare pressure
+            pressure_current_phase = phase_pressure(self.previous_phases_list[-1])
+            pressure_next_phase = phase_pressure(self.remaining_phases_list[0])
+            if pressure_current_phase > pressure_next_phase:
+                # remain on the same
+                return self.previous_phases_list[-1]
+            critical_phase = self.remaining_phases_list[0]
+            self.previous_phases_list.append(critical_phase)
+            self.remaining_phases_list = self.remaining_phases_list[1:]
+            return critical_phase
+
+        else:
+            # cycle_counter == max_cycle_time or maybe only 1 left
+            if self.remaining_phases_list:
+                critical_phase = self.remaining_phases_list[0]
+            else:
+                # fallback
+                critical_phase = all_phases[0]
+
+            self.previous_phases_list.clear()
+            self.remaining_phases_list.clear()
+            self.cycle_counter = 0
+            return critical_phase
@@ -0,0 +1,153 @@
+"""
+Opt-in AAPI call profiler.
+
+The pascal package calls Aimsun through the AAPI module (AAPI.AKIVehState...,
+AAPI.ECIChangeSignalGroupState, ...), never through names imported from it, so
+replacing the module attributes with counting wrappers catches every call the
+controllers make. enable() installs the wrappers and disable() puts the
+originals back. Profiling is off unless enable() is called, e.g. from an entry
+script, or the environment variable PASCAL_PROFILE_AAPI is set when the
+simulation becomes ready:
+
+    from pascal import profiling
+    profiling.enable()
+
+Every AAPIPostManage call that runs a controller is a tick (steps it sleeps
+through are not); a tick that makes at least one AAPI call is a decision. AAPIFinish prints calls, cumulative time
+and calls per decision for every function called, most expensive first.
+"""
+import os
+import time
+
+import AAPI
+
+# The profiler in use, or None when profiling is off
+profiler = None
+
+
+def default_function_names():
+    """Every AKI and ECI function of the AAPI module."""
+    return sorted(name for name in dir(AAPI) if name.startswith(("AKI", "ECI"))
+                  and callable(getattr(AAPI, name)) and not isinstance(getattr(AAPI, name), type))
+
+
+class FunctionStats:
+    __slots__ = ("calls", "seconds", "decision_calls", "calls_in_decisions", "max_decision_calls")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.decision_calls = 0  # calls in the current tick
+        self.calls_in_decisions = 0
+        self.max_decision_calls = 0
+
+
+class AAPICallProfiler:
+    """Counts calls and wall time of AAPI functions, in total and per decision."""
+
+    def __init__(self, names=None, clock=time.perf_counter):
+        self.names = list(names) if names is not None else default_function_names()
+        self.clock = clock
+        self.stats = {name: FunctionStats() for name in self.names}
+        self.originals = {}
+        self.touched = set()
+        self.ticks = 0
+        self.decisions = 0
+
+    def wrap(self, name, function):
+        stats = self.stats[name]
+        touched = self.touched
+        clock = self.clock
+
+        def counted(*args):
+            start = clock()
+            try:
+                return function(*args)
+            finally:
+                stats.seconds += clock() - start
+                stats.calls += 1
+                stats.decision_calls += 1
+                touched.add(name)
+
+        counted.__name__ = name
+        counted.__wrapped__ = function
+        return counted
+
+    def install(self):
+        for name in self.names:
+            if name not in self.originals:
+                self.originals[name] = getattr(AAPI, name)
+                setattr(AAPI, name, self.wrap(name, self.originals[name]))
+
+    def uninstall(self):
+        for name, function in self.originals.items():
+            setattr(AAPI, name, function)
+        self.originals.clear()
+
+    def begin_decision(self):
+        # Calls made between ticks, e.g. in simulation_ready, belong to no decision
+        for name in self.touched:
+            self.stats[name].decision_calls = 0
+        self.touched.clear()
+
+    def end_decision(self):
+        self.ticks += 1
+        if not self.touched:
+            return
+        self.decisions += 1
+        for name in self.touched:
+            stats = self.stats[name]
+            stats.calls_in_decisions += stats.decision_calls
+            if stats.decision_calls > stats.max_decision_calls:
+                stats.max_decision_calls = stats.decision_calls
+            stats.decision_calls = 0
+        self.touched.clear()
+
+    def calls_in_decisions(self):
+        """AAPI calls made inside ticks, i.e. without the one-off calls of simulation_ready."""
+        return sum(stats.calls_in_decisions for stats in self.stats.values())
+
+    def summary(self):
+        """{function: {calls, seconds, per_decision, max_per_decision}} for the functions called, most time first."""
+        rows = sorted((item for item in self.stats.items() if item[1].calls), key=lambda item: item[1].seconds, reverse=True)
+        return {name: {"calls": stats.calls,
+                       "seconds": stats.seconds,
+                       "per_decision": stats.calls_in_decisions / self.decisions if self.decisions else 0.0,
+                       "max_per_decision": stats.max_decision_calls}
+                for name, stats in rows}
+
+    def report_lines(self):
+        summary = self.summary()
+        total_seconds = sum(values["seconds"] for values in summary.values())
+        lines = [f"AAPI calls: {self.ticks} ticks, {self.decisions} decisions, {total_seconds * 1e3:.1f} ms in AAPI",
+                 f"{'function':<40} {'calls':>9} {'total ms':>9} {'us/call':>8} {'/decision':>9} {'max':>6}"]
+        for name, values in summary.items():
+            lines.append(f"{name:<40} {values['calls']:>9} {values['seconds'] * 1e3:>9.1f} "
+                         f"{values['seconds'] / values['calls'] * 1e6:>8.2f} {values['per_decision']:>9.1f} {values['max_per_decision']:>6}")
+        return lines
+
+    def report(self):
+        for line in self.report_lines():
+            AAPI.AKIPrintString(line)
+
+
+def enable(names=None):
+    """Installs a new profiler over names (default: every AKI and ECI function) and returns it."""
+    global profiler
+    disable()
+    profiler = AAPICallProfiler(names)
+    profiler.install()
+    return profiler
+
+
+def disable():
+    global profiler
+    if profiler is not None:
+        profiler.uninstall()
+        profiler = None
+
+
+def enable_from_environment():
+    """Turns profiling on when PASCAL_PROFILE_AAPI is set to anything but 0 or an empty string."""
+    if profiler is None and os.environ.get("PASCAL_PROFILE_AAPI", "0") not in ("", "0"):
+        enable()
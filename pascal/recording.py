@@ -0,0 +1,130 @@
+"""
+Streaming table output.
+
+Scripts that record a time series write it row by row while the simulation
+runs instead of collecting it in memory until AAPIFinish. The columns are
+fixed when the writer is opened; rows are buffered and written chunk_rows at
+a time, so memory stays bounded however long the run and a crash loses at
+most the rows of the current chunk:
+
+    writer = open_table_writer(output_path("queue_to_capacity_data.csv"), columns)
+    writer.append(row)   # one value per column, in column order
+    writer.close()       # from AAPIFinish
+
+The format follows the extension of the path. CsvTableWriter needs nothing
+beyond the standard library. ParquetTableWriter needs pyarrow and writes one
+row group per chunk; the file is only readable once close() has written the
+footer.
+
+Files go under OUTPUT_DIR (output/ of the repository, or the directory named
+by the environment variable PASCAL_OUTPUT_DIR) unless a script passes a full
+path.
+"""
+import csv
+import os
+
+OUTPUT_DIR = os.environ.get("PASCAL_OUTPUT_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
+
+
+def output_path(file_name):
+    """file_name under OUTPUT_DIR, read at call time."""
+    return os.path.join(OUTPUT_DIR, file_name)
+
+
+class CsvTableWriter:
+    """
+    Writes the header at once and the rows in chunks of chunk_rows, flushing
+    the file after every chunk.
+    """
+
+    def __init__(self, path, columns, chunk_rows=60):
+        self.path = path
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.buffer = []
+        self.rows = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+        self.file.flush()
+
+    def append(self, row):
+        if len(row) != len(self.columns):
+            raise ValueError(f"Row of {len(row)} values for {len(self.columns)} columns of {self.path}")
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.writerows(self.buffer)
+            self.rows += len(self.buffer)
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class ParquetTableWriter:
+    """
+    Writes every chunk of chunk_rows rows as one Parquet row group. column_types
+    gives a pyarrow type per column name, float64 for any column left out.
+    """
+
+    def __init__(self, path, columns, chunk_rows=60, column_types=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(f"Writing {path} needs pyarrow; install it or write a .csv file instead") from None
+        self.pyarrow = pyarrow
+        self.path = path
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.buffer = []
+        self.rows = 0
+        column_types = column_types or {}
+        self.schema = pyarrow.schema([(name, column_types.get(name, pyarrow.float64())) for name in self.columns])
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def append(self, row):
+        if len(row) != len(self.columns):
+            raise ValueError(f"Row of {len(row)} values for {len(self.columns)} columns of {self.path}")
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            arrays = [self.pyarrow.array([row[index] for row in self.buffer], type=field.type)
+                      for index, field in enumerate(self.schema)]
+            self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+            self.rows += len(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        if self.writer is not None:
+            self.flush()
+            self.writer.close()
+            self.writer = None
+
+
+WRITERS = {".csv": CsvTableWriter, ".parquet": ParquetTableWriter}
+
+
+def open_table_writer(path, columns, chunk_rows=60):
+    """CsvTableWriter or ParquetTableWriter for path, by its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unknown output format {extension!r} of {path}, expected one of {', '.join(WRITERS)}")
+    return WRITERS[extension](path, columns, chunk_rows)
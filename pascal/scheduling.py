@@ -0,0 +1,142 @@
+"""
+Wake-up deadlines of the signal controllers and of sampling.
+
+A controller cannot change anything between entering a signal state and the
+end of its duration: the green of time_step seconds, the amber or the all red.
+Instead of counting steps or adding up the time spent in a state, it records
+when the state ends and sleeps until then:
+
+    self.wait(time1, self.amber_time)
+
+JunctionController.post_manage compares time1 with the wake-up time and
+returns at once on every step before it, so a sleeping junction costs one
+comparison per step. A MultiJunctionController keeps the earliest wake-up of
+its junctions and skips the step entirely while every junction sleeps.
+
+Times are time1, the simulation seconds Aimsun passes to AAPIPostManage. A
+state entered at time1 = t for seconds s ends on the first step at or after
+t + s, as when the step lengths were added up, but without the rounding error
+the sum builds up when acycle is not a power of two (ten steps of 0.1 s add
+up to a little less than 1 s).
+
+Fixed-interval controllers keep their greens on a grid with a StateClock: a
+green ends time_step seconds after the all red before it was due to end, not
+after the step that ended it, so a late step does not push every later
+decision back. Amber and all red are clearance intervals and never shorter
+than configured: they are timed from the step that entered them.
+
+Samplers do the same for recording: a Sampler holds the next of a series of
+sample times and fires on the first step at or after it, and a
+MultiRateSampler runs several series (e.g. readings every second, output rows
+every minute) behind one comparison per step.
+"""
+import math
+
+# Wake-up time of a controller that runs on every step
+AWAKE = float("-inf")
+
+# Slack for the rounding in time1 itself, far below any step length
+TOLERANCE = 1e-6
+
+
+def deadline(start, seconds):
+    """Wake-up time of a state entered at time1 = start that lasts seconds."""
+    return start + seconds - TOLERANCE
+
+
+class StateClock:
+    """
+    End times of the successive signal states of one controller.
+
+    due    - time1 at which the current state ends, None before the first state
+    wakeup - the same less TOLERANCE, what a step compares time1 with
+    """
+
+    def __init__(self):
+        self.due = None
+        self.wakeup = AWAKE
+
+    def start(self, time1, seconds, clearance=False):
+        """
+        Starts a state of seconds where the previous one was due to end, or at
+        time1 for the first state, and returns the wake-up time. A clearance
+        state (amber, all red) starts no earlier than time1, so that it lasts
+        at least seconds however late the step that entered it.
+        """
+        start = self.due if self.due is not None else time1
+        if clearance and start < time1:
+            start = time1
+        self.due = start + seconds
+        self.wakeup = deadline(start, seconds)
+        return self.wakeup
+
+
+class Sampler:
+    """
+    Sample times every interval seconds from start up to end (both included,
+    end None for no end), in the clock the caller passes to fire(), e.g.
+    timeSta. Each is fired by the first step at or after it; the sample times
+    stay on the grid of start however the steps fall.
+
+    next_sample - next sample time, math.inf once the window is over
+    wakeup      - the same less TOLERANCE, what a step compares with
+    sample_time - the (latest) sample time fired by the last fire(), None before
+    fired       - samples fired
+    missed      - sample times passed over because one step crossed several
+    """
+
+    def __init__(self, interval, start=0.0, end=None):
+        if interval <= 0:
+            raise ValueError(f"Sampling interval must be positive, got {interval!r}")
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.index = 0
+        self.fired = 0
+        self.missed = 0
+        self.next_sample = start
+        self.wakeup = start - TOLERANCE
+        self.sample_time = None
+
+    def fire(self, now):
+        """True when now has reached the next sample time, which then moves on to the first one after now."""
+        if now < self.wakeup:
+            return False
+        passed = int(math.floor((now - self.next_sample + TOLERANCE) / self.interval)) + 1
+        self.fired += 1
+        self.missed += passed - 1
+        self.index += passed
+        self.sample_time = self.start + (self.index - 1) * self.interval
+        self.next_sample = self.start + self.index * self.interval
+        if self.end is not None and self.next_sample > self.end + TOLERANCE:
+            self.next_sample = math.inf
+        self.wakeup = self.next_sample - TOLERANCE
+        return True
+
+
+class MultiRateSampler:
+    """
+    Several Samplers, {name: Sampler}, checked together:
+
+        if timeSta < sampling.wakeup:
+            return 0
+        for name in sampling.fire(timeSta):
+            ...
+
+    wakeup is the earliest wake-up of them all, so a step before it costs one
+    comparison.
+    """
+
+    def __init__(self, samplers):
+        self.samplers = dict(samplers)
+        self.wakeup = min(sampler.wakeup for sampler in self.samplers.values())
+
+    def fire(self, now):
+        """Names of the samplers due at now, in the order they were given."""
+        due = [name for name, sampler in self.samplers.items() if sampler.fire(now)]
+        self.wakeup = min(sampler.wakeup for sampler in self.samplers.values())
+        return due
+
+    def report_lines(self):
+        return [f"Sampler {name}: every {sampler.interval} s, {sampler.fired} samples, {sampler.missed} sample times missed"
+                for name, sampler in self.samplers.items()]
@@ -0,0 +1,328 @@
+"""
+Per-tick section occupancy snapshot and the sensors it reads from.
+
+Every controller counts the vehicles on the signal section, the split upstream
+section and the split downstream section of each turning. Turnings of the same
+approach share these sections, so counting them turning by turning reads the
+same vehicles several times in one decision. A SectionSnapshot reads each
+section at most once per decision tick and hands the same per-lane count table
+to every signal group.
+
+Upstream a turning needs the vehicles on its own lanes; downstream, and for
+whole approaches, only the section total matters. The snapshot therefore asks
+its sensor for per-lane counts only where lanes are used and for totals
+everywhere else. Sensors:
+
+VehicleScanSensor    - walks every vehicle of the section for its lane; totals
+                       are one AKIVehStateGetNbVehiclesSection call (exact, default)
+LaneStatisticsSensor - lane densities of the current statistics interval,
+                       AKIEstGetCurrentStatisticsSectionLane (approximate)
+IncrementalSensor    - per-lane counters kept up to date from vehicle entry and
+                       exit callbacks, reconciled with a full scan periodically
+CheckedSensor        - wraps a sensor and compares it with a reference sensor
+"""
+import AAPI
+
+
+def read_section_lane_counts(section_id):
+    """
+    Reads every vehicle on a section once and returns {lane number: vehicles}.
+    An empty section gives an empty dict.
+    """
+    lane_counts = {}
+    num_veh = AAPI.AKIVehStateGetNbVehiclesSection(int(section_id), True)
+    for veh_index in range(num_veh):
+        lane = AAPI.AKIVehStateGetVehicleInfSection(section_id, veh_index).numberLane
+        lane_counts[lane] = lane_counts.get(lane, 0) + 1
+    return lane_counts
+
+
+class VehicleScanSensor:
+    """Exact counts from the vehicle states of the section."""
+
+    def lane_counts(self, section_id):
+        return read_section_lane_counts(section_id)
+
+    def total(self, section_id):
+        return AAPI.AKIVehStateGetNbVehiclesSection(int(section_id), True)
+
+
+class LaneStatisticsSensor:
+    """
+    Lane counts estimated as lane density times section length, from the
+    statistics Aimsun gathers over the current statistics interval (the
+    experiment must collect statistics). The values are averages since the
+    interval started rather than the vehicles present now, so they lag the
+    traffic; check them against VehicleScanSensor with CheckedSensor before
+    relying on them. One call per lane, however many vehicles there are.
+    """
+
+    def __init__(self, vehicle_type=0):
+        self.vehicle_type = vehicle_type  # 0 is every vehicle type
+        self.section_info = {}            # section id -> (number of lanes, length in km)
+
+    def lanes_and_length(self, section_id):
+        info = self.section_info.get(section_id)
+        if info is None:
+            section = AAPI.AKIInfNetGetSectionANGInf(section_id)
+            info = (section.nbCentralLanes + section.nbSideLanes, section.length / 1000.0)
+            self.section_info[section_id] = info
+        return info
+
+    def lane_counts(self, section_id):
+        num_lanes, length_km = self.lanes_and_length(section_id)
+        lane_counts = {}
+        for lane_index in range(num_lanes):
+            statistics = AAPI.AKIEstGetCurrentStatisticsSectionLane(section_id, lane_index, self.vehicle_type)
+            if statistics.report != 0:
+                continue
+            count = int(round(statistics.Density * length_km))
+            if count:
+                # Statistics number lanes from 0, vehicle states from 1
+                lane_counts[lane_index + 1] = count
+        return lane_counts
+
+    def total(self, section_id):
+        return sum(self.lane_counts(section_id).values())
+
+
+class IncrementalSensor:
+    """
+    Per-lane counters of the watched sections, moved by the entry and exit
+    callbacks of the script, so a read costs nothing however many vehicles
+    there are:
+
+        def AAPIEnterVehicleSection(idveh, idsection, atime):
+            return controller.enter_vehicle_section(idveh, idsection, atime)
+
+        def AAPIExitVehicleSection(idveh, idsection, atime):
+            return controller.exit_vehicle_section(idveh, idsection, atime)
+
+    A vehicle is counted on the lane it entered by. Lane changes inside a
+    section raise no callback, so every reconcile_every seconds (of callback
+    time) the next read rescans all watched sections and starts the counters
+    again from the scan; the vehicles found in the wrong place are kept as
+    drift. Controllers watch their sections in simulation_ready.
+    """
+
+    def __init__(self, reconcile_every=60.0):
+        self.reconcile_every = reconcile_every
+        self.watched = set()
+        self.counts = {}         # section id -> {lane number: vehicles}
+        self.location = {}       # vehicle id -> (section id, lane number)
+        self.clock = 0.0         # latest callback time
+        self.last_reconcile = None
+        self.reconciles = 0
+        self.drift = 0
+        self.max_drift = 0
+
+    def watch(self, section_ids):
+        for section_id in section_ids:
+            if section_id not in self.watched:
+                self.watched.add(section_id)
+                self.counts[section_id] = {}
+                self.last_reconcile = None
+
+    def enter(self, vehicle_id, section_id, atime):
+        self.clock = atime
+        if section_id not in self.watched:
+            return
+        lane = AAPI.AKIVehGetInf(vehicle_id).numberLane
+        lane_counts = self.counts[section_id]
+        lane_counts[lane] = lane_counts.get(lane, 0) + 1
+        self.location[vehicle_id] = (section_id, lane)
+
+    def exit(self, vehicle_id, section_id, atime):
+        self.clock = atime
+        location = self.location.get(vehicle_id)
+        # Only the exit from the section the vehicle was counted on
+        if location is None or location[0] != section_id:
+            return
+        del self.location[vehicle_id]
+        lane = location[1]
+        lane_counts = self.counts[section_id]
+        if lane_counts.get(lane, 0) > 0:
+            lane_counts[lane] -= 1
+
+    def reconcile(self):
+        """Rebuilds every counter from the vehicles on the watched sections."""
+        drift = 0
+        self.location.clear()
+        for section_id in self.watched:
+            lane_counts = {}
+            num_veh = AAPI.AKIVehStateGetNbVehiclesSection(int(section_id), True)
+            for veh_index in range(num_veh):
+                vehicle = AAPI.AKIVehStateGetVehicleInfSection(section_id, veh_index)
+                lane_counts[vehicle.numberLane] = lane_counts.get(vehicle.numberLane, 0) + 1
+                self.location[vehicle.idVeh] = (section_id, vehicle.numberLane)
+            old_counts = self.counts[section_id]
+            drift += sum(abs(lane_counts.get(lane, 0) - old_counts.get(lane, 0)) for lane in set(lane_counts) | set(old_counts))
+            self.counts[section_id] = lane_counts
+        if self.last_reconcile is not None:
+            self.drift += drift
+            self.max_drift = max(self.max_drift, drift)
+        self.reconciles += 1
+        self.last_reconcile = self.clock
+
+    def lane_counts(self, section_id):
+        if section_id not in self.watched:
+            return read_section_lane_counts(section_id)
+        if self.last_reconcile is None or self.clock - self.last_reconcile >= self.reconcile_every:
+            self.reconcile()
+        return {lane: count for lane, count in self.counts[section_id].items() if count}
+
+    def total(self, section_id):
+        if section_id not in self.watched:
+            return AAPI.AKIVehStateGetNbVehiclesSection(int(section_id), True)
+        return sum(self.lane_counts(section_id).values())
+
+    def report_lines(self):
+        return [f"IncrementalSensor: {len(self.watched)} sections, {self.reconciles} reconciles, "
+                f"{self.drift} vehicles corrected in total, at most {self.max_drift} at once"]
+
+    def report(self):
+        for line in self.report_lines():
+            AAPI.AKIPrintString(line)
+
+
+class CheckedSensor:
+    """
+    Serves the counts of sensor and, on every every-th read, also reads
+    reference (VehicleScanSensor by default) and keeps the lane by lane
+    difference, e.g. to validate LaneStatisticsSensor on a network before
+    switching a controller to it.
+    """
+
+    def __init__(self, sensor, reference=None, every=1):
+        self.sensor = sensor
+        self.reference = reference if reference is not None else VehicleScanSensor()
+        self.every = every
+        self.reads = 0
+        self.checks = 0
+        self.lanes_checked = 0
+        self.abs_error = 0
+        self.max_abs_error = 0
+        self.worst_section = None
+
+    def watch(self, section_ids):
+        if hasattr(self.sensor, "watch"):
+            self.sensor.watch(section_ids)
+
+    def enter(self, vehicle_id, section_id, atime):
+        if hasattr(self.sensor, "enter"):
+            self.sensor.enter(vehicle_id, section_id, atime)
+
+    def exit(self, vehicle_id, section_id, atime):
+        if hasattr(self.sensor, "exit"):
+            self.sensor.exit(vehicle_id, section_id, atime)
+
+    def lane_counts(self, section_id):
+        lane_counts = self.sensor.lane_counts(section_id)
+        self.reads += 1
+        if self.reads % self.every == 0:
+            self.compare(section_id, lane_counts, self.reference.lane_counts(section_id))
+        return lane_counts
+
+    def total(self, section_id):
+        total = self.sensor.total(section_id)
+        self.reads += 1
+        if self.reads % self.every == 0:
+            self.compare(section_id, {0: total}, {0: self.reference.total(section_id)})
+        return total
+
+    def compare(self, section_id, lane_counts, reference_counts):
+        self.checks += 1
+        for lane in set(lane_counts) | set(reference_counts):
+            error = abs(lane_counts.get(lane, 0) - reference_counts.get(lane, 0))
+            self.lanes_checked += 1
+            self.abs_error += error
+            if error > self.max_abs_error:
+                self.max_abs_error = error
+                self.worst_section = section_id
+
+    def report_lines(self):
+        mean = self.abs_error / self.lanes_checked if self.lanes_checked else 0.0
+        return [f"{type(self.sensor).__name__} against {type(self.reference).__name__}: {self.checks} reads checked, "
+                f"mean abs error {mean:.2f} vehicles per lane, max {self.max_abs_error} (section {self.worst_section})"]
+
+    def report(self):
+        lines = self.report_lines()
+        if hasattr(self.sensor, "report_lines"):
+            lines += self.sensor.report_lines()
+        for line in lines:
+            AAPI.AKIPrintString(line)
+
+
+# Sensor of snapshots created without one
+DEFAULT_SENSOR = VehicleScanSensor()
+
+
+class SectionSnapshot:
+    """
+    Per-lane vehicle counts and totals of the monitored sections for one
+    decision tick, read through sensor (DEFAULT_SENSOR when None).
+
+    A section is read on the first request for it; every later request in the
+    same tick is served from the tables, and a total is taken from the lane
+    counts when those were read already. The total of a section in
+    lane_sections is always taken from its lane counts, so that a section one
+    junction reads as a total and another lane by lane is read once. Create a
+    new snapshot (or call clear()) at the start of each decision so that
+    counts never go stale.
+    """
+
+    def __init__(self, sensor=None, lane_sections=()):
+        self.sensor = sensor if sensor is not None else DEFAULT_SENSOR
+        self.lane_sections = lane_sections
+        self.lane_table = {}
+        self.total_table = {}
+
+    def clear(self):
+        self.lane_table.clear()
+        self.total_table.clear()
+
+    def lane_counts(self, section_id):
+        """{lane number: vehicles} for one section."""
+        counts = self.lane_table.get(section_id)
+        if counts is None:
+            counts = self.sensor.lane_counts(section_id)
+            self.lane_table[section_id] = counts
+        return counts
+
+    def total(self, section_id):
+        """Vehicles on one section."""
+        total = self.total_table.get(section_id)
+        if total is None:
+            counts = self.lane_table.get(section_id)
+            if counts is None and section_id in self.lane_sections:
+                counts = self.lane_counts(section_id)
+            total = sum(counts.values()) if counts is not None else self.sensor.total(section_id)
+            self.total_table[section_id] = total
+        return total
+
+    def merged_lane_counts(self, section_ids):
+        """
+        {lane number: vehicles} added lane by lane over a chain of split
+        sections, e.g. section_upstream_dict[from_section].
+        """
+        if len(section_ids) == 1:
+            return self.lane_counts(section_ids[0])
+        merged = {}
+        for section_id in section_ids:
+            for lane, count in self.lane_counts(section_id).items():
+                merged[lane] = merged.get(lane, 0) + count
+        return merged
+
+    def merged_total(self, section_ids):
+        """Vehicles on a chain of split sections."""
+        return sum(self.total(section_id) for section_id in section_ids)
+
+    def prefetch(self, section_ids):
+        """Reads the lane counts of a batch of sections up front, e.g. the origin sections of a junction."""
+        for section_id in section_ids:
+            self.lane_counts(section_id)
+
+    def prefetch_totals(self, section_ids):
+        """Reads the totals of a batch of sections up front, e.g. the destination sections of a junction."""
+        for section_id in section_ids:
+            self.total(section_id)
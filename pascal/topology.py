@@ -0,0 +1,75 @@
+"""
+Junction topology index.
+
+Signal group names, the turnings each signal group controls, the lanes those
+turnings use and the signal groups of every phase are fixed for a junction.
+JunctionTopology reads them once through ECI/AKIInfNet so that a decision only
+has to read occupancy.
+"""
+from collections import namedtuple
+
+import AAPI
+
+# index is the turning's position inside its signal group (as used by ECIGetFromToofTurningofSignalGroup)
+Turning = namedtuple("Turning", ["index", "from_section", "to_section", "origin_lanes", "dest_lanes"])
+
+
+class JunctionTopology:
+    """
+    signal_groups - signal group ids 1..N
+    names         - {signal group: logical name, e.g. 'NB Th'}
+    sg_by_name    - {logical name: signal group}
+    turnings      - {signal group: [Turning, ...]}
+    phases        - {phase: [signal group, ...]} for every phase that is not an interphase, in phase order
+    """
+
+    def __init__(self, junction_id, names, turnings, phases):
+        self.junction_id = junction_id
+        self.signal_groups = sorted(names)
+        self.names = names
+        self.sg_by_name = {name: sg for sg, name in names.items()}
+        self.turnings = turnings
+        self.phases = phases
+
+    @classmethod
+    def build(cls, junction_id, time1=0):
+        names = {}
+        turnings = {}
+        num_signal_groups = AAPI.ECIGetNumberSignalGroups(junction_id)
+        for signal_group in range(1, num_signal_groups + 1):
+            nonChar = AAPI.boolp()
+            names[signal_group] = AAPI.AKIConvertToAsciiString(AAPI.ECIGetLogicalNameofSignalGroup(junction_id, signal_group), True, nonChar)
+            turnings[signal_group] = []
+            num_turnings = AAPI.ECIGetNumberTurningsofSignalGroup(junction_id, signal_group)
+            for turning_index in range(num_turnings):
+                fromSection = AAPI.intp()
+                toSection = AAPI.intp()
+                report = AAPI.ECIGetFromToofTurningofSignalGroup(junction_id, signal_group, turning_index, fromSection, toSection)
+                if report != 0:
+                    continue
+                from_id = fromSection.value()
+                to_id = toSection.value()
+                first_lane_turn_origin = AAPI.AKIInfNetGetTurningOriginFromLane(from_id, to_id)
+                last_lane_turn_origin = AAPI.AKIInfNetGetTurningOriginToLane(from_id, to_id)
+                first_lane_turn_destination = AAPI.AKIInfNetGetTurningDestinationFromLane(from_id, to_id)
+                last_lane_turn_destination = AAPI.AKIInfNetGetTurningDestinationToLane(from_id, to_id)
+                turnings[signal_group].append(Turning(
+                    turning_index, from_id, to_id,
+                    list(range(first_lane_turn_origin, last_lane_turn_origin + 1)),
+                    list(range(first_lane_turn_destination, last_lane_turn_destination + 1)),
+                ))
+
+        phases = {}
+        num_phases = AAPI.ECIGetNumberPhases(junction_id)
+        for phase in range(1, num_phases + 1):
+            if AAPI.ECIIsAnInterPhase(junction_id, phase, time1) == 0:
+                num_phase_signal_groups = AAPI.ECIGetNbSignalGroupsPhaseofJunction(junction_id, phase, time1)
+                phases[phase] = [AAPI.ECIGetSignalGroupPhaseofJunction(junction_id, phase, sg_index, time1)
+                                 for sg_index in range(num_phase_signal_groups)]
+        return cls(junction_id, names, turnings, phases)
+
+    def iter_turnings(self):
+        """(signal group, Turning) for every turning of the junction."""
+        for signal_group in self.signal_groups:
+            for turning in self.turnings[signal_group]:
+                yield signal_group, turning
@@ -0,0 +1,143 @@
+"""
+Append-only binary trace of controller decisions.
+
+Every decision of a controller given a DecisionTrace appends one fixed-size
+record: the time1 of the step, the junction, the pressure of every signal
+group, the signal groups chosen to go green and the green time given to them.
+Controllers may share one trace, e.g. all junctions of a
+MultiJunctionController:
+
+    trace = DecisionTrace(output_path("decisions.trace"))
+    controller = PascalController(1978, PascalPressure(), trace=trace)
+
+The file is a 16-byte header (the magic b"PASCALTR", the format version and
+the number of signal groups per record) followed by the records, written in
+chunks of chunk_records; a crash loses at most one chunk. load_trace() maps
+the file into memory as a numpy structured array, so millions of decisions
+can be sliced without reading, let alone parsing, them:
+
+    records = load_trace("output/decisions.trace")
+    central = records[records["junction"] == 1978]
+    central["pressure"][:, 0]           # pressure of signal group 1 over time
+    chosen_signal_groups(central[0])    # [1, 4]
+
+Pressures are NaN for signal groups that were not measured in a decision (Le
+serves the rest of its cycle without measuring again). chosen is a bit mask,
+bit sg - 1 for signal group sg.
+"""
+import os
+
+import numpy as np
+
+MAGIC = b"PASCALTR"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("signal_groups", "<u4")])
+
+
+def record_dtype(signal_groups):
+    """Record layout for up to signal_groups signal groups (at most 64, the width of the chosen mask)."""
+    if not 1 <= signal_groups <= 64:
+        raise ValueError(f"A trace holds 1 to 64 signal groups per record, got {signal_groups!r}")
+    return np.dtype([("time", "<f8"), ("junction", "<i4"), ("green", "<f4"),
+                     ("chosen", "<u8"), ("pressure", "<f4", (signal_groups,))])
+
+
+class DecisionTrace:
+    """
+    Appends decision records to path, creating it with a header when it does
+    not exist yet.
+
+    signal_groups - signal groups per record, the highest signal group number traced
+    records       - records appended by this object
+    """
+
+    def __init__(self, path, signal_groups=32, chunk_records=256):
+        self.path = path
+        self.dtype = record_dtype(signal_groups)
+        self.signal_groups = signal_groups
+        self.chunk = np.zeros(chunk_records, dtype=self.dtype)
+        self.pending = 0
+        self.records = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            header = read_header(path)
+            if header["signal_groups"] != signal_groups:
+                raise ValueError(f"{path} holds {header['signal_groups']} signal groups per record, not {signal_groups}")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            self.file.write(np.array((MAGIC, VERSION, signal_groups), dtype=HEADER).tobytes())
+
+    def check(self, junction_id, signal_groups):
+        """Raises ValueError when a signal group of junction_id does not fit in a record."""
+        too_high = [sg for sg in signal_groups if not 1 <= sg <= self.signal_groups]
+        if too_high:
+            raise ValueError(f"Signal groups {too_high} of junction {junction_id} do not fit a trace of {self.signal_groups} signal groups")
+
+    def append(self, time, junction_id, pressures, chosen, green):
+        """
+        One decision: pressures {signal group: pressure}, chosen the signal
+        groups to go green, green their green time in seconds.
+        """
+        record = self.chunk[self.pending]
+        record["time"] = time
+        record["junction"] = junction_id
+        record["green"] = green
+        mask = 0
+        for signal_group in chosen:
+            mask |= 1 << (signal_group - 1)
+        record["chosen"] = mask
+        pressure = record["pressure"]
+        pressure[:] = np.nan
+        for signal_group, value in pressures.items():
+            pressure[signal_group - 1] = value
+        self.pending += 1
+        self.records += 1
+        if self.pending == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        if self.pending and self.file is not None:
+            self.file.write(self.chunk[:self.pending].tobytes())
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.itemsize)
+    if len(raw) < HEADER.itemsize:
+        raise ValueError(f"{path} is too short for a decision trace")
+    header = np.frombuffer(raw, dtype=HEADER)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a decision trace")
+    if header["version"] != VERSION:
+        raise ValueError(f"{path} is a version {header['version']} trace, expected {VERSION}")
+    return header
+
+
+def load_trace(path):
+    """
+    The records of a trace as a read-only numpy memmap. A record cut short by
+    a crash at the end of the file is left out.
+    """
+    header = read_header(path)
+    dtype = record_dtype(int(header["signal_groups"]))
+    count = (os.path.getsize(path) - HEADER.itemsize) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER.itemsize, shape=(count,))
+
+
+def chosen_signal_groups(record):
+    """Signal groups set in the chosen mask of one record."""
+    mask = int(record["chosen"])
+    return [bit + 1 for bit in range(64) if mask >> bit & 1]
@@ -0,0 +1,30 @@
+"""
+The tests import the pascal package from the repository root and run whatever
+needs Aimsun on the offline stand-in (pascal.offline), which takes the place of
+the AAPI and PyANGKernel modules before any pascal module imports them.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pascal.offline import aapi, angkernel  # noqa: E402
+
+sys.modules.setdefault("AAPI", aapi)
+sys.modules.setdefault("PyANGKernel", angkernel)
+
+
+@pytest.fixture
+def simulator():
+    """A fresh synthetic network of all five junctions with the fake AAPI and PyANGKernel bound to it."""
+    from pascal.offline.run import prepare
+    return prepare()
+
+
+@pytest.fixture
+def loaded_network():
+    """The same network with a few vehicles on random lanes of every section, redrawn every step."""
+    from pascal.offline.run import prepare
+    return prepare(vehicles_per_section=8)
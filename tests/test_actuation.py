@@ -0,0 +1,84 @@
+"""
+SignalMirror against the signal states of the fake AAPI, with the ECI calls
+counted.
+"""
+import collections
+
+import pytest
+
+from pascal.offline.run import ALL_JUNCTIONS
+
+ALGORITHMS = ("varaiya", "le", "levin", "pascal")
+ECI_CALLS = ("ECIDisableEvents", "ECIGetCurrentStateofSignalGroup", "ECIChangeSignalGroupState")
+
+
+@pytest.fixture
+def eci_calls(simulator, monkeypatch):
+    """Counter of the ECI calls of ECI_CALLS by name, from now on."""
+    from pascal.offline import aapi
+    counts = collections.Counter()
+
+    def counted(name, function):
+        def call(*args):
+            counts[name] += 1
+            return function(*args)
+        return call
+
+    for name in ECI_CALLS:
+        monkeypatch.setattr(aapi, name, counted(name, getattr(aapi, name)))
+    return counts
+
+
+def plan_states(junction_id, signal_groups):
+    import AAPI
+    return {signal_group: AAPI.ECIGetCurrentStateofSignalGroup(junction_id, signal_group) for signal_group in signal_groups}
+
+
+def test_mirror_takes_control_once_and_skips_repeated_states(simulator, eci_calls):
+    from pascal.actuation import SignalMirror
+    junction = simulator.network.junctions[505]
+    signal_groups = list(junction.signal_groups)
+    mirror = SignalMirror(505)
+    mirror.attach(signal_groups)
+    first = signal_groups[0]
+
+    # Before control every read asks the plan
+    plan = plan_states(505, signal_groups)
+    assert mirror.state(first) == plan[first]
+    assert mirror.reads == 1 and not mirror.in_control
+    eci_calls.clear()
+
+    mirror.set_state([first], plan[first], 0.0, 0.0, 0.5)
+    assert eci_calls == {"ECIDisableEvents": 1, "ECIGetCurrentStateofSignalGroup": len(signal_groups)}
+    assert mirror.states == plan and mirror.suppressed == 1 and mirror.changes == 0
+
+    eci_calls.clear()
+    other = 1 - plan[first] if plan[first] in (0, 1) else 0
+    mirror.set_state(signal_groups, other, 1.0, 1.0, 0.5)
+    mirror.set_state(signal_groups, other, 2.0, 2.0, 0.5)
+    assert mirror.state(first) == other
+    changed = sum(1 for state in plan.values() if state != other)
+    assert eci_calls == {"ECIChangeSignalGroupState": changed}
+    assert mirror.changes == changed and mirror.suppressed == 1 + 2 * len(signal_groups) - changed
+    assert plan_states(505, signal_groups) == mirror.states
+    assert mirror.report_lines() == [f"Signals of junction 505: {changed} of {1 + 2 * len(signal_groups)} state changes issued, "
+                                     f"{mirror.suppressed} suppressed, {1 + len(signal_groups)} state reads"]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_controller_mirror_stays_in_step_with_the_signals(algorithm, simulator, eci_calls):
+    from PyANGKernel import GKSystem
+    from pascal.multi import MultiJunctionController
+    controller = MultiJunctionController.for_algorithm(algorithm, ALL_JUNCTIONS)
+    controller.simulation_ready(GKSystem.getSystem().getActiveModel())
+    for step in range(2400):
+        time1 = step * 0.5
+        simulator.step(0.5)
+        controller.post_manage(time1, time1, 0, 0.5)
+
+    mirrors = [junction.signals for junction in controller.controllers]
+    assert all(mirror.in_control for mirror in mirrors)
+    assert eci_calls["ECIDisableEvents"] == len(mirrors)
+    assert eci_calls["ECIChangeSignalGroupState"] == sum(mirror.changes for mirror in mirrors)
+    for mirror in mirrors:
+        assert plan_states(mirror.junction_id, mirror.signal_groups) == mirror.states
@@ -0,0 +1,119 @@
+"""
+BackgroundWriter: calls made in order on its thread, a full queue, close()
+draining the queue before the thread stops, and the writer of the occupancy
+logger.
+"""
+import os
+import threading
+import time
+
+from pascal.background import BackgroundWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def held_writer(capacity, block=False):
+    """
+    A writer whose thread is held in a call until the returned event is set,
+    so that the queue fills up.
+    """
+    writer = BackgroundWriter(capacity=capacity, block=block, poll=0.01)
+    gate = threading.Event()
+    writer.put(gate.wait)
+    while writer.queue:
+        time.sleep(0.001)
+    return writer, gate
+
+
+def test_close_drains_the_queue_and_joins_the_thread():
+    writer = BackgroundWriter(poll=0.01)
+    rows = []
+    for index in range(5000):
+        writer.put(rows.append, index)
+    assert writer.close()
+    assert not writer.thread.is_alive()
+    assert rows == list(range(5000))
+    assert writer.written == writer.enqueued == 5000
+    assert writer.dropped == 0
+    # Closed once; later calls are made at once
+    assert not writer.close()
+    writer.put(rows.append, 5000)
+    assert rows[-1] == 5000
+
+
+def test_full_queue_waits_for_room_and_never_drops_a_row():
+    writer, gate = held_writer(capacity=3)
+    rows = []
+    threading.Timer(0.05, gate.set).start()
+    for index in range(10):
+        writer.put(rows.append, index)
+    writer.close()
+    assert rows == list(range(10))
+    assert writer.dropped == 0
+    assert writer.blocked >= 1 and writer.block_seconds > 0
+    assert writer.max_depth == 3
+
+
+def test_full_queue_drops_log_lines_unless_blocking(tmp_path):
+    path = tmp_path / "pascal.log"
+    writer, gate = held_writer(capacity=3)
+    writer.log_path = str(path)
+    for index in range(5):
+        writer.log(f"line {index}")
+    assert writer.dropped == 2 and writer.blocked == 0
+    gate.set()
+    writer.close()
+    assert path.read_text().splitlines() == ["line 0", "line 1", "line 2"]
+
+    writer, gate = held_writer(capacity=3, block=True)
+    writer.log_path = str(path)
+    threading.Timer(0.05, gate.set).start()
+    for index in range(5, 10):
+        writer.log(f"line {index}")
+    writer.close()
+    assert writer.dropped == 0 and writer.blocked >= 1
+    assert path.read_text().splitlines() == [f"line {index}" for index in (0, 1, 2, 5, 6, 7, 8, 9)]
+
+
+def test_log_lines_go_to_the_log_file(tmp_path):
+    path = tmp_path / "logs" / "pascal.log"
+    writer = BackgroundWriter(log_path=str(path), poll=0.01)
+    writer.log("Critical phase is 3")
+    writer.log("Critical phase is 1")
+    writer.close()
+    assert path.read_text().splitlines() == ["Critical phase is 3", "Critical phase is 1"]
+
+
+def test_failed_calls_are_counted_and_the_rest_still_written():
+    writer = BackgroundWriter(poll=0.01)
+    rows = []
+    writer.put(rows.append, 1)
+    writer.put(int, "not a number")
+    writer.put(rows.append, 2)
+    writer.close()
+    assert rows == [1, 2]
+    assert writer.errors == 1 and isinstance(writer.first_error, ValueError)
+    assert writer.report_lines()[1].startswith("Background writer: 1 calls failed")
+
+
+def test_occupancy_logger_runs_its_writer_from_simulation_ready_to_finish(simulator, tmp_path, monkeypatch):
+    from pascal import recording
+    from pascal.offline.run import load_script, simulate
+    monkeypatch.setattr(recording, "OUTPUT_DIR", str(tmp_path))
+
+    def writer_threads():
+        return [thread for thread in threading.enumerate() if thread.name == "pascal-background-writer"]
+
+    module = load_script(os.path.join(ROOT, "Link Occupancy vs Capacity.py"))
+    # Loading the script starts no thread
+    assert module.background is None and not writer_threads()
+    simulate(module, simulator, hours=0.1, start_time=21590.0)
+    background = module.background
+    assert writer_threads() == [background.thread]
+
+    module.AAPIFinish()
+    assert background.closed and not background.thread.is_alive()
+    assert background.written == background.enqueued and background.dropped == 0
+    with open(tmp_path / "queue_to_capacity_data.csv") as file:
+        assert len(file.read().splitlines()) == 1 + 6
+    assert (tmp_path / "link_occupancy.log").read_text().count("Sum of vehicles") == background.enqueued - 6
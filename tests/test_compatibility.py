@@ -0,0 +1,172 @@
+"""
+The compatible group solvers against the original list-based search, which
+enumerated every subset of a conflict matrix row and is kept here as the
+reference.
+"""
+import random
+from itertools import combinations
+
+import pytest
+
+from pascal.compatibility import CliqueSearch, CompatibilityLattice
+from pascal.network import CONFLICT_MATRICES
+
+
+def check_compatibility(combination, movement_list):
+    for movement1, movement2 in combinations(combination, 2):
+        if movement1 in movement_list[movement2] or movement2 in movement_list[movement1]:
+            continue
+        else:
+            return False
+    return True
+
+
+def discard_subsets(combinations_list):
+    sorted_combinations = sorted(combinations_list, key=len, reverse=True)
+    final_combinations = []
+    for combination in sorted_combinations:
+        if all(not set(combination).issubset(set(c)) for c in final_combinations):
+            final_combinations.append(combination)
+    return final_combinations
+
+
+def build_compatible_combinations(conflict_matrix):
+    compatible_combinations_dict = {}
+    for key, elements in conflict_matrix.items():
+        compatible_combinations = []
+        for r in range(1, len(elements) + 1):
+            for combo in combinations(elements, r):
+                if check_compatibility(combo, conflict_matrix):
+                    compatible_combinations.append(list(combo))
+        compatible_combinations = discard_subsets(compatible_combinations)
+        compatible_combinations_dict[key] = compatible_combinations
+    return compatible_combinations_dict
+
+
+def find_highest_sum_combination(critical_signal_group, compatible_combinations_dict, criteria_values_signal_group_name):
+    combinations_list = compatible_combinations_dict.get(critical_signal_group, [])
+    highest_sum = float('-inf')
+    best_combination = None
+    for combo in combinations_list:
+        combo_sum = sum(criteria_values_signal_group_name.get(key, 0) for key in combo)
+        if combo_sum > highest_sum:
+            highest_sum = combo_sum
+            best_combination = combo
+    return best_combination
+
+
+def random_conflict_matrix(rng, movements, density):
+    """Symmetric compatibility over movements named m0, m1, ..., each row in a shuffled order."""
+    names = [f"m{i}" for i in range(movements)]
+    compatible = {name: [] for name in names}
+    for a, b in combinations(names, 2):
+        if rng.random() < density:
+            compatible[a].append(b)
+            compatible[b].append(a)
+    for row in compatible.values():
+        rng.shuffle(row)
+    return compatible
+
+
+# Weights that cancel in float arithmetic, so that the order of addition decides ties
+CANCELLING_WEIGHTS = (0, 0.1, 0.2, 0.3, -0.1, -0.2, -0.3, 0.7, 1.0, 3, 1e16, -1e16)
+
+
+def conflict_matrices():
+    rng = random.Random(7)
+    matrices = [pytest.param(matrix, id=str(junction_id)) for junction_id, matrix in CONFLICT_MATRICES.items()]
+    for k in range(6):
+        matrices.append(pytest.param(random_conflict_matrix(rng, 8 + k, 0.3 + 0.08 * k), id=f"random{k}"))
+    return matrices
+
+
+@pytest.mark.parametrize("conflict_matrix", conflict_matrices())
+def test_lattice_lists_the_groups_of_the_subset_enumeration(conflict_matrix):
+    lattice = CompatibilityLattice(conflict_matrix)
+    assert lattice.combinations == build_compatible_combinations(conflict_matrix)
+
+
+@pytest.mark.parametrize("conflict_matrix", conflict_matrices())
+def test_lattice_picks_the_reference_group(conflict_matrix):
+    lattice = CompatibilityLattice(conflict_matrix)
+    reference = build_compatible_combinations(conflict_matrix)
+    rng = random.Random(11)
+    for _ in range(300):
+        values = {name: rng.choice(CANCELLING_WEIGHTS) for name in conflict_matrix}
+        weights = lattice.weight_vector(values)
+        for name in conflict_matrix:
+            assert lattice.best_combination(name, weights) == find_highest_sum_combination(name, reference, values)
+
+
+def test_lattice_breaks_a_float_tie_like_the_reference():
+    # Both groups of SB LT sum to -0.1 in their own order; the first one listed wins
+    conflict_matrix = CONFLICT_MATRICES[505]
+    values = {"NB Th": 0.2, "NB LT": -0.2, "SB Th": -0.1, "WB RT": -0.1}
+    lattice = CompatibilityLattice(conflict_matrix)
+    assert lattice.best_combination("SB LT", lattice.weight_vector(values)) == ["NB Th", "NB LT", "SB Th"]
+
+
+def test_lattice_best_set_is_a_maximal_set_of_highest_sum():
+    conflict_matrix = CONFLICT_MATRICES[1978]
+    lattice = CompatibilityLattice(conflict_matrix)
+    rng = random.Random(3)
+    for _ in range(100):
+        values = {name: rng.choice(CANCELLING_WEIGHTS) for name in conflict_matrix}
+        best = lattice.best_set(lattice.weight_vector(values))
+        assert check_compatibility(best, conflict_matrix)
+        best_sum = sum(values[name] for name in best)
+        assert all(sum(values[name] for name in group) <= best_sum for group in lattice.all_combinations)
+
+
+def test_lattice_save_and_load_give_the_same_groups(tmp_path):
+    conflict_matrix = CONFLICT_MATRICES[505]
+    lattice = CompatibilityLattice(conflict_matrix)
+    lattice.save(str(tmp_path / "lattice.npz"))
+    loaded = CompatibilityLattice.load(str(tmp_path / "lattice.npz"), conflict_matrix)
+    assert loaded.combinations == lattice.combinations
+    assert loaded.all_combinations == lattice.all_combinations
+    with pytest.raises(KeyError):
+        CompatibilityLattice.load(str(tmp_path / "lattice.npz"), CONFLICT_MATRICES[985])
+
+
+@pytest.mark.parametrize("conflict_matrix", conflict_matrices())
+def test_search_picks_the_lattice_group(conflict_matrix):
+    lattice = CompatibilityLattice(conflict_matrix)
+    search = CliqueSearch(conflict_matrix)
+    rng = random.Random(13)
+    for _ in range(200):
+        weights = lattice.weight_vector({name: rng.choice(CANCELLING_WEIGHTS) for name in conflict_matrix})
+        for name in conflict_matrix:
+            assert search.best_combination(name, weights) == lattice.best_combination(name, weights)
+        assert search.best_set(weights) == lattice.best_set(weights)
+    assert search.truncated == 0
+
+
+def test_search_prunes_below_the_budget():
+    conflict_matrix = random_conflict_matrix(random.Random(1), 24, 0.6)
+    search = CliqueSearch(conflict_matrix)
+    weights = search.weight_vector({name: float(i % 5) for i, name in enumerate(conflict_matrix)})
+    for name in conflict_matrix:
+        search.best_combination(name, weights)
+    assert search.truncated == 0
+    assert search.nodes < search.searches * search.max_nodes
+
+
+def test_search_stops_at_max_nodes_with_a_maximal_group():
+    conflict_matrix = random_conflict_matrix(random.Random(1), 30, 0.7)
+    search = CliqueSearch(conflict_matrix, max_nodes=5)
+    weights = search.weight_vector({name: float(i) for i, name in enumerate(conflict_matrix)})
+    for name in conflict_matrix:
+        group = search.best_combination(name, weights)
+        assert check_compatibility(group, conflict_matrix)
+        assert set(group) <= set(conflict_matrix[name])
+        # No other movement of the row fits the group
+        assert not [other for other in conflict_matrix[name]
+                    if other not in group and check_compatibility(group + [other], conflict_matrix)]
+    assert search.truncated == search.searches == len(conflict_matrix)
+    assert search.nodes == search.searches * search.max_nodes
+
+
+def test_search_refuses_more_than_64_movements():
+    with pytest.raises(ValueError):
+        CliqueSearch({f"m{i}": [] for i in range(65)})
@@ -0,0 +1,109 @@
+"""
+Reading and checking the network config file.
+"""
+import json
+
+import pytest
+
+from pascal.config import DEFAULT_PATH, NetworkConfig, load_network_config
+
+
+def minimal_config():
+    return {
+        "space_headway_jam": 6.5,
+        "timing": {"amber_time": 2, "all_red_time": 2, "min_green": 15, "max_green": 60, "sat_flow": 2},
+        "controllers": {"le": {"time_step": 5, "cycle_time": 100}},
+        "section_upstream": {"552": [658]},
+        "section_downstream": {},
+        "junctions": {
+            "7": {
+                "name": "x",
+                "approach_signal_groups": {"nb": 1},
+                "conflict_matrix": {"NB Th": ["SB Th"], "SB Th": ["NB Th"]},
+                "timing": {"min_green": 10},
+                "controllers": {"le": {"cycle_time": 80}},
+            }
+        },
+    }
+
+
+def problems(data):
+    with pytest.raises(ValueError) as error:
+        NetworkConfig.from_dict(data)
+    return str(error.value).splitlines()[1:]
+
+
+def test_shipped_config_loads():
+    config = load_network_config(DEFAULT_PATH)
+    assert set(config.junctions) == {505, 985, 1134, 1427, 1978}
+    assert config.section_upstream[552] == [658]
+    assert config.controller_settings("le", 985)["cycle_time"] == 80
+    assert config.controller_settings("le", 505)["cycle_time"] == 100
+
+
+def test_junction_overrides_the_network_settings():
+    config = NetworkConfig.from_dict(minimal_config())
+    assert config.section_upstream == {552: [658]}
+    assert config.junction_timing(7)["min_green"] == 10
+    assert config.junction_timing(7)["max_green"] == 60
+    assert config.controller_settings("le", 7) == {"time_step": 5, "cycle_time": 80}
+    # A junction that is not configured gets the network settings
+    assert config.junction_timing(8)["min_green"] == 15
+    assert config.controller_settings("le", 8) == {"time_step": 5, "cycle_time": 100}
+    assert config.controller_settings("levin", 7) == {}
+
+
+def test_controllers_section_is_optional():
+    data = minimal_config()
+    del data["controllers"]
+    del data["junctions"]["7"]["controllers"]
+    assert NetworkConfig.from_dict(data).controller_settings("le", 7) == {}
+
+
+def test_every_problem_is_reported_together():
+    data = minimal_config()
+    del data["space_headway_jam"]
+    data["timing"]["min_green"] = 90
+    data["timing"]["colour"] = 1
+    data["controllers"]["le"]["eta"] = "hot"
+    data["junctions"]["7"]["conflict_matrix"]["NB Th"] = ["WB Th"]
+    lines = problems(data)
+    assert len(lines) == 5
+    assert "network: missing 'space_headway_jam'" in lines[0]
+    assert any("timing: unknown key 'colour'" in line for line in lines)
+    assert any("timing: min_green 90 exceeds max_green 60" in line for line in lines)
+    assert any("controllers.le.eta: expected a number, got 'hot'" in line for line in lines)
+    assert any("unknown movement 'WB Th'" in line for line in lines)
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda d: d["controllers"].update(fuzzy={}), "controllers: unknown algorithm 'fuzzy'"),
+    (lambda d: d["controllers"]["le"].update(m=4), "controllers.le: unknown key 'm'"),
+    (lambda d: d["controllers"].update(levin={"verbose": 1}), "controllers.levin.verbose: expected true or false, got 1"),
+    (lambda d: d["controllers"]["le"].update(cycle_time=0), "controllers.le.cycle_time: must be positive, got 0"),
+    (lambda d: d["junctions"]["7"]["controllers"].update(le={"eta": True}), "junctions.7.controllers.le.eta: expected a number, got True"),
+    (lambda d: d["junctions"]["7"]["timing"].update(amber_time=-1), "junctions.7.timing.amber_time: must be zero or more, got -1"),
+    (lambda d: d["junctions"]["7"]["timing"].update(max_green=5), "junctions.7.timing: min_green 10 exceeds max_green 5"),
+    (lambda d: d["junctions"].update(x={}), "junctions.x: junction id 'x' is not an integer"),
+    (lambda d: d["junctions"]["7"].update(phases=[]), "junctions.7: unknown key 'phases'"),
+    (lambda d: d["junctions"]["7"].pop("conflict_matrix"), "junctions.7: missing 'conflict_matrix'"),
+    (lambda d: d["junctions"]["7"]["approach_signal_groups"].update(sb=0), "junctions.7.approach_signal_groups.sb: expected a signal group number, got 0"),
+    (lambda d: d["junctions"]["7"]["conflict_matrix"].update({"SB Th": ["NB Th", "NB Th"]}), "junctions.7.conflict_matrix['SB Th']: lists a movement twice"),
+    (lambda d: d["section_upstream"].update({"-3": [1]}), "section_upstream: section id -3 must be positive"),
+    (lambda d: d["section_downstream"].update({"9": [1, "2"]}), "section_downstream.9: expected a list of section ids"),
+])
+def test_problem_is_reported(change, message):
+    data = minimal_config()
+    change(data)
+    lines = problems(data)
+    assert len(lines) == 1 and message in lines[0]
+
+
+def test_load_names_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "network.json"
+    path.write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError, match="Invalid network config .*network.json"):
+        load_network_config(str(path))
+    path.write_text(json.dumps(minimal_config()), encoding="utf-8")
+    monkeypatch.setenv("PASCAL_NETWORK_CONFIG", str(path))
+    assert list(load_network_config().junctions) == [7]
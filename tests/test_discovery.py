@@ -0,0 +1,35 @@
+"""Split-section chains walked by pascal.discovery, on toy graphs and on the synthetic network."""
+
+
+def test_walk_stops_before_a_section_past_max_distance(simulator):
+    from pascal.discovery import SplitSectionDiscovery
+    forward = {1: [2], 2: [3], 3: [4], 4: []}
+    backward = {2: [1], 3: [2], 4: [3]}
+    lengths = {2: 100.0, 3: 100.0, 4: 100.0}
+    assert SplitSectionDiscovery(max_distance=250).walk(1, forward, backward, lengths, set()) == [2, 3]
+    assert SplitSectionDiscovery(max_distance=200).walk(1, forward, backward, lengths, set()) == [2, 3]
+    assert SplitSectionDiscovery(max_distance=50).walk(1, forward, backward, lengths, set()) == []
+    assert SplitSectionDiscovery().walk(1, forward, backward, lengths, set()) == [2, 3, 4]
+
+
+def test_walk_stops_at_merges_diverges_and_boundaries(simulator):
+    from pascal.discovery import SplitSectionDiscovery
+    discovery = SplitSectionDiscovery()
+    lengths = {}
+    # 3 is also entered from 5: a merge
+    assert discovery.walk(1, {1: [2], 2: [3]}, {2: [1], 3: [2, 5]}, lengths, set()) == [2]
+    # 2 leads to 3 and 4: a diverge
+    assert discovery.walk(1, {1: [2], 2: [3, 4]}, {2: [1], 3: [2], 4: [2]}, lengths, set()) == [2]
+    # 3 belongs to a junction
+    assert discovery.walk(1, {1: [2], 2: [3]}, {2: [1], 3: [2]}, lengths, {3}) == [2]
+    # A loop back to the start
+    assert discovery.walk(1, {1: [2], 2: [1]}, {2: [1], 1: [2]}, lengths, set()) == [2]
+
+
+def test_chains_of_the_network_fit_max_distance(simulator):
+    from pascal.discovery import SplitSectionDiscovery, read_section_graph
+    lengths = read_section_graph()[2]
+    for max_distance in (60, 150, 300):
+        upstream, downstream = SplitSectionDiscovery(max_distance=max_distance).discover()
+        for chain in list(upstream.values()) + list(downstream.values()):
+            assert sum(lengths[section_id] for section_id in chain) <= max_distance
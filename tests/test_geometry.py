@@ -0,0 +1,68 @@
+"""
+The on-disk geometry cache is reused only for the network it was built from.
+"""
+import pytest
+
+from pascal.network import SECTION_DOWNSTREAM, SECTION_UPSTREAM, SPACE_HEADWAY_JAM
+
+
+@pytest.fixture
+def geometry(simulator, tmp_path, monkeypatch):
+    """
+    load(j_id) runs load_or_build_geometry on the stand-in with the cache in
+    tmp_path and returns the geometry and whether it was built.
+    """
+    from PyANGKernel import GKSystem
+    from pascal import geometry as module
+    from pascal.topology import JunctionTopology
+    built = []
+    build = module.GeometryCache.build.__func__
+
+    def counted_build(cls, *args):
+        built.append(args)
+        return build(cls, *args)
+
+    monkeypatch.setattr(module.GeometryCache, "build", classmethod(counted_build))
+    model = GKSystem.getSystem().getActiveModel()
+
+    def load(j_id):
+        count = len(built)
+        topology = JunctionTopology.build(j_id)
+        result = module.load_or_build_geometry(model, topology, SECTION_UPSTREAM, SECTION_DOWNSTREAM, SPACE_HEADWAY_JAM,
+                                               cache_dir=str(tmp_path))
+        return result, len(built) > count
+
+    return load
+
+
+def test_cache_is_reused_for_the_same_network(geometry, tmp_path):
+    first, built = geometry(1978)
+    assert built and (tmp_path / "geometry_1978.npz").exists()
+    second, built = geometry(1978)
+    assert not built
+    assert second.key == first.key
+    assert second.dest_cap.tolist() == first.dest_cap.tolist()
+
+
+def test_changed_section_length_rebuilds_the_cache(geometry, simulator):
+    first, _ = geometry(1978)
+    to_section = int(first.to_section[0])
+    num_lanes, length = simulator.sections[to_section]
+    simulator.sections[to_section] = (num_lanes, length + 60.0)
+
+    second, built = geometry(1978)
+    assert built and second.key != first.key
+    assert second.dest_cap[0] == pytest.approx(first.dest_cap[0] + num_lanes * 60.0 / SPACE_HEADWAY_JAM)
+    # The rebuilt geometry replaced the file
+    third, built = geometry(1978)
+    assert not built and third.key == second.key
+
+
+def test_changed_lane_count_rebuilds_the_cache(geometry, simulator):
+    first, _ = geometry(1978)
+    from_section = int(first.from_section[0])
+    num_lanes, length = simulator.sections[from_section]
+    simulator.sections[from_section] = (num_lanes + 1, length)
+
+    second, built = geometry(1978)
+    assert built and second.key != first.key
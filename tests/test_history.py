@@ -0,0 +1,75 @@
+"""
+MovementHistory ring buffer: wraparound, shared slots and oldest-first views.
+"""
+import numpy as np
+import pytest
+
+from pascal.history import DOWNSTREAM, UPSTREAM, MovementHistory
+
+
+def history_of(slots):
+    history = MovementHistory(slots, metrics=("vehicles", "pressure"))
+    history.add_junction(505, [1, 2, 5])
+    history.add_junction(985, [1, 3])
+    return history
+
+
+def test_samples_wrap_around_oldest_first():
+    history = history_of(4)
+    for t in range(10):
+        history.record(float(t), 505, [1, 5], UPSTREAM, "vehicles", [t, 10 * t])
+    assert history.count == 10 and history.head == 1
+    times, data = history.ordered()
+    assert list(times) == [6.0, 7.0, 8.0, 9.0]
+    assert list(data["vehicles"][:, 0, 4, UPSTREAM]) == [60.0, 70.0, 80.0, 90.0]
+    times, values = history.series(505, 1, UPSTREAM, "vehicles", last=3)
+    assert list(times) == [7.0, 8.0, 9.0] and list(values) == [7.0, 8.0, 9.0]
+    assert history.nbytes == history.data.nbytes + history.times.nbytes
+
+
+def test_ordered_is_a_view_unless_it_wraps():
+    history = history_of(4)
+    for t in range(6):
+        history.record(float(t), 505, [1], UPSTREAM, "vehicles", [t])
+    # head is slot 1: the last two samples lie in slots 0 and 1, the last three wrap around
+    times, data = history.ordered(last=2)
+    assert list(times) == [4.0, 5.0] and np.shares_memory(data, history.data)
+    times, data = history.ordered(last=3)
+    assert list(times) == [3.0, 4.0, 5.0] and not np.shares_memory(data, history.data)
+
+
+def test_junctions_sampled_at_one_time_share_a_slot():
+    history = history_of(3)
+    history.record(1.0, 505, [2], UPSTREAM, "pressure", [0.5])
+    history.record(1.0, 985, [3], DOWNSTREAM, "vehicles", [7])
+    history.record(2.0, 985, [1], UPSTREAM, "vehicles", [4])
+    assert history.count == 2
+    times, data = history.ordered()
+    assert list(times) == [1.0, 2.0]
+    assert data["pressure"][0, 0, 1, UPSTREAM] == 0.5
+    assert data["vehicles"][0, 1, 2, DOWNSTREAM] == 7
+    # Values not sampled in a slot are NaN, also after a slot is reused
+    assert np.isnan(data["vehicles"][1, 1, 2, DOWNSTREAM])
+    for t in (3.0, 4.0):
+        history.record(t, 985, [1], UPSTREAM, "vehicles", [1])
+    times, values = history.series(985, 3, DOWNSTREAM, "vehicles")
+    assert list(times) == [2.0, 3.0, 4.0] and np.isnan(values).all()
+
+
+def test_empty_history():
+    history = history_of(2)
+    times, data = history.ordered()
+    assert len(times) == 0 and len(data) == 0
+    times, values = history.series(505, 1, UPSTREAM, "vehicles")
+    assert len(times) == 0 and len(values) == 0
+    assert history.nbytes == 0
+
+
+def test_shape_is_fixed_at_the_first_sample():
+    history = history_of(2)
+    history.record(0.0, 505, [1], UPSTREAM, "vehicles", [1])
+    assert history.data.shape == (2, 2, 5, 2)
+    with pytest.raises(ValueError):
+        history.add_junction(1134, [1])
+    with pytest.raises(ValueError):
+        MovementHistory(0)
@@ -0,0 +1,73 @@
+"""
+The offline stand-in: traffic of the point-queue model as the fake AAPI
+reports it, the control plan and its hand-over to a controller script.
+"""
+import os
+
+from pascal.offline import aapi
+from pascal.offline.run import run_script
+from pascal.offline.simulator import GREEN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(simulator, seconds, acycle=0.5):
+    for _ in range(int(round(seconds / acycle))):
+        simulator.step(acycle)
+
+
+def outbound_vehicles(simulator):
+    return sum(len(vehicles) for link in simulator.outbound.values() for vehicles in link.lanes.values())
+
+
+def test_vehicles_are_conserved_and_reported_by_section(simulator):
+    run(simulator, 1800)
+    summary = simulator.summary()
+    assert summary["simulated_seconds"] == 1800
+    assert summary["served"] > 0
+    assert simulator.next_vehicle_id - 1 == summary["served"] + summary["in_network"]
+    # Every vehicle on the network is on exactly one section, on a lane of that section
+    assert sum(aapi.AKIVehStateGetNbVehiclesSection(section_id, True) for section_id in simulator.sections) == summary["in_network"]
+    for section_id in simulator.sections:
+        lanes = aapi.AKIInfNetGetSectionANGInf(section_id).nbCentralLanes
+        for index in range(aapi.AKIVehStateGetNbVehiclesSection(section_id, True)):
+            vehicle = aapi.AKIVehStateGetVehicleInfSection(section_id, index)
+            assert vehicle.idSection == section_id and 1 <= vehicle.numberLane <= lanes
+
+
+def test_red_signals_hold_traffic_at_the_stop_line(simulator):
+    for junction_id, junction in simulator.network.junctions.items():
+        aapi.ECIDisableEvents(junction_id)
+        for signal_group in junction.signal_groups:
+            aapi.ECIChangeSignalGroupState(junction_id, signal_group, 0, 0.0, 0.0, 0.5)
+    run(simulator, 600)
+    assert simulator.served == 0 and outbound_vehicles(simulator) == 0
+    assert simulator.vehicles_in_network() > 0
+
+
+def green_signal_groups(junction):
+    return {sg for sg in junction.signal_groups if aapi.ECIGetCurrentStateofSignalGroup(junction.junction_id, sg) == GREEN}
+
+
+def test_plan_runs_until_events_are_disabled(simulator):
+    junction = simulator.network.junctions[505]
+    first, second = junction.phases[0], junction.phases[1]
+    assert green_signal_groups(junction) == set(first) and aapi.ECIIsEventsEnabled(505) == 1
+    run(simulator, simulator.plan_green)
+    assert green_signal_groups(junction) == set(second)
+    # The plan stops where it is and only ECIChangeSignalGroupState changes the states from then on
+    aapi.ECIDisableEvents(505)
+    run(simulator, 2 * simulator.plan_green)
+    assert green_signal_groups(junction) == set(second) and aapi.ECIIsEventsEnabled(505) == 0
+    aapi.ECIChangeSignalGroupState(505, first[0], GREEN, 0.0, 0.0, 0.5)
+    assert green_signal_groups(junction) == set(second) | {first[0]}
+
+
+def test_script_runs_headless_and_repeats_with_the_seed():
+    path = os.path.join(ROOT, "Varaiya_MP_505_P1.py")
+    summary = run_script(path, hours=0.25, seed=3)
+    assert summary["script"] == "Varaiya_MP_505_P1.py"
+    assert summary["simulated_seconds"] == 900 and summary["served"] > 0
+    # The controller took over the junction from its plan
+    assert aapi.simulator.events_enabled[505] is False
+    assert run_script(path, hours=0.25, seed=3)["served"] == summary["served"]
@@ -0,0 +1,97 @@
+"""
+The numpy weighing of measure_movements against the policies weighing one
+turning at a time, as the controllers did before TurningTable.
+"""
+import math
+
+import pytest
+
+from pascal.offline.run import ALL_JUNCTIONS
+from pascal.policies import (CapacityAwarePressure, PascalPressure, TurningTable, VaraiyaPressure, measure_movements,
+                             turning_vehicle_counts)
+
+POLICIES = {
+    "varaiya": VaraiyaPressure(),
+    "capacity_aware": CapacityAwarePressure(m=4, c_infinity=500),
+    "pascal": PascalPressure(),
+    "pascal_queue_weighted": PascalPressure(queue_weighted=True),
+}
+
+
+def ready_controller(junction_id, policy):
+    from PyANGKernel import GKSystem
+    from pascal.controllers import MaxPressureController
+    controller = MaxPressureController(junction_id, policy)
+    controller.simulation_ready(GKSystem.getSystem().getActiveModel())
+    return controller
+
+
+def turning_by_turning(controller, snapshot):
+    """
+    {signal group: (weight, vehicles upstream, vehicles downstream, room left
+    downstream or None)}, the last turning of a signal group winning.
+    """
+    policy = controller.policy
+    geometry = controller.geometry
+    values = {}
+    for signal_group, turning in controller.topology.iter_turnings():
+        origin, destination = turning_vehicle_counts(snapshot, turning, controller.section_upstream_dict,
+                                                     controller.section_downstream_dict)
+        if policy.origin_cap is None:
+            weight = policy.weight(origin, destination)
+            spare = None
+        else:
+            row = geometry.row(signal_group, turning.index)
+            weight = policy.weight(origin, destination, float(getattr(geometry, policy.origin_cap)[row]),
+                                   float(geometry.dest_cap[row]))
+            spare = float(geometry.dest_cap[row]) - destination
+        values[signal_group] = (float(weight), origin, destination, spare)
+    return values
+
+
+@pytest.mark.parametrize("junction_id", ALL_JUNCTIONS)
+@pytest.mark.parametrize("name", POLICIES)
+def test_weights_match_the_turning_by_turning_policy(name, junction_id, loaded_network):
+    from pascal.sensing import SectionSnapshot
+    controller = ready_controller(junction_id, POLICIES[name])
+    for _ in range(5):
+        loaded_network.step(0.5)
+        snapshot = SectionSnapshot()
+        measurements = measure_movements(controller.topology, snapshot, controller.policy, controller.geometry,
+                                         controller.section_upstream_dict, controller.section_downstream_dict, controller.table)
+        expected = turning_by_turning(controller, snapshot)
+        assert list(measurements.weight) == list(expected)
+        for signal_group, (weight, origin, destination, spare) in expected.items():
+            assert measurements.origin_veh[signal_group] == origin
+            assert measurements.dest_veh[signal_group] == destination
+            assert measurements.dest_spare_cap.get(signal_group) == spare
+            # np.power may differ from pow in the last place; the other policies are exact
+            if name == "capacity_aware":
+                assert math.isclose(measurements.weight[signal_group], weight, rel_tol=1e-12, abs_tol=1e-15)
+            else:
+                assert measurements.weight[signal_group] == weight
+            assert type(measurements.weight[signal_group]) in (int, float)
+
+
+def test_table_is_compiled_when_not_given(loaded_network):
+    from pascal.sensing import SectionSnapshot
+    controller = ready_controller(1978, PascalPressure())
+    loaded_network.step(0.5)
+    snapshot = SectionSnapshot()
+    with_table = measure_movements(controller.topology, snapshot, controller.policy, controller.geometry,
+                                   controller.section_upstream_dict, controller.section_downstream_dict, controller.table)
+    without = measure_movements(controller.topology, snapshot, controller.policy, controller.geometry,
+                                controller.section_upstream_dict, controller.section_downstream_dict)
+    assert with_table.weight == without.weight
+    assert with_table.dest_spare_cap == without.dest_spare_cap
+
+
+def test_table_lists_the_turnings_in_topology_order(simulator):
+    controller = ready_controller(505, VaraiyaPressure())
+    table = TurningTable(controller.topology, controller.section_upstream_dict, controller.section_downstream_dict)
+    turnings = list(controller.topology.iter_turnings())
+    assert table.turnings == turnings
+    assert table.geometry_rows is None
+    assert table.names == [controller.topology.names[signal_group] for signal_group, _ in turnings]
+    assert table.upstream == [controller.section_upstream_dict[turning.from_section] for _, turning in turnings]
+    assert table.origin_lane_count == [len(turning.origin_lanes) for _, turning in turnings]
@@ -0,0 +1,88 @@
+"""
+The streaming table writers of pascal.recording: header, chunked flushes and
+the tail written by close(), and the rows of the occupancy logger.
+"""
+import csv
+import os
+
+import pytest
+
+from pascal.recording import CsvTableWriter, open_table_writer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLUMNS = ["time_int", "ns_nb_ds", "ns_nb_us"]
+
+
+def read_csv(path):
+    with open(path, newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_csv_header_is_written_on_open(tmp_path):
+    path = tmp_path / "out" / "occupancy.csv"
+    writer = open_table_writer(str(path), COLUMNS)
+    assert isinstance(writer, CsvTableWriter)
+    assert read_csv(path) == [COLUMNS]
+    writer.close()
+
+
+def test_csv_rows_are_flushed_a_chunk_at_a_time(tmp_path):
+    path = tmp_path / "occupancy.csv"
+    writer = CsvTableWriter(str(path), COLUMNS, chunk_rows=3)
+    for index in range(7):
+        writer.append([21600.0 + 60 * index, index / 10, index / 5])
+        # Rows reach the file only when a chunk fills
+        assert len(read_csv(path)) == 1 + 3 * ((index + 1) // 3)
+    assert writer.rows == 6
+    writer.close()
+    rows = read_csv(path)
+    assert writer.rows == 7
+    assert rows[0] == COLUMNS
+    assert [float(row[0]) for row in rows[1:]] == [21600.0 + 60 * index for index in range(7)]
+    assert rows[-1] == ["21960.0", "0.6", "1.2"]
+
+
+def test_close_writes_a_partial_chunk_once(tmp_path):
+    path = tmp_path / "occupancy.csv"
+    writer = CsvTableWriter(str(path), COLUMNS, chunk_rows=60)
+    writer.append([21600.0, 0.5, 0.25])
+    assert len(read_csv(path)) == 1
+    writer.close()
+    writer.close()
+    assert read_csv(path) == [COLUMNS, ["21600.0", "0.5", "0.25"]]
+
+
+def test_rows_must_have_a_value_per_column(tmp_path):
+    writer = CsvTableWriter(str(tmp_path / "occupancy.csv"), COLUMNS)
+    with pytest.raises(ValueError, match="2 values for 3 columns"):
+        writer.append([21600.0, 0.5])
+    writer.close()
+
+
+def test_unknown_extension_is_refused(tmp_path):
+    with pytest.raises(ValueError, match="Unknown output format '.xlsx'"):
+        open_table_writer(str(tmp_path / "occupancy.xlsx"), COLUMNS)
+
+
+def test_parquet_row_groups_follow_the_chunks(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "occupancy.parquet"
+    writer = open_table_writer(str(path), COLUMNS, chunk_rows=2)
+    for index in range(5):
+        writer.append([21600.0 + 60 * index, index / 10, index / 5])
+    writer.close()
+    table = parquet.read_table(str(path))
+    assert table.column_names == COLUMNS
+    assert table.column("time_int").to_pylist() == [21600.0 + 60 * index for index in range(5)]
+    assert parquet.ParquetFile(str(path)).num_row_groups == 3
+
+
+def test_occupancy_rows_are_stamped_with_their_sample_time(tmp_path, monkeypatch):
+    from pascal import recording
+    from pascal.offline.run import run_script
+    monkeypatch.setattr(recording, "OUTPUT_DIR", str(tmp_path))
+    # Steps of 0.7 s from 21590 s never fall on the minute
+    run_script(os.path.join(ROOT, "Link Occupancy vs Capacity.py"), hours=0.1, acycle=0.7, start_time=21590.0)
+    rows = read_csv(tmp_path / "queue_to_capacity_data.csv")
+    assert rows[0][0] == "time_int" and rows[0][1:] == sorted(rows[0][1:])
+    assert [float(row[0]) for row in rows[1:]] == [21600.0 + 60 * index for index in range(6)]
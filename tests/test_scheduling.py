@@ -0,0 +1,241 @@
+"""
+Wake-up deadlines, the sample times of Sampler and MultiRateSampler, and the
+signal timelines the controllers give on the offline stand-in at step lengths
+that do not divide the state durations.
+"""
+import itertools
+import math
+
+import pytest
+
+from pascal.scheduling import MultiRateSampler, Sampler, StateClock, deadline
+
+ALGORITHMS = ("varaiya", "le", "levin", "pascal")
+GREEN, AMBER, RED = 1, 2, 0
+
+
+@pytest.fixture
+def timeline(simulator, monkeypatch):
+    """
+    run(algorithm, acycle, seconds) drives junction 1978 on the stand-in and
+    returns its controller and the state changes it made, [(time1, signal
+    group, state), ...].
+    """
+    from PyANGKernel import GKSystem
+    from pascal.multi import build_controllers
+    from pascal.offline import aapi
+    changes = []
+    change = aapi.ECIChangeSignalGroupState
+
+    def recorded(junction_id, signal_group, state, timeSta, time1, acycle):
+        changes.append((time1, signal_group, state))
+        return change(junction_id, signal_group, state, timeSta, time1, acycle)
+
+    monkeypatch.setattr(aapi, "ECIChangeSignalGroupState", recorded)
+
+    def run(algorithm, acycle, seconds=1200):
+        controller, = build_controllers(algorithm, [1978])
+        controller.simulation_ready(GKSystem.getSystem().getActiveModel())
+        for step in range(int(round(seconds / acycle))):
+            time1 = step * acycle
+            simulator.step(acycle)
+            controller.post_manage(time1, time1, 0, acycle)
+        return controller, changes
+
+    return run
+
+
+def intervals(changes, state):
+    """Durations of every stretch a signal group spent in state."""
+    entered = {}
+    durations = []
+    for time1, signal_group, new_state in changes:
+        if signal_group in entered and new_state != state:
+            durations.append(time1 - entered.pop(signal_group))
+        elif new_state == state:
+            entered.setdefault(signal_group, time1)
+    return durations
+
+
+def all_reds(changes):
+    """Time from each amber ending to the next signal group going green."""
+    durations = []
+    amber = set()
+    red_since = None
+    for time1, signal_group, state in changes:
+        if state == AMBER:
+            amber.add(signal_group)
+        elif state == RED and signal_group in amber:
+            amber.discard(signal_group)
+            red_since = time1
+        elif state == GREEN and red_since is not None:
+            durations.append(time1 - red_since)
+            red_since = None
+    return durations
+
+
+def states(changes):
+    """
+    [(time1, state entered), ...] of the junction: amber, all red (RED) or a
+    new green, from the green the first step picks at time1 = 0 (whose signal
+    groups may show green already).
+    """
+    entered = [(0.0, GREEN)]
+    for time1, group in itertools.groupby(changes, key=lambda change: change[0]):
+        new_states = {state for _, _, state in group}
+        state = AMBER if AMBER in new_states else GREEN if GREEN in new_states else RED
+        if entered[-1][1] != state:
+            entered.append((time1, state))
+    return entered
+
+
+def check_clock(entered, acycle, durations):
+    """
+    Checks that every state was entered on the first step at or after the
+    instant the state before it was due to end, each state lasting
+    durations[state] seconds (a multiple of it for a green). A green starts
+    where the previous state was due to end, amber and all red at the step
+    that entered them.
+    """
+    due = entered[0][0]
+    for (start, previous), (time1, state) in zip(entered, entered[1:]):
+        seconds = durations[previous]
+        if previous == GREEN:
+            due += seconds * max(1, math.floor((time1 - due + 1e-9) / seconds))
+        else:
+            due = start + seconds
+        assert due - 1e-6 <= time1 < due + acycle - 1e-6
+    return due
+
+
+def steps_up(seconds, acycle):
+    """seconds rounded up to whole steps of acycle."""
+    return math.ceil(round(seconds / acycle, 9)) * acycle
+
+
+@pytest.mark.parametrize("acycle", [0.1, 0.3, 0.7])
+def test_deadline_falls_on_the_first_step_at_or_after_the_end(acycle):
+    for seconds, start_step in itertools.product((2, 5, 15, 20), (0, 7, 1000)):
+        wakeup = deadline(start_step * acycle, seconds)
+        steps = next(k for k in itertools.count() if (start_step + k) * acycle >= wakeup)
+        assert steps == math.ceil(round(seconds / acycle, 9))
+
+
+def test_state_clock_times_greens_from_where_the_previous_state_was_due():
+    clock = StateClock()
+    assert clock.start(0.3, 20) == deadline(0.3, 20)
+    # Amber and all red start at the step that enters them and last their whole time
+    assert clock.start(20.4, 2, clearance=True) == deadline(20.4, 2)
+    assert clock.start(22.9, 2, clearance=True) == deadline(22.9, 2)
+    # The next green starts where the all red was due, however late the step
+    assert clock.start(25.2, 20) == deadline(24.9, 20)
+    assert clock.due == pytest.approx(44.9)
+
+
+@pytest.mark.parametrize("acycle", [0.3, 0.7])
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_clearance_lasts_its_time_rounded_up_to_a_step(algorithm, acycle, timeline):
+    controller, changes = timeline(algorithm, acycle)
+    ambers = intervals(changes, AMBER)
+    reds = all_reds(changes)
+    assert len(ambers) > 20 and len(reds) > 10
+    for duration in ambers:
+        assert duration == pytest.approx(steps_up(controller.amber_time, acycle))
+    for duration in reds:
+        assert duration == pytest.approx(steps_up(controller.all_red_time, acycle))
+
+
+@pytest.mark.parametrize("acycle", [0.3, 0.7])
+def test_levin_green_lasts_whole_greens(acycle, timeline):
+    controller, changes = timeline("levin", acycle)
+    greens = intervals(changes, GREEN)
+    assert len(greens) > 10
+    # A phase held for k more picks stays green k times longer, each green rounded up to a step
+    for duration in greens:
+        k = round(duration / controller.time_step)
+        assert k >= 1 and duration == pytest.approx(k * steps_up(controller.time_step, acycle))
+
+
+@pytest.mark.parametrize("acycle", [0.3, 0.7])
+def test_varaiya_states_follow_the_state_clock(acycle, timeline):
+    controller, changes = timeline("varaiya", acycle)
+    entered = states(changes)
+    assert [state for _, state in entered[:7]] == [GREEN, AMBER, RED, GREEN, AMBER, RED, GREEN]
+    assert len(entered) > 60
+    durations = {GREEN: controller.time_step, AMBER: controller.amber_time, RED: controller.all_red_time}
+    # Greens stay on the clock: after 20 minutes it is within a step of the steps
+    due = check_clock(entered, acycle, durations)
+    assert entered[-1][0] - due < acycle
+
+
+def sample_times(sampler, acycle, seconds, start=0.0):
+    """Steps of acycle seconds from start, added up as Aimsun does; the times at which sampler fired."""
+    times = []
+    now = start
+    for _ in range(int(round(seconds / acycle))):
+        if sampler.fire(now):
+            times.append(now)
+        now += acycle
+    return times
+
+
+@pytest.mark.parametrize("acycle", [0.1, 0.25, 0.3, 0.5, 0.7, 1.0])
+def test_steps_shorter_than_the_interval_miss_nothing(acycle):
+    sampler = Sampler(1.0)
+    times = sample_times(sampler, acycle, 60)
+    assert sampler.fired == len(times) == 60
+    assert sampler.missed == 0
+    # Each sample time fires on the first step at or after it, ten steps of 0.1 s included
+    for k, now in enumerate(times):
+        assert now >= k - 1e-6 and now - acycle < k - 1e-6
+
+
+def test_long_steps_count_the_sample_times_passed_over():
+    sampler = Sampler(1.0)
+    times = sample_times(sampler, 2.5, 10)
+    assert times == [0.0, 2.5, 5.0, 7.5]
+    # 0 | 1, 2 | 3, 4, 5 | 6, 7: the last step fired at 7.5 for 6 and 7
+    assert sampler.fired == 4
+    assert sampler.missed == 4
+    assert sampler.next_sample == 8.0
+    assert sampler.sample_time == 7.0
+
+
+def test_sample_times_stay_on_the_grid_of_start():
+    sampler = Sampler(60.0, start=21600.0)
+    times = sample_times(sampler, 0.7, 300, start=21599.0)
+    assert len(times) == 5 and sampler.missed == 0
+    assert sampler.sample_time == 21840.0 and times[-1] != 21840.0
+    # Late steps do not shift the later samples: each is less than a step after its grid time
+    for k, now in enumerate(times):
+        assert 0 <= now - (21600.0 + 60.0 * k) + 1e-6 < 0.7
+
+
+def test_window_ends_after_its_last_sample():
+    sampler = Sampler(60.0, start=60.0, end=180.0)
+    times = sample_times(sampler, 0.5, 400)
+    assert times == [60.0, 120.0, 180.0]
+    assert sampler.next_sample == math.inf and sampler.wakeup == math.inf
+    assert not sampler.fire(1e9)
+    assert sampler.fired == 3
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        Sampler(0)
+
+
+def test_multi_rate_sampler_fires_every_series_due():
+    sampling = MultiRateSampler({"reading": Sampler(1.0), "row": Sampler(5.0)})
+    fired = {}
+    now = 0.0
+    for _ in range(24):
+        if now >= sampling.wakeup:
+            for name in sampling.fire(now):
+                fired.setdefault(name, []).append(now)
+        now += 0.5
+    assert fired["reading"] == [float(k) for k in range(12)]
+    assert fired["row"] == [0.0, 5.0, 10.0]
+    assert sampling.fire(12.0) == ["reading"]
+    assert sampling.report_lines() == ["Sampler reading: every 1.0 s, 13 samples, 0 sample times missed",
+                                       "Sampler row: every 5.0 s, 3 samples, 0 sample times missed"]
@@ -0,0 +1,237 @@
+"""
+A decision reads each monitored section once, checked with vehicle getters
+that count their calls: over a few made-up sections, and through the fake
+AAPI for every algorithm.
+"""
+import collections
+import types
+
+import pytest
+
+ALGORITHMS = ("varaiya", "capacity_aware", "le", "levin", "pascal")
+
+# Lane of every vehicle on each section
+VEHICLES = {
+    552: [1, 1, 2, 3],
+    658: [1, 2, 2],
+    778: [1, 2],
+    769: [],
+    801: [2, 2, 2, 1, 1],
+}
+
+# (split sections upstream, signal section, destination, split sections downstream, origin lanes) of turnings
+# that share their approach or their destination
+TURNINGS = [
+    ([658], 552, 778, [769], [1]),
+    ([658], 552, 801, [], [2]),
+    ([658], 552, 801, [], [3]),
+    ([], 801, 778, [769], [1, 2]),
+]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Counter of ("total", section) and ("vehicle", section, index) reads of VEHICLES through AAPI."""
+    from pascal import sensing
+    counts = collections.Counter()
+
+    def get_total(section_id, considerAllSegments):
+        counts["total", section_id] += 1
+        return len(VEHICLES[section_id])
+
+    def get_vehicle(section_id, index):
+        counts["vehicle", section_id, index] += 1
+        return types.SimpleNamespace(idVeh=1000 * section_id + index, idSection=section_id, numberLane=VEHICLES[section_id][index])
+
+    monkeypatch.setattr(sensing.AAPI, "AKIVehStateGetNbVehiclesSection", get_total, raising=False)
+    monkeypatch.setattr(sensing.AAPI, "AKIVehStateGetVehicleInfSection", get_vehicle, raising=False)
+    return counts
+
+
+def lanes(section_ids):
+    counts = {}
+    for section_id in section_ids:
+        for lane in VEHICLES[section_id]:
+            counts[lane] = counts.get(lane, 0) + 1
+    return counts
+
+
+def decide(snapshot):
+    """(vehicles upstream, vehicles downstream) of every turning, counted as the controllers count them."""
+    values = []
+    for upstream, from_section, to_section, downstream, origin_lanes in TURNINGS:
+        split = snapshot.merged_lane_counts(upstream) if upstream else {}
+        signal = snapshot.lane_counts(from_section)
+        origin = sum(signal.get(lane, 0) + split.get(lane, 0) for lane in origin_lanes)
+        destination = sum(sum(snapshot.lane_counts(section_id).values()) for section_id in [to_section] + downstream)
+        values.append((origin, destination))
+    return values
+
+
+def test_one_decision_reads_each_section_once(calls):
+    from pascal.sensing import SectionSnapshot
+    values = decide(SectionSnapshot())
+    assert all(count == 1 for count in calls.values())
+    assert sorted({key[1] for key in calls}) == sorted(VEHICLES)
+    assert len(calls) == len(VEHICLES) + sum(len(lanes) for lanes in VEHICLES.values())
+    assert values == [(3, 2), (3, 5), (1, 5), (5, 2)]
+
+
+def test_snapshot_counts_lane_by_lane(calls):
+    from pascal.sensing import SectionSnapshot
+    snapshot = SectionSnapshot()
+    assert snapshot.lane_counts(552) == lanes([552])
+    assert snapshot.lane_counts(769) == {}
+    assert snapshot.merged_lane_counts([552, 658]) == lanes([552, 658])
+    snapshot.prefetch(VEHICLES)
+    assert all(count == 1 for count in calls.values())
+
+
+def test_clear_reads_again(calls):
+    from pascal.sensing import SectionSnapshot
+    snapshot = SectionSnapshot()
+    decide(snapshot)
+    snapshot.clear()
+    decide(snapshot)
+    assert all(count == 2 for count in calls.values())
+
+
+@pytest.fixture
+def network_reads(loaded_network, monkeypatch):
+    """
+    Starts counting the vehicle getter calls of the fake AAPI and returns the
+    Counter, keyed as in calls.
+    """
+    from pascal.offline import aapi
+    counts = collections.Counter()
+    get_total = aapi.AKIVehStateGetNbVehiclesSection
+    get_vehicle = aapi.AKIVehStateGetVehicleInfSection
+
+    def counted_total(section_id, considerAllSegments):
+        counts["total", section_id] += 1
+        return get_total(section_id, considerAllSegments)
+
+    def counted_vehicle(section_id, index):
+        counts["vehicle", section_id, index] += 1
+        return get_vehicle(section_id, index)
+
+    def start():
+        counts.clear()
+        monkeypatch.setattr(aapi, "AKIVehStateGetNbVehiclesSection", counted_total)
+        monkeypatch.setattr(aapi, "AKIVehStateGetVehicleInfSection", counted_vehicle)
+        return counts
+
+    return start
+
+
+def model():
+    from PyANGKernel import GKSystem
+    return GKSystem.getSystem().getActiveModel()
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_controller_decision_reads_each_section_once(algorithm, network_reads):
+    from pascal.multi import build_controllers
+    controller, = build_controllers(algorithm, [1978])
+    controller.simulation_ready(model())
+    counts = network_reads()
+    # The first step that reads anything is the first decision
+    for step in range(100):
+        controller.post_manage(step * 0.5, step * 0.5, 0, 0.5)
+        if counts:
+            break
+
+    assert counts and all(count == 1 for count in counts.values())
+    assert {key[1] for key in counts} == set(controller.origin_sections) | set(controller.destination_sections)
+    # Several turnings share sections, so reading turning by turning would read some twice
+    used = [section_id for _, turning in controller.topology.iter_turnings()
+            for section_id in [turning.from_section, turning.to_section]]
+    assert len(used) > len(set(used))
+
+
+def test_one_step_of_all_junctions_reads_shared_sections_once(network_reads):
+    from pascal.multi import MultiJunctionController
+    from pascal.offline.run import ALL_JUNCTIONS
+    controller = MultiJunctionController.for_algorithm("varaiya", ALL_JUNCTIONS)
+    controller.simulation_ready(model())
+    counts = network_reads()
+    controller.post_manage(0.0, 0.0, 0, 0.5)
+
+    assert counts and all(count == 1 for count in counts.values())
+    per_junction = [set(c.origin_sections) | set(c.destination_sections) for c in controller.controllers]
+    assert {key[1] for key in counts} == set().union(*per_junction)
+    # Neighbouring junctions share sections, some read lane by lane by one and as a total by another
+    assert sum(len(sections) for sections in per_junction) > len(set().union(*per_junction))
+
+
+def drive(controller, simulator, seconds, acycle=0.5):
+    """Steps the simulator under controller, feeding it the section entries and exits of every step."""
+    for step in range(int(seconds / acycle)):
+        time1 = step * acycle
+        simulator.step(acycle)
+        for entered, vehicle_id, section_id in simulator.section_events():
+            if entered:
+                controller.enter_vehicle_section(vehicle_id, section_id, time1)
+            else:
+                controller.exit_vehicle_section(vehicle_id, section_id, time1)
+        controller.post_manage(time1, time1, 0, acycle)
+
+
+def test_incremental_counts_follow_the_vehicle_scan(simulator):
+    from pascal.multi import MultiJunctionController
+    from pascal.offline.run import ALL_JUNCTIONS
+    from pascal.sensing import CheckedSensor, IncrementalSensor
+    incremental = IncrementalSensor(reconcile_every=float("inf"))
+    sensor = CheckedSensor(incremental)
+    controller = MultiJunctionController.for_algorithm("varaiya", ALL_JUNCTIONS, sensor)
+    controller.simulation_ready(model())
+    drive(controller, simulator, 1200)
+
+    assert incremental.watched == {section_id for c in controller.controllers
+                                   for section_id in c.origin_sections + c.destination_sections}
+    # One scan at the first read, the callbacks kept every count exact from then on
+    assert incremental.reconciles == 1 and incremental.drift == 0
+    assert sensor.checks > 1000 and sensor.abs_error == 0
+    assert sum(sum(counts.values()) for counts in incremental.counts.values()) > 0
+
+
+def test_reconcile_corrects_drift(loaded_network):
+    from pascal.sensing import IncrementalSensor, read_section_lane_counts
+    sensor = IncrementalSensor(reconcile_every=60.0)
+    section_id = next(iter(loaded_network.sections))
+    sensor.watch([section_id])
+    exact = read_section_lane_counts(section_id)
+    assert sensor.lane_counts(section_id) == exact and sensor.reconciles == 1
+
+    # A vehicle counted twice; callbacks of vehicles not counted only move the clock on
+    lane = next(iter(exact))
+    sensor.counts[section_id][lane] += 2
+    sensor.exit(-1, section_id, 30.0)
+    assert sensor.total(section_id) == sum(exact.values()) + 2
+    sensor.exit(-1, section_id, 90.0)
+    assert sensor.lane_counts(section_id) == exact
+    assert sensor.reconciles == 2 and sensor.drift == 2 and sensor.max_drift == 2
+
+    # Sections not watched are scanned on every read
+    other = next(s for s in loaded_network.sections if s != section_id)
+    assert sensor.total(other) == sum(read_section_lane_counts(other).values())
+    assert other not in sensor.counts
+
+
+def test_exit_from_another_section_keeps_the_count(loaded_network):
+    from pascal.offline import aapi
+    from pascal.sensing import IncrementalSensor
+    sensor = IncrementalSensor(reconcile_every=float("inf"))
+    section_id, other = list(loaded_network.sections)[:2]
+    sensor.watch([section_id])
+    sensor.lane_counts(section_id)
+    vehicle = aapi.AKIVehStateGetVehicleInfSection(section_id, 0)
+    before = sensor.total(section_id)
+
+    # The vehicle counted on section_id reported leaving a section it was not counted on
+    sensor.exit(vehicle.idVeh, other, 1.0)
+    assert sensor.total(section_id) == before
+    assert sensor.location[vehicle.idVeh] == (section_id, vehicle.numberLane)
+    sensor.exit(vehicle.idVeh, section_id, 2.0)
+    assert sensor.total(section_id) == before - 1
+    assert vehicle.idVeh not in sensor.location
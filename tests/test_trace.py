@@ -0,0 +1,78 @@
+"""
+DecisionTrace records written and read back through load_trace.
+"""
+import numpy as np
+import pytest
+
+from pascal.trace import DecisionTrace, chosen_signal_groups, load_trace
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "out" / "decisions.trace")
+    trace = DecisionTrace(path, signal_groups=64, chunk_records=4)
+    trace.check(1978, [1, 64])
+    for k in range(10):
+        trace.append(k * 0.5, 1978 if k % 2 else 505, {1: 1.5 * k, 64: -k}, [1, 4, 64] if k % 2 else [2], 15 + k)
+    assert trace.records == 10 and trace.pending == 2
+    # Whole chunks are on disk before close
+    assert len(load_trace(path)) == 8
+    trace.close()
+
+    records = load_trace(path)
+    assert isinstance(records, np.memmap) and not records.flags.writeable
+    assert len(records) == 10
+    assert list(records["time"]) == [k * 0.5 for k in range(10)]
+    assert list(records["green"]) == [15 + k for k in range(10)]
+    central = records[records["junction"] == 1978]
+    assert len(central) == 5
+    assert chosen_signal_groups(central[0]) == [1, 4, 64]
+    assert chosen_signal_groups(records[0]) == [2]
+    assert list(central["pressure"][:, 0]) == [1.5, 4.5, 7.5, 10.5, 13.5]
+    assert central["pressure"][0, 63] == -1
+    # Signal groups without a pressure are NaN
+    assert np.isnan(records["pressure"][:, 1:63]).all()
+
+
+def test_trace_appends_to_an_existing_file(tmp_path):
+    path = str(tmp_path / "decisions.trace")
+    for k in range(2):
+        trace = DecisionTrace(path, signal_groups=8)
+        trace.append(float(k), 505, {1: 1.0}, [1], 10)
+        trace.close()
+    assert list(load_trace(path)["time"]) == [0.0, 1.0]
+    with pytest.raises(ValueError):
+        DecisionTrace(path, signal_groups=16)
+
+
+def test_record_cut_short_is_left_out(tmp_path):
+    path = str(tmp_path / "decisions.trace")
+    trace = DecisionTrace(path, signal_groups=8)
+    for k in range(3):
+        trace.append(float(k), 505, {}, [], 10)
+    trace.close()
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 5)
+    records = load_trace(path)
+    assert list(records["time"]) == [0.0, 1.0]
+
+
+def test_empty_trace_and_bad_files(tmp_path):
+    path = str(tmp_path / "decisions.trace")
+    DecisionTrace(path, signal_groups=8).close()
+    assert len(load_trace(path)) == 0
+    with open(path, "r+b") as f:
+        f.write(b"NOTATRAC")
+    with pytest.raises(ValueError, match="not a decision trace"):
+        load_trace(path)
+    (tmp_path / "short.trace").write_bytes(b"PASCAL")
+    with pytest.raises(ValueError, match="too short"):
+        load_trace(str(tmp_path / "short.trace"))
+
+
+def test_signal_groups_must_fit(tmp_path):
+    with pytest.raises(ValueError):
+        DecisionTrace(str(tmp_path / "a.trace"), signal_groups=65)
+    trace = DecisionTrace(str(tmp_path / "b.trace"), signal_groups=8)
+    with pytest.raises(ValueError, match="junction 505"):
+        trace.check(505, [1, 9])
+    trace.close()